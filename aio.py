@@ -0,0 +1,702 @@
+"""
+asyncio client for the AXL api.
+AsyncAXL has the methods of AXL as coroutines. Requests are built and replies are read by the
+AXL methods themselves, only the HTTP exchange is done without blocking, on pools of persistent
+asyncio connections bounded by a semaphore, so thousands of calls in flight cost no threads.
+"""
+
+import asyncio
+import collections
+import email.parser
+import functools
+import http.client
+import inspect
+import time
+import urllib.parse
+
+from .foley import AXL
+from .foley import SQL_CHUNK_SIZE
+from .inventory import BATCH_SIZE
+from .inventory import as_phone
+from .inventory import line_query
+from .inventory import phone_query
+from .retry import RetryPolicy
+from .retry import annotate
+from .retry import recording
+from .schema import DEFAULT_CACHE_DIR
+from .templates import TEMPLATE_OPERATIONS
+from .templates import TemplatedService
+from .throttle import AXLLimiter
+from .transport import ConnectionPool
+from .transport import Pause
+from .transport import Sender
+from .transport import SessionJar
+from .transport import basic_authorization
+from .transport import unverified_context
+
+
+class _Connection(object):
+    """
+    asyncio stream pair of one persistent connection
+    """
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+
+    def close(self):
+        self.writer.close()
+
+
+class AsyncConnectionPool(object):
+    """
+    Pool of persistent asyncio connections to one host.
+    At most size requests are in flight at once, callers wait on a semaphore.
+    Idle connections are closed after idle_timeout seconds.
+    """
+
+    counters = ConnectionPool.counters
+
+    def __init__(self, scheme, host, port, size=100, idle_timeout=60, timeout=90, context=None):
+        """
+        :param scheme: http or https
+        :param host: host name or IP address
+        :param port: TCP port
+        :param size: maximum number of requests in flight
+        :param idle_timeout: seconds an idle connection is kept open
+        :param timeout: seconds to wait for a connection or a response
+        :param context: ssl context for https connections
+        """
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.context = context or unverified_context()
+
+        self.connects = 0
+        self.handshakes = 0
+        self.resumed = 0
+        self.requests = 0
+        self.reused = 0
+
+        self._idle = collections.deque()
+        self._slots = asyncio.Semaphore(size)
+
+    async def _connect(self):
+        """
+        Open a new connection
+        :return: connection
+        """
+        ssl = self.context if self.scheme == 'https' else None
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.port, ssl=ssl), self.timeout)
+        self.connects += 1
+        sock = writer.get_extra_info('ssl_object')
+        if sock is not None:
+            if sock.session_reused:
+                self.resumed += 1
+            else:
+                self.handshakes += 1
+        return _Connection(reader, writer)
+
+    def _idle_connection(self):
+        """
+        Take the most recently used idle connection
+        :return: connection, None if there is no open idle connection
+        """
+        now = time.monotonic()
+        while self._idle:
+            conn, since = self._idle.pop()
+            if now - since < self.idle_timeout:
+                return conn
+            conn.close()
+        return None
+
+    async def _exchange(self, conn, method, path, body, headers):
+        """
+        Send one request and read its response
+        :return: tuple of status, reason, headers, body and whether the server closes the connection
+        """
+        lines = ['{0} {1} HTTP/1.1'.format(method, path),
+                 'Host: {0}:{1}'.format(self.host, self.port),
+                 'Content-Length: {0}'.format(len(body or b''))]
+        lines.extend('{0}: {1}'.format(k, v) for k, v in headers.items())
+        conn.writer.write('\r\n'.join(lines).encode('latin-1') + b'\r\n\r\n' + (body or b''))
+        await conn.writer.drain()
+
+        status_line = await conn.reader.readline()
+        if not status_line:
+            raise ConnectionResetError('Remote end closed connection without response')
+        version, status, reason = (status_line.decode('latin-1').rstrip('\r\n').split(' ', 2) + [''])[:3]
+
+        head = []
+        while True:
+            line = await conn.reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            head.append(line.decode('latin-1'))
+        reply_headers = email.parser.Parser(_class=http.client.HTTPMessage).parsestr(''.join(head))
+
+        will_close = (reply_headers.get('Connection', '').lower() == 'close' or
+                      (version == 'HTTP/1.0' and reply_headers.get('Connection', '').lower() != 'keep-alive'))
+
+        if reply_headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size = int((await conn.reader.readline()).split(b';')[0], 16)
+                if size == 0:
+                    while (await conn.reader.readline()) not in (b'\r\n', b'\n', b''):
+                        pass
+                    break
+                chunks.append(await conn.reader.readexactly(size))
+                await conn.reader.readexactly(2)
+            data = b''.join(chunks)
+        elif reply_headers.get('Content-Length') is not None:
+            data = await conn.reader.readexactly(int(reply_headers['Content-Length']))
+        else:
+            data = await conn.reader.read()
+            will_close = True
+
+        return int(status), reason, reply_headers, data, will_close
+
+    async def request(self, method, path, body, headers):
+        """
+        Make a request on a pooled connection.
+        A request on an idle connection the server already closed is resent once on a new connection.
+        :param method: HTTP method
+        :param path: request path
+        :param body: request body
+        :param headers: request headers
+        :return: tuple of status, reason, headers and body
+        """
+        async with self._slots:
+            for attempt in range(2):
+                conn = self._idle_connection()
+                fresh = conn is None
+                if fresh:
+                    conn = await self._connect()
+                try:
+                    status, reason, reply_headers, data, will_close = await asyncio.wait_for(
+                        self._exchange(conn, method, path, body, headers), self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    conn.close()
+                    if fresh or attempt:
+                        raise
+                    continue
+                except BaseException:
+                    conn.close()
+                    raise
+
+                self.requests += 1
+                if not fresh:
+                    self.reused += 1
+                if will_close:
+                    conn.close()
+                else:
+                    self._idle.append((conn, time.monotonic()))
+                return status, reason, reply_headers, data
+
+    def close(self):
+        """
+        Close the idle connections
+        """
+        while self._idle:
+            self._idle.pop()[0].close()
+
+    def stats(self):
+        """
+        Connection counters
+        :return: dictionary of counters
+        """
+        return {
+            'connects': self.connects,
+            'handshakes': self.handshakes,
+            'resumed': self.resumed,
+            'requests': self.requests,
+            'reused': self.reused,
+            'idle': len(self._idle),
+        }
+
+
+class AsyncTransport(Sender):
+    """
+    Non blocking HTTP transport with a pool of persistent connections per host and HTTP basic authentication
+    """
+
+    def __init__(self, username, password, concurrency=100, idle_timeout=60, timeout=90, context=None,
+                 limiter=True, throttle_retries=5, retry=True, preemptive=True, session=True):
+        """
+        :param username: axl username
+        :param password: axl password
+        :param concurrency: maximum number of requests in flight per host
+        :param idle_timeout: seconds an idle connection is kept open
+        :param timeout: seconds to wait for a connection or a response
+        :param context: ssl context, defaults to one that does not verify the UCM certificate
+        :param limiter: AXLLimiter, True for a default adaptive limiter, None to send without limiting
+        :param throttle_retries: times a request UCM throttled is sent again
+        :param retry: RetryPolicy for transient failures, True for the default policy, None to not retry
+        :param preemptive: send credentials with every request, False to wait for the 401 challenge
+        :param session: reuse the UCM session cookie instead of sending credentials, False to authenticate every request
+        """
+        self.username = username
+        self.password = password
+        self.concurrency = concurrency
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.context = context or unverified_context()
+        self.limiter = AXLLimiter() if limiter is True else limiter
+        self.throttle_retries = throttle_retries
+        self.retry = RetryPolicy() if retry is True else retry
+        self.preemptive = preemptive
+        self.sessions = SessionJar() if session else None
+        self.pools = {}
+
+    def pool(self, scheme, host, port):
+        """
+        Get the connection pool of a host
+        :param scheme: http or https
+        :param host: host name or IP address
+        :param port: TCP port
+        :return: AsyncConnectionPool
+        """
+        key = (scheme, host, port)
+        if key not in self.pools:
+            self.pools[key] = AsyncConnectionPool(scheme, host, port,
+                                                  size=self.concurrency,
+                                                  idle_timeout=self.idle_timeout,
+                                                  timeout=self.timeout,
+                                                  context=self.context)
+        return self.pools[key]
+
+    def credentials(self):
+        """
+        Basic authorization header value
+        :return: header value
+        """
+        return basic_authorization(self.username, self.password)
+
+    async def send(self, url, message, headers, method='POST'):
+        """
+        Send a request
+        :param url: request url
+        :param message: request body
+        :param headers: request headers
+        :param method: HTTP method
+        :return: tuple of status, reason, headers and body
+        """
+        url = urllib.parse.urlparse(url)
+        port = url.port or (443 if url.scheme == 'https' else 80)
+        pool = self.pool(url.scheme, url.hostname, port)
+        path = url.path or '/'
+        if url.query:
+            path = '{0}?{1}'.format(path, url.query)
+
+        return await self._run(self.steps((url.scheme, url.hostname, port), headers), pool, method, path, message)
+
+    async def _run(self, steps, pool, method, path, body):
+        """
+        Take the steps of sending a request, awaiting the pauses and the exchanges on the pool
+        :return: tuple of status, reason, headers and body
+        """
+        reply = error = None
+        while True:
+            try:
+                step = steps.send(reply) if error is None else steps.throw(error)
+            except StopIteration as e:
+                return e.value
+            reply = error = None
+            if isinstance(step, Pause):
+                await asyncio.sleep(step.seconds)
+                continue
+            try:
+                reply = await pool.request(method, path, body, step.headers)
+            except Exception as e:
+                error = e
+
+    def close(self):
+        """
+        Close the idle connections of every pool
+        """
+        for pool in self.pools.values():
+            pool.close()
+
+    def stats(self):
+        """
+        Connection counters summed over every pool and the session counters
+        :return: dictionary of counters
+        """
+        totals = collections.Counter(dict.fromkeys(AsyncConnectionPool.counters + SessionJar.counters, 0))
+        for pool in self.pools.values():
+            totals.update(pool.stats())
+        if self.sessions is not None:
+            totals.update(self.sessions.stats())
+        return dict(totals)
+
+
+class _Pending(BaseException):
+    """
+    Raised out of an AXL method at the first SOAP call that has no reply yet.
+    A BaseException so it is not caught by the except Exception handlers of the methods.
+    """
+
+    def __init__(self, action, context, event, key):
+        super(_Pending, self).__init__(action)
+        self.action = action
+        self.context = context
+        self.event = event
+        self.key = key
+
+
+class _PassService(object):
+    """
+    suds service that returns the replies received so far and raises _Pending for a call without one.
+    Replies are matched to calls by operation and request envelope, not by position, so a run that makes
+    other calls than the run before, after a lookup cache hit or expiry, never gets the reply of another call.
+    """
+
+    def __init__(self, service, replies, instruments):
+        """
+        :param service: suds service of a client that builds requests without sending them
+        :param replies: dictionary of tuple of operation and envelope to the list of replies in call order
+        :param instruments: Instruments of the AXL instance
+        """
+        self._service = service
+        self._replies = replies
+        self._instruments = instruments
+        self._calls = collections.Counter()
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            method = getattr(self._service, name)
+            try:
+                # no event is current, the hooks are not called for a request that is not sent
+                context = method(*args, **kwargs)
+            except Exception as e:
+                event, token = self._instruments.start(name)
+                self._instruments.stop(event, token, error=e)
+                raise
+            key = name, context.envelope
+            # the same request made twice in a run gets its replies in order
+            n = self._calls[key]
+            self._calls[key] += 1
+            if n < len(self._replies.get(key, ())):
+                return self._replies[key][n]
+
+            event, token = self._instruments.start(name)
+            try:
+                context = method(*args, **kwargs)
+            except Exception as e:
+                self._instruments.stop(event, token, error=e)
+                raise
+            self._instruments.pause(token)
+            raise _Pending(method.method.soap.action, context, event, key)
+        return call
+
+
+class _PassClient(object):
+    """
+    Stands in for the suds client of an AXL method run
+    """
+
+    def __init__(self, client, replies, instruments):
+        self.service = _PassService(client.service, replies, instruments)
+        self.wsdl = client.wsdl
+
+
+class _Pass(AXL):
+    """
+    One run of an AXL method over the replies received so far
+    """
+
+    def __init__(self, axl, client, replies):
+        self.__dict__.update(axl.__dict__)
+        self._client = _PassClient(client, replies, axl.instruments)
+
+    def _raw_rows(self, operation, tag, *args, **kwargs):
+        """
+        AsyncAXL sends the requests and suds parses the replies, raw mode returns suds objects
+        """
+        return self._rows(operation, tag, *args, **kwargs)
+
+
+class _PagePass(_Pass):
+    """
+    One run of an AXL generator method that fetches a single page of its list or SQL query from a cursor.
+    The async generator keeps the cursor between pages, so a page is fetched once and only its rows are held.
+    """
+
+    def __init__(self, axl, client, replies, cursor):
+        """
+        :param cursor: where the page starts, None for the first page
+        """
+        super(_PagePass, self).__init__(axl, client, replies)
+        self.cursor = cursor
+        # cursor of the next page, None after the last page
+        self.next = None
+        self._paged = False
+
+    def _page(self):
+        if self._paged:
+            raise RuntimeError('AsyncAXL generator methods page through one list or SQL query')
+        self._paged = True
+
+    def _iter_list(self, operation, tag, page_size, raw, *args, **kwargs):
+        self._page()
+        page, self.next = self._list_page(operation, tag, page_size, raw, self.cursor or 0, *args, **kwargs)
+        return iter(page)
+
+    def iter_sql_query(self, query, key=None, chunk_size=SQL_CHUNK_SIZE):
+        self._page()
+        rows, self.next = self._sql_chunk(query, key, self.cursor or (0, None, chunk_size))
+        return iter(rows)
+
+
+async def _run(axl, call, make_pass):
+    """
+    Run an AXL method over the replies received so far until every SOAP call it makes has a reply
+    :param axl: AsyncAXL instance
+    :param call: function calling the method on a pass
+    :param make_pass: function making the pass of a run from the replies
+    :return: tuple of the result and the last pass
+    """
+    replies = {}
+    while True:
+        run = make_pass(replies)
+        try:
+            return call(run), run
+        except _Pending as pending:
+            replies.setdefault(pending.key, []).append(await axl._send(pending))
+
+
+def _coroutine(name):
+    """
+    Make a coroutine method that runs the AXL method of the same name
+    """
+    @functools.wraps(getattr(AXL, name))
+    async def method(self, *args, **kwargs):
+        with recording() as record:
+            result, run = await _run(self, lambda run: getattr(run, name)(*args, **kwargs), self._pass)
+        return annotate(result, record)
+    return method
+
+
+def _async_generator(name):
+    """
+    Make an async generator method that runs the AXL generator method of the same name, one page at a time
+    """
+    @functools.wraps(getattr(AXL, name))
+    async def method(self, *args, **kwargs):
+        cursor = None
+        while True:
+            rows, run = await _run(self, lambda run: list(getattr(run, name)(*args, **kwargs)),
+                                   lambda replies: _PagePass(self.axl, self.client, replies, cursor))
+            for row in rows:
+                yield row
+            if run.next is None:
+                return
+            cursor = run.next
+    return method
+
+
+def _collected(name, generator):
+    """
+    Make a coroutine method returning the list of the async generator method that the AXL method of the same
+    name makes a list of, the pages are fetched from the cursor instead of running the method again per page
+    """
+    function = getattr(AXL, name)
+    signature = inspect.signature(function)
+    own = list(signature.parameters)[0]
+
+    @functools.wraps(function)
+    async def method(self, *args, **kwargs):
+        arguments = signature.bind(self, *args, **kwargs).arguments
+        arguments.pop(own)
+        return [i async for i in getattr(self, generator)(**arguments)]
+    return method
+
+
+class AsyncAXL(object):
+    """
+    asyncio version of AXL, every AXL method is a coroutine and the iter_* methods are async generators.
+    A method is run until it makes a SOAP call that has no reply yet, the request is sent without blocking
+    and the method is run again with the replies received so far. Replies are kept parsed and matched to
+    calls by their request, so another run only repeats the python code of the method. The iter_* methods
+    are run once per page from the paging cursor and the get_<objects> methods collect them.
+    A method making n calls one after another, like update_region_matrix, is still run n times over a growing
+    number of replies, its python code costs grow with the square of its calls.
+    """
+
+    def __init__(self, username, password, wsdl, cucm, cucm_version=10, schema_cache_dir=DEFAULT_CACHE_DIR,
+                 concurrency=100, transport=None, lookup_cache=None, templates=TEMPLATE_OPERATIONS):
+        """
+        The suds client is built on first use, construct the instance and call warm_up before
+        starting the event loop to keep the schema parsing out of it.
+        :param username: axl username
+        :param password: axl password
+        :param wsdl: wsdl file location
+        :param cucm: UCM IP address
+        :param cucm_version: UCM version
+        :param schema_cache_dir: directory to cache the parsed wsdl in, None to disable caching
+        :param concurrency: maximum number of requests in flight
+        :param transport: AsyncTransport, defaults to one of persistent connections
+        :param lookup_cache: TTLCache for the results of the get_<object>(name) methods, None for no caching
+        :param templates: operations sent from precompiled request templates, empty to marshal every request with suds
+
+        example usage:
+        >>> from axl.aio import AsyncAXL
+        >>> wsdl = 'file:///path/to/wsdl/axlsqltoolkit/schema/10.5/AXLAPI.wsdl'
+        >>> ucm = AsyncAXL('axl_user', 'axl_pass', wsdl, '192.168.200.10', concurrency=50)
+        >>> results = await asyncio.gather(*[ucm.get_phone(i) for i in phones])
+        """
+        self.axl = AXL(username, password, wsdl, cucm, cucm_version=cucm_version,
+                       schema_cache_dir=schema_cache_dir, lookup_cache=lookup_cache, templates=templates)
+        self.transport = transport or AsyncTransport(username, password, concurrency=concurrency)
+        self._client = None
+
+    @property
+    def client(self):
+        """
+        suds client that builds requests without sending them, built on first use
+        """
+        if self._client is None:
+            client = self.axl._build_client()
+            client.set_options(nosend=True)
+            client.service = TemplatedService(client, client.service, self.axl.templates)
+            self._client = client
+        return self._client
+
+    @property
+    def instruments(self):
+        """
+        Hooks and latency histograms of the SOAP operations, shared with the AXL instance
+        """
+        return self.axl.instruments
+
+    def warm_up(self):
+        """
+        Build the suds client now rather than on the first call
+        """
+        return self.client
+
+    def _pass(self, replies):
+        return _Pass(self.axl, self.client, replies)
+
+    async def _send(self, pending):
+        """
+        Send the request of a pending SOAP call
+        :param pending: _Pending raised by the method
+        :return: the reply as the suds client returns it, a tuple of status and response
+        """
+        headers = {
+            'Content-Type': 'text/xml; charset=utf-8',
+            'SOAPAction': pending.action,
+        }
+        headers.update(self.client.options.headers)
+        instruments = self.axl.instruments
+        try:
+            status, reason, reply_headers, data = await self.transport.send(
+                self.client.options.location, pending.context.envelope, headers)
+        except Exception as e:
+            instruments.stop(pending.event, instruments.resume(pending.event), error=e)
+            raise
+
+        token = instruments.resume(pending.event)
+        try:
+            result = pending.context.process_reply(data, status, reason)
+        except Exception as e:
+            instruments.stop(pending.event, token, error=e)
+            raise
+        instruments.stop(pending.event, token, result)
+        return result
+
+    async def iter_phone_inventory(self, name='%', chunk_size=SQL_CHUNK_SIZE, batch_size=BATCH_SIZE):
+        """
+        Get phones with their device pool, calling search space, location, owner and lines
+        from joined SQL queries, fetched batch by batch in pkid order
+        :param name: phone name with % wildcards
+        :param chunk_size: number of rows to fetch per request
+        :param batch_size: number of phones to fetch the lines of per query
+        :return: An async generator of dictionary's shaped like the get_phone response
+        """
+        batch = []
+        async for i in self.iter_sql_query(phone_query(name), key='pkid', chunk_size=chunk_size):
+            batch.append(i)
+            if len(batch) == batch_size:
+                for phone in await self._phone_batch(name, batch, chunk_size):
+                    yield phone
+                batch = []
+        if batch:
+            for phone in await self._phone_batch(name, batch, chunk_size):
+                yield phone
+
+    async def _phone_batch(self, name, batch, chunk_size):
+        """
+        Phones of a batch with their lines, the lines of the phones between its first and last pkid
+        """
+        lines = {}
+        query = line_query(name, batch[0]['pkid'], batch[-1]['pkid'])
+        async for i in self.iter_sql_query(query, key='pkid', chunk_size=chunk_size):
+            lines.setdefault(str(i['fkdevice']), []).append(i)
+        return [as_phone(i, lines.get(str(i['pkid']), [])) for i in batch]
+
+    async def bulk(self, operation, items):
+        """
+        Run one method for many items concurrently, bounded by the transport concurrency
+        :param operation: name of the method to run eg 'add_phone'
+        :param items: iterable of keyword argument dictionaries, one per call
+        :return: result dictionary, the response is the list of result dictionaries in input order
+        """
+        method = getattr(self, operation)
+
+        async def call(kwargs):
+            try:
+                return await method(**kwargs)
+            except Exception as e:
+                return {
+                    'success': False,
+                    'response': 'Unknown error',
+                    'error': str(e),
+                }
+
+        start = time.perf_counter()
+        responses = await asyncio.gather(*[call(i) for i in items])
+        seconds = time.perf_counter() - start
+
+        failed = len([i for i in responses if not i['success']])
+
+        result = {
+            'success': failed == 0,
+            'response': responses,
+            'error': '',
+            'seconds': seconds,
+            'per_second': len(responses) / seconds if seconds else 0.0,
+        }
+
+        if failed:
+            result['error'] = '{0} of {1} {2} calls failed'.format(failed, len(responses), operation)
+        return result
+
+    async def close(self):
+        """
+        Close the idle connections
+        """
+        self.transport.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+for _name, _method in inspect.getmembers(AXL, inspect.isfunction):
+    if _name.startswith('_') or hasattr(AsyncAXL, _name):
+        continue
+    if _name.startswith('iter_'):
+        setattr(AsyncAXL, _name, _async_generator(_name))
+    elif _name.startswith('get_') and hasattr(AXL, 'iter_' + _name[len('get_'):]):
+        setattr(AsyncAXL, _name, _collected(_name, 'iter_' + _name[len('get_'):]))
+    else:
+        setattr(AsyncAXL, _name, _coroutine(_name))
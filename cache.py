@@ -0,0 +1,106 @@
+"""
+Read-through cache for AXL lookups.
+Entries are kept for ttl seconds, the least recently used entry is evicted when the cache is full.
+"""
+
+import collections
+import threading
+import time
+
+
+class TTLCache(object):
+    """
+    Bounded LRU cache with a time to live
+    """
+
+    def __init__(self, maxsize=1024, ttl=300, clock=time.monotonic):
+        """
+        :param maxsize: maximum number of entries
+        :param ttl: seconds an entry is kept
+        :param clock: monotonic clock in seconds
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expired = 0
+        self.invalidations = 0
+
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Get an entry
+        :param key: entry key
+        :return: cached value, None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.clock() - entry[1] >= self.ttl:
+                del self._entries[key]
+                self.expired += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        """
+        Add or replace an entry, evicting the least recently used entry when full
+        :param key: entry key
+        :param value: value to cache
+        """
+        with self._lock:
+            self._entries[key] = (value, self.clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        """
+        Remove an entry
+        :param key: entry key
+        """
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def invalidate_kind(self, kind):
+        """
+        Remove the entries of an object kind, lookup entries are keyed by a tuple of kind and name
+        :param kind: object kind eg region
+        """
+        with self._lock:
+            for key in [i for i in self._entries if isinstance(i, tuple) and i[0] == kind]:
+                del self._entries[key]
+                self.invalidations += 1
+
+    def clear(self):
+        """
+        Remove every entry
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        Cache counters
+        :return: dictionary of counters
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expired': self.expired,
+                'invalidations': self.invalidations,
+                'size': len(self._entries),
+            }
@@ -0,0 +1,179 @@
+"""
+Fast parsing of large AXL responses.
+List and executeSQLQuery replies are parsed incrementally as they arrive with the C accelerated
+ElementTree pull parser. Every returned object becomes a plain dictionary shaped like the object suds
+would build from the schema: attributes are prefixed with an underscore, text with attributes is the
+value key, repeated elements are lists and values are translated to python types the way suds does.
+"""
+
+import xml.etree.ElementTree as ElementTree
+
+XSI = '{http://www.w3.org/2001/XMLSchema-instance}'
+
+# python keywords suds renames
+RESERVED = {'class': 'cls', 'def': 'dfn'}
+
+
+def _local(tag):
+    return tag[tag.rfind('}') + 1:]
+
+
+class Node(object):
+    """
+    How suds unmarshals an element of the schema, children are looked up on first use
+    """
+
+    __slots__ = ('type', 'many', 'nillable', 'translate', '_children')
+
+    def __init__(self, element):
+        """
+        :param element: suds schema element, None for an element the schema does not describe
+        """
+        if element is None:
+            self.type = None
+            self.many = False
+            self.nillable = False
+            self.translate = None
+        else:
+            resolved = element.resolve()
+            self.type = None if resolved.any() else resolved
+            self.many = element.multi_occurrence()
+            self.nillable = bool(element.nillable or (resolved.builtin() and resolved.nillable))
+            self.translate = resolved.translate if resolved.builtin() else None
+        self._children = {}
+
+    def child(self, name):
+        """
+        :param name: element name
+        :return: Node of a child element
+        """
+        node = self._children.get(name)
+        if node is None:
+            element = self.type.get_child(name)[0] if self.type is not None else None
+            node = self._children[name] = Node(element)
+        return node
+
+
+def returned_node(method, tag):
+    """
+    Node of the objects a list or executeSQLQuery operation returns
+    :param method: suds method of the operation
+    :param tag: tag of the returned objects eg phone or row
+    :return: Node
+    """
+    response = method.binding.output.param_defs(method)[0][1].resolve()
+    return Node(response.get_child('return')[0]).child(tag)
+
+
+def convert(element, node):
+    """
+    Convert an element to the value suds would return for it
+    :param element: ElementTree element
+    :param node: Node of the element
+    :return: dictionary, list, string, translated value or None
+    """
+    attributes = element.attrib
+    if attributes and attributes.get(XSI + 'nil') in ('true', '1'):
+        return None
+    obj = {}
+    for key, value in attributes.items():
+        if key[0] != '{':
+            obj['_' + RESERVED.get(key, key)] = value
+
+    if len(element):
+        for child in element:
+            name = _local(child.tag)
+            child_node = node.child(name)
+            value = convert(child, child_node)
+            name = RESERVED.get(name, name)
+            if name in obj:
+                if isinstance(obj[name], list):
+                    obj[name].append(value)
+                else:
+                    obj[name] = [obj[name], value]
+            elif child_node.many:
+                obj[name] = [] if value is None else [value]
+            else:
+                obj[name] = value
+        return obj
+
+    text = element.text
+    if obj:
+        if text:
+            obj['value'] = text
+        return obj
+    if text:
+        return node.translate(text) if node.translate is not None else text
+    return None if node.nillable else ''
+
+
+class RowParser(object):
+    """
+    Incremental parser of the objects of a list or executeSQLQuery reply, feed it the reply as it arrives
+    """
+
+    def __init__(self, node):
+        """
+        :param node: Node of the returned objects
+        """
+        self.node = node
+        self.rows = []
+        self.bytes = 0
+        self._parser = ElementTree.XMLPullParser(events=('start', 'end'))
+        self._depth = 0
+        self._return = None
+
+    def feed(self, data):
+        """
+        Parse the next part of the reply
+        :param data: bytes
+        """
+        self.bytes += len(data)
+        self._parser.feed(data)
+        self._read()
+
+    def reset(self):
+        """
+        Discard what was parsed to parse a reply that is sent again
+        """
+        self.__init__(self.node)
+
+    def close(self):
+        """
+        Finish parsing
+        :return: list of the returned objects
+        """
+        self._parser.close()
+        self._read()
+        return self.rows
+
+    def _read(self):
+        for event, element in self._parser.read_events():
+            if event == 'start':
+                self._depth += 1
+                # Envelope, Body, the operation response then its return element
+                if self._depth == 4 and self._return is None and _local(element.tag) == 'return':
+                    self._return = element
+            else:
+                if self._depth == 5 and self._return is not None:
+                    self.rows.append(convert(element, self.node))
+                    self._return.clear()
+                elif self._depth == 4:
+                    self._return = None
+                self._depth -= 1
+
+
+def faultstring(body):
+    """
+    Fault string of a SOAP fault reply
+    :param body: reply body bytes
+    :return: the fault string, the body when it is not a fault
+    """
+    try:
+        root = ElementTree.fromstring(body)
+    except ElementTree.ParseError:
+        return body.decode('utf-8', 'replace')
+    for element in root.iter():
+        if _local(element.tag) == 'faultstring':
+            return element.text or ''
+    return body.decode('utf-8', 'replace')
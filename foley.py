@@ -10,15 +10,63 @@ Links:
  - https://developer.cisco.com/site/axl/
 """
 
-import ssl
-import urllib
-
-from suds.transport.https import HttpAuthenticated
-from suds.client import Client
+import collections
+import concurrent.futures
+import copy
+import functools
+import inspect
+import itertools
+import re
+import threading
+import time
 
 from suds.xsd.doctor import Import
 from suds.xsd.doctor import ImportDoctor
 
+from suds.transport import Request
+from suds.transport import TransportError
+
+from .fastparse import RowParser
+from .fastparse import faultstring
+from .fastparse import returned_node
+from .hooks import Instruments
+from .hooks import InstrumentedService
+from .inventory import BATCH_SIZE
+from .inventory import as_phone
+from .inventory import line_query
+from .inventory import phone_query
+from .projection import projection
+from .retry import annotate
+from .retry import recording
+from .schema import DEFAULT_CACHE_DIR
+from .schema import SchemaCache
+from .schema import shared_schema
+from .templates import TEMPLATE_OPERATIONS
+from .templates import TemplatedService
+from .transport import PooledTransport
+
+# Rows fetched per list request, well below the AXL response size limit for the returned tags used here
+PAGE_SIZE = 1000
+
+# Rows fetched per executeSQLQuery request by iter_sql_query, reduced when UCM reports a response is too large
+SQL_CHUNK_SIZE = 5000
+
+# Region relationships sent per updateRegion request by update_region_matrix, well below the AXL request size limit
+REGION_BATCH_SIZE = 500
+
+# Regions read per listRegion request by update_region_matrix, each one comes with its relationships to every region
+REGION_PAGE_SIZE = 50
+
+
+class AXLFault(Exception):
+    """
+    Raised by the generator methods when UCM returns a fault, the other methods return a result dictionary
+    """
+
+    def __init__(self, faultstring):
+        super(AXLFault, self).__init__(faultstring)
+        self.faultstring = faultstring
+
 
 class AXL(object):
     """
@@ -27,13 +75,21 @@ class AXL(object):
     Centos 7, Python 3, suds-jurko.
     """
 
-    def __init__(self, username, password, wsdl, cucm, cucm_version=10):
+    def __init__(self, username, password, wsdl, cucm, cucm_version=10, schema_cache_dir=DEFAULT_CACHE_DIR,
+                 transport=None, lookup_cache=None, templates=TEMPLATE_OPERATIONS):
         """
+        The suds client is built on first use. Instances using the same wsdl share
+        one parsed schema, each instance has its own transport.
+        Every SOAP operation is timed in self.instruments, which takes before and after hooks.
         :param username: axl username
         :param password: axl password
         :param wsdl: wsdl file location
         :param cucm: UCM IP address
         :param cucm_version: UCM version
+        :param schema_cache_dir: directory to cache the parsed wsdl in, None to disable caching
+        :param transport: suds transport, defaults to a PooledTransport of persistent connections
+        :param lookup_cache: TTLCache for the results of the get_<object>(name) methods, None for no caching
+        :param templates: operations sent from precompiled request templates, empty to marshal every request with suds
 
         example usage:
         >>> from axl.foley import AXL
@@ -45,60 +101,285 @@ class AXL(object):
         self.wsdl = wsdl
         self.cucm = cucm
         self.cucm_version = cucm_version
+        self.schema_cache_dir = schema_cache_dir
+        self.transport = transport or PooledTransport(username, password)
+        self.lookup_cache = lookup_cache
+        self.templates = templates
+        self.instruments = Instruments()
+
+        self._client = None
+        self._row_parsers = {}
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self):
+        """
+        suds client, built on first use
+        """
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    client = self._build_client()
+                    service = TemplatedService(client, client.service, self.templates)
+                    client.service = InstrumentedService(service, self.instruments)
+                    self._client = client
+        return self._client
 
+    def _build_client(self):
+        """
+        Build a suds client on the shared schema
+        :return: suds client
+        """
         tns = 'http://schemas.cisco.com/ast/soap/'
         imp = Import('http://schemas.xmlsoap.org/soap/encoding/', 'http://schemas.xmlsoap.org/soap/encoding/')
         imp.filter.add(tns)
 
-        t = HttpAuthenticated(username=self.username, password=self.password)
-        t.handler = urllib.request.HTTPBasicAuthHandler(t.pm)
+        if self.schema_cache_dir is None:
+            cache = {'cache': None}
+        else:
+            cache = {'cache': SchemaCache(self.wsdl, self.schema_cache_dir), 'cachingpolicy': 1}
+
+        schema = shared_schema(self.wsdl, plugins=[ImportDoctor(imp)], transport=self.transport, **cache)
+
+        return schema.client(location='https://{0}:8443/axl/'.format(self.cucm), faults=False,
+                             plugins=[ImportDoctor(imp), self.instruments.plugin],
+                             transport=self.transport)
+
+    def _projection(self, operation, returned_tags):
+        """
+        returnedTags argument of a field projection, checked against the schema
+        :param operation: AXL operation name eg getPhone
+        :param returned_tags: list of dotted field paths eg ['name', 'lines.line.dirn.pattern'], or None
+        :return: nested returnedTags dictionary, None when returned_tags is None
+        """
+        if returned_tags is None:
+            return None
+        return projection(self.client.wsdl, operation, returned_tags)
+
+    def _rows(self, operation, tag, *args, **kwargs):
+        """
+        Call a list or executeSQLQuery operation
+        :param operation: AXL operation name
+        :param tag: tag of the returned objects
+        :param args: operation arguments
+        :param kwargs: operation keyword arguments
+        :return: list of the returned objects
+        """
+        resp = getattr(self.client.service, operation)(*args, **kwargs)
+        if resp[0] != 200:
+            raise AXLFault(resp[1].faultstring)
+        # an empty result set has an empty return tag
+        return resp[1]['return'][tag] if resp[1]['return'] else []
+
+    def _raw_rows(self, operation, tag, *args, **kwargs):
+        """
+        Call a list or executeSQLQuery operation without suds unmarshalling, the reply is parsed
+        as it is read by the C accelerated ElementTree pull parser
+        :param operation: AXL operation name
+        :param tag: tag of the returned objects
+        :param args: operation arguments
+        :param kwargs: operation keyword arguments
+        :return: list of the returned objects as dictionaries shaped like the suds objects
+        """
+        method = self.client.wsdl.services[0].ports[0].methods[operation]
+        parser = self._row_parsers.get(operation)
+        if parser is None or parser[0] != tag:
+            parser = self._row_parsers[operation] = (tag, returned_node(method, tag))
+        parser = RowParser(parser[1])
+
+        event, token = self.instruments.start(operation)
+        try:
+            envelope = method.binding.input.get_message(method, args, kwargs).plain().encode('utf-8')
+            self.instruments.sending(event, envelope)
+            request = Request(self.client.options.location, envelope)
+            request.headers = {
+                'Content-Type': 'text/xml; charset=utf-8',
+                'SOAPAction': method.soap.action,
+            }
+            request.headers.update(self.client.options.headers)
+            if isinstance(self.transport, PooledTransport):
+                self.transport.send(request, sink=parser)
+            else:
+                parser.feed(self.transport.send(request).message)
+            self.instruments.received(event, parser.bytes)
+            rows = parser.close()
+        except TransportError as e:
+            body = e.fp.read() if e.fp is not None else b''
+            self.instruments.received(event, len(body))
+            self.instruments.stop(event, token, (e.httpcode, None))
+            raise AXLFault(faultstring(body))
+        except Exception as e:
+            self.instruments.stop(event, token, error=e)
+            raise
+        self.instruments.stop(event, token, (200, None))
+        return rows
+
+    def _iter_list(self, operation, tag, page_size, raw, *args, **kwargs):
+        """
+        Page through the results of a list operation using skip and first
+        :param operation: AXL list operation name
+        :param tag: tag of the returned objects
+        :param page_size: number of objects to fetch per request
+        :param raw: parse the replies with fastparse instead of suds, the objects are dictionaries
+        :param args: list operation arguments
+        :param kwargs: list operation keyword arguments
+        :return: A generator of the returned objects
+        """
+        skip = 0
+        while skip is not None:
+            page, skip = self._list_page(operation, tag, page_size, raw, skip, *args, **kwargs)
+            for i in page:
+                yield i
+
+    def _list_page(self, operation, tag, page_size, raw, skip, *args, **kwargs):
+        """
+        Fetch one page of a list operation
+        :param skip: number of objects to skip
+        :return: tuple of the page and the skip of the next page, None after the last page
+        """
+        rows = self._raw_rows if raw else self._rows
+        page = rows(operation, tag, *args, skip=skip, first=page_size, **kwargs)
+        return page, skip + page_size if len(page) >= page_size else None
+
+    def _update_object(self, operation, label, name, fields, key='name'):
+        """
+        Update the fields of an object, fields left as None are not sent
+        :param operation: AXL update operation eg updateLocation
+        :param label: object label of the response eg Location
+        :param name: object name
+        :param fields: dictionary of AXL field to value
+        :param key: AXL field of the name
+        :return: result dictionary
+        """
+        fields = dict((k, v) for k, v in fields.items() if v is not None)
+        fields[key] = name
+        resp = getattr(self.client.service, operation)(**fields)
 
-        ssl_def_context = ssl.create_default_context()
-        ssl_def_context.check_hostname = False
-        ssl_def_context.verify_mode = ssl.CERT_NONE
+        result = {
+            'success': False,
+            'response': '',
+            'error': '',
+        }
 
-        t1 = urllib.request.HTTPSHandler(context=ssl_def_context)
-        t.urlopener = urllib.request.build_opener(t.handler, t1)
+        if resp[0] == 200:
+            result['success'] = True
+            result['response'] = '{0} successfully updated'.format(label)
+            return result
+        elif resp[0] == 500 and '{0} was not found'.format(name) in resp[1].faultstring:
+            result['response'] = '{0}: {1} not found'.format(label, name)
+            result['error'] = resp[1].faultstring
+            return result
+        else:
+            result['response'] = '{0} could not be updated'.format(label)
+            result['error'] = resp[1].faultstring
+            return result
 
-        self.client = Client(self.wsdl, location='https://{0}:8443/axl/'.format(cucm), faults=False,
-                             plugins=[ImportDoctor(imp)],
-                             transport=t)
+    def bulk(self, operation, items, workers=8):
+        """
+        Run one method for many items concurrently on a bounded pool of worker threads.
+        A pooled transport is grown so every worker has its own connection.
+        :param operation: name of the method to run eg 'add_phone'
+        :param items: iterable of keyword argument dictionaries, one per call
+        :param workers: number of worker threads
+        :return: result dictionary, the response is the list of result dictionaries in input order
+
+        example usage:
+        >>> ucm.bulk('add_user', [{'user_id': 'jsmith', 'last_name': 'Smith'},
+        ...                       {'user_id': 'bjones', 'last_name': 'Jones'}], workers=4)
+        """
+        method = getattr(self, operation)
+
+        if hasattr(self.transport, 'grow'):
+            self.transport.grow(workers)
+
+        def call(kwargs):
+            try:
+                return method(**kwargs)
+            except Exception as e:
+                return {
+                    'success': False,
+                    'response': 'Unknown error',
+                    'error': str(e),
+                }
+
+        start = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            responses = list(executor.map(call, items))
+        seconds = time.perf_counter() - start
+
+        failed = len([i for i in responses if not i['success']])
+
+        result = {
+            'success': failed == 0,
+            'response': responses,
+            'error': '',
+            'seconds': seconds,
+            'per_second': len(responses) / seconds if seconds else 0.0,
+        }
+
+        if failed:
+            result['error'] = '{0} of {1} {2} calls failed'.format(failed, len(responses), operation)
+        return result
 
-    def get_locations(self, mini=True):
+    def get_locations(self, mini=True, returned_tags=None, raw=False):
         """
         Get location details
         :param mini: return a list of tuples of location details
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are returned when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
         :return: A list of dictionary's
         """
-        resp = self.client.service.listLocation(
-                {'name': '%'}, returnedTags={
+        return list(self.iter_locations(mini=mini, returned_tags=returned_tags, raw=raw))
+
+    def iter_locations(self, mini=True, page_size=PAGE_SIZE, returned_tags=None, raw=False):
+        """
+        Get location details, fetched page by page
+        :param mini: yield tuples of location details
+        :param page_size: number of rows to fetch per request
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are yielded when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
+        :return: A generator of dictionary's
+        """
+        resp = self._iter_list('listLocation', 'location', page_size, raw,
+                {'name': '%'}, returnedTags=self._projection('listLocation', returned_tags) or {
                     'name': '',
                     'withinAudioBandwidth': '',
                     'withinVideoBandwidth': '',
                     'withinImmersiveKbits': '',
-                })[1]['return']['location']
-        if mini:
-            return [(i['name'],
+                })
+        if mini and returned_tags is None:
+            return ((i['name'],
                      i['withinAudioBandwidth'],
                      i['withinVideoBandwidth'],
                      i['withinImmersiveKbits'],
-                     ) for i in resp]
+                     ) for i in resp)
         else:
             return resp
 
-    def execute_sql_query(self, query):
+    def execute_sql_query(self, query, raw=False):
         """
         Execute SQL query
         :param query: SQL Query to execute
+        :param raw: parse the reply without suds, faster for large results, rows are dictionaries
         :return: result dictionary
         """
-        resp = self.client.service.executeSQLQuery(query)
         result = {
             'success': False,
             'response': '',
             'error': '',
         }
 
+        if raw:
+            try:
+                result['response'] = self._raw_rows('executeSQLQuery', 'row', query)
+                result['success'] = True
+            except AXLFault as e:
+                result['response'] = 'Syntax error' if 'syntax' in e.faultstring else 'Unknown error'
+                result['error'] = e.faultstring
+            return result
+
+        resp = self.client.service.executeSQLQuery(query)
+
         if resp[0] == 200:
             result['success'] = True
             result['response'] = resp[1]['return']['row']
@@ -112,13 +393,81 @@ class AXL(object):
             result['error'] = resp[1].faultstring
             return result
 
-    def get_location(self, location):
+    def iter_sql_query(self, query, key=None, chunk_size=SQL_CHUNK_SIZE):
+        """
+        Execute SQL query in chunks and yield the rows as they arrive.
+        The query is fetched chunk_size rows at a time with SKIP/FIRST or, when key is given,
+        by ranges of the key column. The chunk size is reduced whenever UCM reports that
+        a response is too large.
+        :param query: SQL Query to execute
+        :param key: unique column returned by the query to split on eg pkid, gives a stable order
+        :param chunk_size: number of rows to fetch per request
+        :return: A generator of rows
+        """
+        cursor = (0, None, chunk_size)
+        while cursor is not None:
+            rows, cursor = self._sql_chunk(query, key, cursor)
+            for i in rows:
+                yield i
+
+    def _sql_chunk(self, query, key, cursor):
+        """
+        Fetch one chunk of iter_sql_query, a chunk UCM reports too large is fetched again smaller
+        :param query: SQL Query to execute
+        :param key: unique column returned by the query to split on, None to split with SKIP
+        :param cursor: tuple of the number of rows fetched, the last key value and the chunk size
+        :return: tuple of the rows and the cursor of the next chunk, None after the last chunk
+        """
+        skip, last, chunk_size = cursor
+        while True:
+            if key is None:
+                sql = 'SELECT SKIP {0} FIRST {1} * FROM ({2}) chunk'.format(skip, chunk_size, query)
+            elif last is None:
+                sql = 'SELECT FIRST {0} * FROM ({1}) chunk ORDER BY chunk.{2}'.format(chunk_size, query, key)
+            else:
+                sql = "SELECT FIRST {0} * FROM ({1}) chunk WHERE chunk.{2} > '{3}' ORDER BY chunk.{2}".format(
+                    chunk_size, query, key, str(last).replace("'", "''"))
+
+            resp = self.client.service.executeSQLQuery(sql)
+
+            if resp[0] != 200:
+                smaller = self._smaller_chunk_size(resp[1].faultstring, chunk_size)
+                if smaller:
+                    chunk_size = smaller
+                    continue
+                raise AXLFault(resp[1].faultstring)
+
+            # an empty result set has an empty return tag
+            rows = resp[1]['return']['row'] if resp[1]['return'] else []
+            if len(rows) < chunk_size:
+                return rows, None
+            return rows, (skip + len(rows), rows[-1][key] if key is not None else None, chunk_size)
+
+    @staticmethod
+    def _smaller_chunk_size(faultstring, chunk_size):
+        """
+        Work out a smaller chunk size from a response too large fault eg
+        Query request too large. Total rows matched: 2000 rows. Suggestive Row Fetch: less than 1000 rows
+        :param faultstring: fault from UCM
+        :param chunk_size: chunk size of the failed request
+        :return: smaller chunk size, None if the fault is not a size fault or the chunk can not shrink
+        """
+        if 'too large' not in faultstring.lower() or chunk_size <= 1:
+            return None
+        suggested = re.search(r'less than (\d+) rows', faultstring)
+        if suggested and 1 < int(suggested.group(1)) <= chunk_size:
+            return int(suggested.group(1)) - 1
+        return chunk_size // 2
+
+    def get_location(self, location, returned_tags=None):
         """
         Get device pool parameters
         :param location: location name
+        :param returned_tags: field paths to return eg ['name', 'description'], None for every field
         :return: result dictionary
         """
-        resp = self.client.service.getLocation(name=location)
+        resp = self.client.service.getLocation(name=location,
+                                               returnedTags=self._projection('getLocation', returned_tags))
 
         result = {
             'success': False,
@@ -196,6 +545,21 @@ class AXL(object):
             result['error'] = resp[1].faultstring
             return result
 
+    def update_location(self, location, within_audio_bw=None, within_video_bw=None, within_immersive_kbits=None):
+        """
+        Update a location, arguments left as None are not changed
+        :param location: Name of the location to update
+        :param within_audio_bw: Audio bandwidth within the location
+        :param within_video_bw: Video bandwidth within the location
+        :param within_immersive_kbits: Immersive video bandwidth within the location
+        :return: result dictionary
+        """
+        return self._update_object('updateLocation', 'Location', location, {
+            'withinAudioBandwidth': within_audio_bw,
+            'withinVideoBandwidth': within_video_bw,
+            'withinImmersiveKbits': within_immersive_kbits,
+        })
+
     def delete_location(self, location):
         """
         Delete a location
@@ -223,26 +587,41 @@ class AXL(object):
             result['error'] = resp[1].faultstring
             return result
 
-    def get_regions(self, mini=True):
+    def get_regions(self, mini=True, returned_tags=None, raw=False):
         """
         Get region details
         :param mini: return a list of tuples of region details
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are returned when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
         :return: A list of dictionary's
         """
-        resp = self.client.service.listRegion(
-                {'name': '%'}, returnedTags={'_uuid'})[1]['return']['region']
-        if mini:
-            return [(i['_uuid'][1:-1]) for i in resp]
+        return list(self.iter_regions(mini=mini, returned_tags=returned_tags, raw=raw))
+
+    def iter_regions(self, mini=True, page_size=PAGE_SIZE, returned_tags=None, raw=False):
+        """
+        Get region details, fetched page by page
+        :param mini: yield tuples of region details
+        :param page_size: number of rows to fetch per request
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are yielded when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
+        :return: A generator of dictionary's
+        """
+        resp = self._iter_list('listRegion', 'region', page_size, raw,
+                {'name': '%'}, returnedTags=self._projection('listRegion', returned_tags) or {'_uuid'})
+        if mini and returned_tags is None:
+            return ((i['_uuid'][1:-1]) for i in resp)
         else:
             return resp
 
-    def get_region(self, region):
+    def get_region(self, region, returned_tags=None):
         """
         Get region information
         :param region: Region name
+        :param returned_tags: field paths to return eg ['name', 'description'], None for every field
         :return: result dictionary
         """
-        resp = self.client.service.getRegion(name=region)
+        resp = self.client.service.getRegion(name=region,
+                                             returnedTags=self._projection('getRegion', returned_tags))
 
         result = {
             'success': False,
@@ -342,6 +721,10 @@ class AXL(object):
         resp = self.client.service.updateRegion(name=region,
                                                 relatedRegions={'relatedRegion': region_list})
 
+        # the relationships are shared, every region changed
+        if self.lookup_cache is not None:
+            self.lookup_cache.invalidate_kind('region')
+
         result = {
             'success': False,
             'response': '',
@@ -361,6 +744,123 @@ class AXL(object):
             result['error'] = resp[1].faultstring
             return result
 
+    def update_region_matrix(self, regions, bandwidth='64 kbps', within_bandwidth='256 kbps',
+                             batch_size=REGION_BATCH_SIZE, page_size=REGION_PAGE_SIZE):
+        """
+        Assign many regions to all other regions, like update_region for each region with one paged listRegion.
+        A relationship is shared by both regions, each one is sent once and only when it is not already set.
+        The changed relationships are sent from the regions given in updateRegion requests of batch_size
+        relationships at most. Region names are compared case insensitively like UCM does.
+        :param regions: list of region names
+        :param bandwidth: audio bandwidth between two regions
+        :param within_bandwidth: audio bandwidth within a region
+        :param batch_size: relationships per updateRegion request
+        :param page_size: regions per listRegion request
+        :return: result dictionary, the response is the list of result dictionaries of the updateRegion requests
+
+        example usage:
+        >>> ucm.update_region_matrix(['SITE1_REG', 'SITE2_REG', 'SITE3_REG'])
+        """
+        names, matrix = self._region_matrix(regions, page_size)
+        missing = [i for i in regions if i.lower() not in names]
+
+        changes = collections.OrderedDict()
+        for region in regions:
+            if region in missing:
+                continue
+            region = region.lower()
+            for other in names:
+                pair = tuple(sorted((region, other)))
+                desired = {
+                    'bandwidth': within_bandwidth if other == region else bandwidth,
+                    'videoBandwidth': '-1',
+                    'immersiveVideoBandwidth': '-1',
+                    'lossyNetwork': 'Use System Default',
+                }
+                if pair not in changes and matrix[region].get(other) != desired:
+                    changes[pair] = (names[region], dict(desired, regionName=names[other]))
+
+        requests = collections.OrderedDict()
+        for region, relationship in changes.values():
+            requests.setdefault(region, []).append(relationship)
+
+        responses = [{
+            'success': False,
+            'response': 'Region: {0} not found'.format(i),
+            'error': 'The specified Region {0} was not found'.format(i),
+        } for i in missing]
+        for region, relationships in requests.items():
+            for n in range(0, len(relationships), batch_size):
+                resp = self.client.service.updateRegion(
+                    name=region, relatedRegions={'relatedRegion': relationships[n:n + batch_size]})
+                if resp[0] == 200:
+                    responses.append({
+                        'success': True,
+                        'response': 'Region successfully updated',
+                        'error': '',
+                    })
+                else:
+                    responses.append({
+                        'success': False,
+                        'response': 'Region could not be updated',
+                        'error': resp[1].faultstring,
+                    })
+            if self.lookup_cache is not None:
+                for i in relationships:
+                    self.lookup_cache.invalidate(_lookup_key('region', i['regionName']))
+
+        failed = len([i for i in responses if not i['success']])
+
+        result = {
+            'success': failed == 0,
+            'response': responses,
+            'error': '',
+            'updated': len(changes),
+        }
+
+        if failed:
+            result['error'] = '{0} of {1} updateRegion requests failed'.format(failed, len(responses))
+        return result
+
+    def _region_matrix(self, regions, page_size=REGION_PAGE_SIZE):
+        """
+        Current relationships of some regions, read page by page so only their relationships are kept
+        :param regions: names of the regions
+        :param page_size: regions per listRegion request
+        :return: tuple of a dictionary of the lower case name of every region to its name and a dictionary of
+            the lower case name of the regions given to a dictionary of lower case related region name to
+            relationship fields
+        """
+        def text(value):
+            if value is not None and not isinstance(value, str) and hasattr(value, 'value'):
+                value = value.value
+            return '' if value is None else str(value)
+
+        def items(value):
+            if value is None or isinstance(value, str):
+                return []
+            return value if isinstance(value, list) else [value]
+
+        names = collections.OrderedDict()
+        matrix = dict((i.lower(), {}) for i in regions)
+        pages = self._iter_list('listRegion', 'region', page_size, False, {'name': '%'},
+                                returnedTags={'name': '', 'relatedRegions': ''})
+        for i in pages:
+            name = str(i['name'])
+            names[name.lower()] = name
+            related = getattr(i, 'relatedRegions', None)
+            for j in items(getattr(related, 'relatedRegion', None)):
+                other = text(j.regionName).lower()
+                if name.lower() not in matrix and other not in matrix:
+                    continue
+                fields = dict((k, text(getattr(j, k, None)))
+                              for k in ('bandwidth', 'videoBandwidth', 'immersiveVideoBandwidth', 'lossyNetwork'))
+                if name.lower() in matrix:
+                    matrix[name.lower()][other] = fields
+                if other in matrix:
+                    matrix[other][name.lower()] = fields
+        return names, matrix
+
     def delete_region(self, region):
         """
         Delete a location
@@ -388,26 +888,41 @@ class AXL(object):
             result['error'] = resp[1].faultstring
             return result
 
-    def get_srsts(self, mini=True):
+    def get_srsts(self, mini=True, returned_tags=None, raw=False):
         """
         Get all SRST details
         :param mini: return a list of tuples of SRST details
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are returned when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
         :return: A list of dictionary's
         """
-        resp = self.client.service.listSrst(
-                {'name': '%'}, returnedTags={'_uuid': ''})[1]['return']['srst']
-        if mini:
-            return [(i['_uuid'][1:-1]) for i in resp]
+        return list(self.iter_srsts(mini=mini, returned_tags=returned_tags, raw=raw))
+
+    def iter_srsts(self, mini=True, page_size=PAGE_SIZE, returned_tags=None, raw=False):
+        """
+        Get all SRST details, fetched page by page
+        :param mini: yield tuples of SRST details
+        :param page_size: number of rows to fetch per request
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are yielded when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
+        :return: A generator of dictionary's
+        """
+        resp = self._iter_list('listSrst', 'srst', page_size, raw,
+                {'name': '%'}, returnedTags=self._projection('listSrst', returned_tags) or {'_uuid': ''})
+        if mini and returned_tags is None:
+            return ((i['_uuid'][1:-1]) for i in resp)
         else:
             return resp
 
-    def get_srst(self, srst):
+    def get_srst(self, srst, returned_tags=None):
         """
         Get SRST information
         :param srst: SRST name
+        :param returned_tags: field paths to return eg ['name', 'description'], None for every field
         :return: result dictionary
         """
-        resp = self.client.service.getSrst(name=srst)
+        resp = self.client.service.getSrst(name=srst,
+                                           returnedTags=self._projection('getSrst', returned_tags))
 
         result = {
             'success': False,
@@ -463,6 +978,21 @@ class AXL(object):
             result['error'] = resp[1].faultstring
             return result
 
+    def update_srst(self, srst, ip_address=None, port=None, sip_port=None):
+        """
+        Update SRST, arguments left as None are not changed
+        :param srst: SRST name
+        :param ip_address: SRST ip address
+        :param port: SRST port
+        :param sip_port: SIP port
+        :return: result dictionary
+        """
+        return self._update_object('updateSrst', 'SRST', srst, {
+            'ipAddress': ip_address,
+            'port': port,
+            'SipPort': sip_port,
+        })
+
     def delete_srst(self, srst):
         """
         Delete a SRST
@@ -490,14 +1020,27 @@ class AXL(object):
             result['error'] = resp[1].faultstring
             return result
 
-    def get_device_pools(self, mini=True):
+    def get_device_pools(self, mini=True, returned_tags=None, raw=False):
         """
         Get a dictionary of device pools
         :param mini: return a list of tuples of device pool info
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are returned when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
         :return: a list of dictionary's of device pools information
         """
-        resp = self.client.service.listDevicePool(
-                {'name': '%'}, returnedTags={
+        return list(self.iter_device_pools(mini=mini, returned_tags=returned_tags, raw=raw))
+
+    def iter_device_pools(self, mini=True, page_size=PAGE_SIZE, returned_tags=None, raw=False):
+        """
+        Get a dictionary of device pools, fetched page by page
+        :param mini: yield tuples of device pool info
+        :param page_size: number of rows to fetch per request
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are yielded when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
+        :return: A generator of dictionary's
+        """
+        resp = self._iter_list('listDevicePool', 'devicePool', page_size, raw,
+                {'name': '%'}, returnedTags=self._projection('listDevicePool', returned_tags) or {
                     'name': '',
                     'dateTimeSettingName': '',
                     'callManagerGroupName': '',
@@ -505,25 +1048,27 @@ class AXL(object):
                     'regionName': '',
                     'srstName': '',
                     # 'localRouteGroup': [0],
-                })[1]['return']['devicePool']
-        if mini:
-            return [(i['name'],
+                })
+        if mini and returned_tags is None:
+            return ((i['name'],
                      i['dateTimeSettingName']['value'],
                      i['callManagerGroupName']['value'],
                      i['regionName']['value'],
                      i['srstName']['value'],
                      # i['localRouteGroup'][0]['value'],
-                     ) for i in resp]
+                     ) for i in resp)
         else:
             return resp
 
-    def get_device_pool(self, device_pool):
+    def get_device_pool(self, device_pool, returned_tags=None):
         """
         Get device pool parameters
         :param device_pool: device pool name
+        :param returned_tags: field paths to return eg ['name', 'description'], None for every field
         :return: result dictionary
         """
-        resp = self.client.service.getDevicePool(name=device_pool)
+        resp = self.client.service.getDevicePool(name=device_pool,
+                                                 returnedTags=self._projection('getDevicePool', returned_tags))
 
         result = {
             'success': False,
@@ -640,6 +1185,34 @@ class AXL(object):
             result['error'] = resp[1].faultstring
             return result
 
+    def update_device_pool(self,
+                           device_pool,
+                           date_time_group=None,
+                           region=None,
+                           location=None,
+                           media_resource_group_list=None,
+                           srst=None,
+                           cm_group=None):
+        """
+        Update a device pool, arguments left as None are not changed
+        :param device_pool: Name of the device pool to update
+        :param date_time_group: Date time group name
+        :param region: Region name
+        :param location: Location name
+        :param media_resource_group_list: Media resource group list name
+        :param srst: SRST name
+        :param cm_group: CM group name
+        :return: result dictionary
+        """
+        return self._update_object('updateDevicePool', 'Device pool', device_pool, {
+            'dateTimeSettingName': date_time_group,
+            'regionName': region,
+            'locationName': location,
+            'mediaResourceListName': media_resource_group_list,
+            'srstName': srst,
+            'callManagerGroupName': cm_group,
+        })
+
     def delete_device_pool(self, device_pool):
         """
         Delete a Device pool
@@ -667,32 +1240,47 @@ class AXL(object):
             result['error'] = resp[1].faultstring
             return result
 
-    def get_conference_bridges(self, mini=True):
+    def get_conference_bridges(self, mini=True, returned_tags=None, raw=False):
         """
         Get conference bridges
         :param mini: List of tuples of conference bridge details
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are returned when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
         :return: results dictionary
         """
-        resp = self.client.service.listConferenceBridge(
+        return list(self.iter_conference_bridges(mini=mini, returned_tags=returned_tags, raw=raw))
+
+    def iter_conference_bridges(self, mini=True, page_size=PAGE_SIZE, returned_tags=None, raw=False):
+        """
+        Get conference bridges, fetched page by page
+        :param mini: yield tuples of conference bridge details
+        :param page_size: number of rows to fetch per request
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are yielded when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
+        :return: A generator of dictionary's
+        """
+        resp = self._iter_list('listConferenceBridge', 'conferenceBridge', page_size, raw,
                 {'name': '%'},
-                returnedTags={'name': '',
+                returnedTags=self._projection('listConferenceBridge', returned_tags) or {'name': '',
                               'description': '',
                               'devicePoolName': '',
-                              'locationName': ''})[1]['return']['conferenceBridge']
+                              'locationName': ''})
 
-        if mini:
-            return [(i['name'], i['description'], i['devicePoolName']['value'], i['locationName']['value'])
-                    for i in resp]
+        if mini and returned_tags is None:
+            return ((i['name'], i['description'], i['devicePoolName']['value'], i['locationName']['value'])
+                    for i in resp)
         else:
             return resp
 
-    def get_conference_bridge(self, conference_bridge):
+    def get_conference_bridge(self, conference_bridge, returned_tags=None):
         """
         Get conference bridge parameters
         :param conference_bridge: conference bridge name
+        :param returned_tags: field paths to return eg ['name', 'description'], None for every field
         :return: result dictionary
         """
-        resp = self.client.service.getConferenceBridge(name=conference_bridge)
+        resp = self.client.service.getConferenceBridge(
+            name=conference_bridge, returnedTags=self._projection('getConferenceBridge', returned_tags))
 
         result = {
             'success': False,
@@ -785,30 +1373,45 @@ class AXL(object):
             result['error'] = resp[1].faultstring
             return result
 
-    def get_transcoders(self, mini=True):
+    def get_transcoders(self, mini=True, returned_tags=None, raw=False):
         """
         Get transcoders
         :param mini: List of tuples of transcoder details
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are returned when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
         :return: results dictionary
         """
-        resp = self.client.service.listTranscoder(
+        return list(self.iter_transcoders(mini=mini, returned_tags=returned_tags, raw=raw))
+
+    def iter_transcoders(self, mini=True, page_size=PAGE_SIZE, returned_tags=None, raw=False):
+        """
+        Get transcoders, fetched page by page
+        :param mini: yield tuples of transcoder details
+        :param page_size: number of rows to fetch per request
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are yielded when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
+        :return: A generator of dictionary's
+        """
+        resp = self._iter_list('listTranscoder', 'transcoder', page_size, raw,
                 {'name': '%'},
-                returnedTags={'name': '',
+                returnedTags=self._projection('listTranscoder', returned_tags) or {'name': '',
                               'description': '',
-                              'devicePoolName': ''})[1]['return']['transcoder']
+                              'devicePoolName': ''})
 
-        if mini:
-            return [(i['name'], i['description'], i['devicePoolName']['value']) for i in resp]
+        if mini and returned_tags is None:
+            return ((i['name'], i['description'], i['devicePoolName']['value']) for i in resp)
         else:
             return resp
 
-    def get_transcoder(self, transcoder):
+    def get_transcoder(self, transcoder, returned_tags=None):
         """
         Get conference bridge parameters
         :param transcoder: conference bridge name
+        :param returned_tags: field paths to return eg ['name', 'description'], None for every field
         :return: result dictionary
         """
-        resp = self.client.service.getTranscoder(name=transcoder)
+        resp = self.client.service.getTranscoder(name=transcoder,
+                                                 returnedTags=self._projection('getTranscoder', returned_tags))
 
         result = {
             'success': False,
@@ -895,36 +1498,51 @@ class AXL(object):
             result['error'] = resp[1].faultstring
             return result
 
-    def get_h323_gateways(self, mini=True):
+    def get_h323_gateways(self, mini=True, returned_tags=None, raw=False):
         """
         Get H323 Gateways
         :param mini: List of tuples of H323 Gateway details
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are returned when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
         :return: results dictionary
         """
-        resp = self.client.service.listH323Gateway(
+        return list(self.iter_h323_gateways(mini=mini, returned_tags=returned_tags, raw=raw))
+
+    def iter_h323_gateways(self, mini=True, page_size=PAGE_SIZE, returned_tags=None, raw=False):
+        """
+        Get H323 Gateways, fetched page by page
+        :param mini: yield tuples of H323 Gateway details
+        :param page_size: number of rows to fetch per request
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are yielded when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
+        :return: A generator of dictionary's
+        """
+        resp = self._iter_list('listH323Gateway', 'h323Gateway', page_size, raw,
                 {'name': '%'},
-                returnedTags={'name': '',
+                returnedTags=self._projection('listH323Gateway', returned_tags) or {'name': '',
                               'description': '',
                               'devicePoolName': '',
                               'locationName': '',
-                              'sigDigits': ''})[1]['return']['h323Gateway']
+                              'sigDigits': ''})
 
-        if mini:
-            return [(i['name'],
+        if mini and returned_tags is None:
+            return ((i['name'],
                      i['description'],
                      i['devicePoolName']['value'],
                      i['locationName']['value'],
-                     i['sigDigits']['value']) for i in resp]
+                     i['sigDigits']['value']) for i in resp)
         else:
             return resp
 
-    def get_h323_gateway(self, h323_gateway):
+    def get_h323_gateway(self, h323_gateway, returned_tags=None):
         """
         Get H323 Gateway parameters
         :param h323_gateway: H323 Gateway name
+        :param returned_tags: field paths to return eg ['name', 'description'], None for every field
         :return: result dictionary
         """
-        resp = self.client.service.getH323Gateway(name=h323_gateway)
+        resp = self.client.service.getH323Gateway(name=h323_gateway,
+                                                  returnedTags=self._projection('getH323Gateway', returned_tags))
 
         result = {
             'success': False,
@@ -1124,26 +1742,44 @@ class AXL(object):
             result['error'] = resp[1].faultstring
             return result
 
-    def get_route_groups(self, mini=True):
+    def get_route_groups(self, mini=True, returned_tags=None, raw=False):
         """
         Get route groups
         :param mini: return a list of tuples of route group details
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are returned when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
         :return: A list of dictionary's
         """
-        resp = self.client.service.listRouteGroup(
-                {'name': '%'}, returnedTags={'name': '', 'distributionAlgorithm': ''})[1]['return']['routeGroup']
-        if mini:
-            return [(i['name'], i['distributionAlgorithm']) for i in resp]
+        return list(self.iter_route_groups(mini=mini, returned_tags=returned_tags, raw=raw))
+
+    def iter_route_groups(self, mini=True, page_size=PAGE_SIZE, returned_tags=None, raw=False):
+        """
+        Get route groups, fetched page by page
+        :param mini: yield tuples of route group details
+        :param page_size: number of rows to fetch per request
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are yielded when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
+        :return: A generator of dictionary's
+        """
+        resp = self._iter_list('listRouteGroup', 'routeGroup', page_size, raw,
+                {'name': '%'}, returnedTags=self._projection('listRouteGroup', returned_tags) or {
+                    'name': '',
+                    'distributionAlgorithm': '',
+                })
+        if mini and returned_tags is None:
+            return ((i['name'], i['distributionAlgorithm']) for i in resp)
         else:
             return resp
 
-    def get_route_group(self, route_group):
+    def get_route_group(self, route_group, returned_tags=None):
         """
         Get route group
         :param route_group: route group name
+        :param returned_tags: field paths to return eg ['name', 'description'], None for every field
         :return: result dictionary
         """
-        resp = self.client.service.getRouteGroup(name=route_group)
+        resp = self.client.service.getRouteGroup(name=route_group,
+                                                 returnedTags=self._projection('getRouteGroup', returned_tags))
 
         result = {
             'success': False,
@@ -1235,26 +1871,44 @@ class AXL(object):
             result['error'] = resp[1].faultstring
             return result
 
-    def get_route_lists(self, mini=True):
+    def get_route_lists(self, mini=True, returned_tags=None, raw=False):
         """
         Get route lists
         :param mini: return a list of tuples of route list details
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are returned when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
         :return: A list of dictionary's
         """
-        resp = self.client.service.listRoutelist(
-                {'name': '%'}, returnedTags={'name': '', 'description': ''})[1]['return']['routeList']
-        if mini:
-            return [(i['name'], i['description']) for i in resp]
+        return list(self.iter_route_lists(mini=mini, returned_tags=returned_tags, raw=raw))
+
+    def iter_route_lists(self, mini=True, page_size=PAGE_SIZE, returned_tags=None, raw=False):
+        """
+        Get route lists, fetched page by page
+        :param mini: yield tuples of route list details
+        :param page_size: number of rows to fetch per request
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are yielded when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
+        :return: A generator of dictionary's
+        """
+        resp = self._iter_list('listRouteList', 'routeList', page_size, raw,
+                {'name': '%'}, returnedTags=self._projection('listRouteList', returned_tags) or {
+                    'name': '',
+                    'description': '',
+                })
+        if mini and returned_tags is None:
+            return ((i['name'], i['description']) for i in resp)
         else:
             return resp
 
-    def get_route_list(self, route_list):
+    def get_route_list(self, route_list, returned_tags=None):
         """
         Get route list
         :param route_list: route list name
+        :param returned_tags: field paths to return eg ['name', 'description'], None for every field
         :return: result dictionary
         """
-        resp = self.client.service.getRouteList(name=route_list)
+        resp = self.client.service.getRouteList(name=route_list,
+                                                returnedTags=self._projection('getRouteList', returned_tags))
 
         result = {
             'success': False,
@@ -1339,27 +1993,42 @@ class AXL(object):
             result['error'] = resp[1].faultstring
             return result
 
-    def get_partitions(self, mini=True):
+    def get_partitions(self, mini=True, returned_tags=None, raw=False):
         """
         Get partitions
         :param mini: return a list of tuples of partition details
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are returned when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
         :return: A list of dictionary's
         """
-        resp = self.client.service.listRoutePartition(
-                {'name': '%'}, returnedTags={
-                    'name': '', 'description': ''})[1]['return']['routePartition']
-        if mini:
-            return [(i['name'], i['description']) for i in resp]
+        return list(self.iter_partitions(mini=mini, returned_tags=returned_tags, raw=raw))
+
+    def iter_partitions(self, mini=True, page_size=PAGE_SIZE, returned_tags=None, raw=False):
+        """
+        Get partitions, fetched page by page
+        :param mini: yield tuples of partition details
+        :param page_size: number of rows to fetch per request
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are yielded when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
+        :return: A generator of dictionary's
+        """
+        resp = self._iter_list('listRoutePartition', 'routePartition', page_size, raw,
+                {'name': '%'}, returnedTags=self._projection('listRoutePartition', returned_tags) or {
+                    'name': '', 'description': ''})
+        if mini and returned_tags is None:
+            return ((i['name'], i['description']) for i in resp)
         else:
             return resp
 
-    def get_partition(self, partition):
+    def get_partition(self, partition, returned_tags=None):
         """
         Get partition details
         :param partition: Partition name
+        :param returned_tags: field paths to return eg ['name', 'description'], None for every field
         :return: result dictionary
         """
-        resp = self.client.service.getRoutePartition(name=partition)
+        resp = self.client.service.getRoutePartition(name=partition,
+                                                     returnedTags=self._projection('getRoutePartition', returned_tags))
 
         result = {
             'success': False,
@@ -1416,6 +2085,19 @@ class AXL(object):
             result['error'] = resp[1].faultstring
             return result
 
+    def update_partition(self, partition, description=None, time_schedule_name=None):
+        """
+        Update a partition, arguments left as None are not changed
+        :param partition: Name of the partition to update
+        :param description: Partition description
+        :param time_schedule_name: Name of the time schedule to use
+        :return: result dictionary
+        """
+        return self._update_object('updateRoutePartition', 'Partition', partition, {
+            'description': description,
+            'timeScheduleIdName': time_schedule_name,
+        })
+
     def delete_partition(self, partition):
         """
         Delete a partition
@@ -1443,27 +2125,42 @@ class AXL(object):
             result['error'] = resp[1].faultstring
             return result
 
-    def get_calling_search_spaces(self, mini=True):
+    def get_calling_search_spaces(self, mini=True, returned_tags=None, raw=False):
         """
         Get calling search spaces
         :param mini: return a list of tuples of css details
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are returned when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
         :return: A list of dictionary's
         """
-        resp = self.client.service.listCss(
-                {'name': '%'}, returnedTags={
-                    'name': '', 'description': ''})[1]['return']['css']
-        if mini:
-            return [(i['name'], i['description']) for i in resp]
+        return list(self.iter_calling_search_spaces(mini=mini, returned_tags=returned_tags, raw=raw))
+
+    def iter_calling_search_spaces(self, mini=True, page_size=PAGE_SIZE, returned_tags=None, raw=False):
+        """
+        Get calling search spaces, fetched page by page
+        :param mini: yield tuples of css details
+        :param page_size: number of rows to fetch per request
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are yielded when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
+        :return: A generator of dictionary's
+        """
+        resp = self._iter_list('listCss', 'css', page_size, raw,
+                {'name': '%'}, returnedTags=self._projection('listCss', returned_tags) or {
+                    'name': '', 'description': ''})
+        if mini and returned_tags is None:
+            return ((i['name'], i['description']) for i in resp)
         else:
             return resp
 
-    def get_calling_search_space(self, calling_search_space):
+    def get_calling_search_space(self, calling_search_space, returned_tags=None):
         """
         Get Calling search space details
         :param calling_search_space: Calling search space name
+        :param returned_tags: field paths to return eg ['name', 'description'], None for every field
         :return: result dictionary
         """
-        resp = self.client.service.getCss(name=calling_search_space)
+        resp = self.client.service.getCss(name=calling_search_space,
+                                          returnedTags=self._projection('getCss', returned_tags))
 
         result = {
             'success': False,
@@ -1528,6 +2225,17 @@ class AXL(object):
             result['error'] = resp[1].faultstring
             return result
 
+    def update_calling_search_space(self, calling_search_space, description=None):
+        """
+        Update a calling search space, arguments left as None are not changed
+        :param calling_search_space: Name of the CSS to update
+        :param description: Calling search space description
+        :return: result dictionary
+        """
+        return self._update_object('updateCss', 'Calling search space', calling_search_space, {
+            'description': description,
+        })
+
     def delete_calling_search_space(self, calling_search_space):
         """
         Delete a Calling search space
@@ -1555,24 +2263,38 @@ class AXL(object):
             result['error'] = resp[1].faultstring
             return result
 
-    def get_route_patterns(self, mini=True):
+    def get_route_patterns(self, mini=True, returned_tags=None, raw=False):
         """
         Get route patterns
         :param mini: return a list of tuples of route pattern details
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are returned when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
         :return: A list of dictionary's
         """
-        resp = self.client.service.listRoutePattern(
-                {'pattern': '%'}, returnedTags={
-                    'pattern': '', 'description': '', '_uuid': ''})[1]['return']['routePattern']
-        if mini:
-            return [(i['pattern'], i['description'], i['_uuid'][1:-1]) for i in resp]
+        return list(self.iter_route_patterns(mini=mini, returned_tags=returned_tags, raw=raw))
+
+    def iter_route_patterns(self, mini=True, page_size=PAGE_SIZE, returned_tags=None, raw=False):
+        """
+        Get route patterns, fetched page by page
+        :param mini: yield tuples of route pattern details
+        :param page_size: number of rows to fetch per request
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are yielded when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
+        :return: A generator of dictionary's
+        """
+        resp = self._iter_list('listRoutePattern', 'routePattern', page_size, raw,
+                {'pattern': '%'}, returnedTags=self._projection('listRoutePattern', returned_tags) or {
+                    'pattern': '', 'description': '', '_uuid': ''})
+        if mini and returned_tags is None:
+            return ((i['pattern'], i['description'], i['_uuid'][1:-1]) for i in resp)
         else:
             return resp
 
-    def get_route_pattern(self, pattern):
+    def get_route_pattern(self, pattern, returned_tags=None):
         """
         Get route pattern
         :param pattern: route pattern
+        :param returned_tags: field paths to return eg ['name', 'description'], None for every field
         :return: result dictionary
         """
         result = {
@@ -1590,7 +2312,8 @@ class AXL(object):
             return result
 
         else:
-            resp = self.client.service.getRoutePattern(uuid=uuid[1]['return']['routePattern'][0]['_uuid'][1:-1])
+            resp = self.client.service.getRoutePattern(uuid=uuid[1]['return']['routePattern'][0]['_uuid'][1:-1],
+                                                       returnedTags=self._projection('getRoutePattern', returned_tags))
 
             if resp[0] == 200:
                 result['success'] = True
@@ -1668,27 +2391,42 @@ class AXL(object):
             result['error'] = resp[1].faultstring
             return result
 
-    def get_media_resource_groups(self, mini=True):
+    def get_media_resource_groups(self, mini=True, returned_tags=None, raw=False):
         """
         Get media resource groups
         :param mini: return a list of tuples of route pattern details
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are returned when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
         :return: A list of dictionary's
         """
-        resp = self.client.service.listMediaResourceGroup(
-                {'name': '%'}, returnedTags={
-                    'name': '', 'description': ''})[1]['return']['mediaResourceGroup']
-        if mini:
-            return [(i['name'], i['description']) for i in resp]
+        return list(self.iter_media_resource_groups(mini=mini, returned_tags=returned_tags, raw=raw))
+
+    def iter_media_resource_groups(self, mini=True, page_size=PAGE_SIZE, returned_tags=None, raw=False):
+        """
+        Get media resource groups, fetched page by page
+        :param mini: yield tuples of route pattern details
+        :param page_size: number of rows to fetch per request
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are yielded when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
+        :return: A generator of dictionary's
+        """
+        resp = self._iter_list('listMediaResourceGroup', 'mediaResourceGroup', page_size, raw,
+                {'name': '%'}, returnedTags=self._projection('listMediaResourceGroup', returned_tags) or {
+                    'name': '', 'description': ''})
+        if mini and returned_tags is None:
+            return ((i['name'], i['description']) for i in resp)
         else:
             return resp
 
-    def get_media_resource_group(self, media_resource_group):
+    def get_media_resource_group(self, media_resource_group, returned_tags=None):
         """
         Get a media resource group details
         :param media_resource_group: Media resource group name
+        :param returned_tags: field paths to return eg ['name', 'description'], None for every field
         :return: result dictionary
         """
-        resp = self.client.service.getMediaResourceGroup(name=media_resource_group)
+        resp = self.client.service.getMediaResourceGroup(
+            name=media_resource_group, returnedTags=self._projection('getMediaResourceGroup', returned_tags))
 
         result = {
             'success': False,
@@ -1780,27 +2518,42 @@ class AXL(object):
             result['error'] = resp[1].faultstring
             return result
 
-    def get_media_resource_group_lists(self, mini=True):
+    def get_media_resource_group_lists(self, mini=True, returned_tags=None, raw=False):
         """
         Get media resource groups
         :param mini: return a list of tuples of route pattern details
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are returned when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
         :return: A list of dictionary's
         """
-        resp = self.client.service.listMediaResourceList(
-                {'name': '%'}, returnedTags={
-                    'name': ''})[1]['return']['mediaResourceList']
-        if mini:
-            return [i['name'] for i in resp]
+        return list(self.iter_media_resource_group_lists(mini=mini, returned_tags=returned_tags, raw=raw))
+
+    def iter_media_resource_group_lists(self, mini=True, page_size=PAGE_SIZE, returned_tags=None, raw=False):
+        """
+        Get media resource groups, fetched page by page
+        :param mini: yield tuples of route pattern details
+        :param page_size: number of rows to fetch per request
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are yielded when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
+        :return: A generator of dictionary's
+        """
+        resp = self._iter_list('listMediaResourceList', 'mediaResourceList', page_size, raw,
+                {'name': '%'}, returnedTags=self._projection('listMediaResourceList', returned_tags) or {
+                    'name': ''})
+        if mini and returned_tags is None:
+            return (i['name'] for i in resp)
         else:
             return resp
 
-    def get_media_resource_group_list(self, media_resource_group_list):
+    def get_media_resource_group_list(self, media_resource_group_list, returned_tags=None):
         """
         Get a media resource group list details
         :param media_resource_group_list: Media resource group list name
+        :param returned_tags: field paths to return eg ['name', 'description'], None for every field
         :return: result dictionary
         """
-        resp = self.client.service.getMediaResourceList(name=media_resource_group_list)
+        resp = self.client.service.getMediaResourceList(
+            name=media_resource_group_list, returnedTags=self._projection('getMediaResourceList', returned_tags))
 
         result = {
             'success': False,
@@ -1885,27 +2638,42 @@ class AXL(object):
             result['error'] = resp[1].faultstring
             return result
 
-    def get_directory_numbers(self, mini=True):
+    def get_directory_numbers(self, mini=True, returned_tags=None, raw=False):
         """
         Get directory numbers
         :param mini: return a list of tuples of directory number details
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are returned when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
         :return: A list of dictionary's
         """
-        resp = self.client.service.listLine(
-                {'pattern': '%'}, returnedTags={
-                    'pattern': '', 'description': '', 'routePartitionName': ''})[1]['return']['line']
-        if mini:
-            return [(i['pattern'], i['description'], i['routePartitionName']) for i in resp]
+        return list(self.iter_directory_numbers(mini=mini, returned_tags=returned_tags, raw=raw))
+
+    def iter_directory_numbers(self, mini=True, page_size=PAGE_SIZE, returned_tags=None, raw=False):
+        """
+        Get directory numbers, fetched page by page
+        :param mini: yield tuples of directory number details
+        :param page_size: number of rows to fetch per request
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are yielded when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
+        :return: A generator of dictionary's
+        """
+        resp = self._iter_list('listLine', 'line', page_size, raw,
+                {'pattern': '%'}, returnedTags=self._projection('listLine', returned_tags) or {
+                    'pattern': '', 'description': '', 'routePartitionName': ''})
+        if mini and returned_tags is None:
+            return ((i['pattern'], i['description'], i['routePartitionName']) for i in resp)
         else:
             return resp
 
-    def get_directory_number(self, directory_number):
+    def get_directory_number(self, directory_number, returned_tags=None):
         """
         Get directory number details
         :param directory_number: Directory number
+        :param returned_tags: field paths to return eg ['name', 'description'], None for every field
         :return: result dictionary
         """
-        resp = self.client.service.getLine(pattern=directory_number)
+        resp = self.client.service.getLine(pattern=directory_number,
+                                           returnedTags=self._projection('getLine', returned_tags))
 
         result = {
             'success': False,
@@ -2041,13 +2809,14 @@ class AXL(object):
             result['error'] = resp[1].faultstring
             return result
 
-    def delete_directory_number(self, directory_number):
+    def delete_directory_number(self, directory_number, route_partition_name=''):
         """
         Delete a directory number
         :param directory_number: The name of the directory number to delete
+        :param route_partition_name: Partition of the directory number, empty for the none partition
         :return: result dictionary
         """
-        resp = self.client.service.removeLine(pattern=directory_number)
+        resp = self.client.service.removeLine(pattern=directory_number, routePartitionName=route_partition_name)
 
         result = {
             'success': False,
@@ -2068,27 +2837,42 @@ class AXL(object):
             result['error'] = resp[1].faultstring
             return result
 
-    def get_cti_route_points(self, mini=True):
+    def get_cti_route_points(self, mini=True, returned_tags=None, raw=False):
         """
         Get CTI route points
         :param mini: return a list of tuples of CTI route point details
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are returned when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
         :return: A list of dictionary's
         """
-        resp = self.client.service.listCtiRoutePoint(
-                {'name': '%'}, returnedTags={
-                    'name': '', 'description': ''})[1]['return']['ctiRoutePoint']
-        if mini:
-            return [(i['name'], i['description']) for i in resp]
+        return list(self.iter_cti_route_points(mini=mini, returned_tags=returned_tags, raw=raw))
+
+    def iter_cti_route_points(self, mini=True, page_size=PAGE_SIZE, returned_tags=None, raw=False):
+        """
+        Get CTI route points, fetched page by page
+        :param mini: yield tuples of CTI route point details
+        :param page_size: number of rows to fetch per request
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are yielded when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
+        :return: A generator of dictionary's
+        """
+        resp = self._iter_list('listCtiRoutePoint', 'ctiRoutePoint', page_size, raw,
+                {'name': '%'}, returnedTags=self._projection('listCtiRoutePoint', returned_tags) or {
+                    'name': '', 'description': ''})
+        if mini and returned_tags is None:
+            return ((i['name'], i['description']) for i in resp)
         else:
             return resp
 
-    def get_cti_route_point(self, cti_route_point):
+    def get_cti_route_point(self, cti_route_point, returned_tags=None):
         """
         Get CTI route point details
         :param cti_route_point: CTI route point name
+        :param returned_tags: field paths to return eg ['name', 'description'], None for every field
         :return: result dictionary
         """
-        resp = self.client.service.getCtiRoutePoint(name=cti_route_point)
+        resp = self.client.service.getCtiRoutePoint(name=cti_route_point,
+                                                    returnedTags=self._projection('getCtiRoutePoint', returned_tags))
 
         result = {
             'success': False,
@@ -2207,35 +2991,50 @@ class AXL(object):
             result['error'] = resp[1].faultstring
             return result
 
-    def get_phones(self, mini=True):
+    def get_phones(self, mini=True, returned_tags=None, raw=False):
         """
         Get phone details
         :param mini: return a list of tuples of phone details
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are returned when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
         :return: A list of dictionary's
         """
-        resp = self.client.service.listPhone(
-                {'name': '%'}, returnedTags={
+        return list(self.iter_phones(mini=mini, returned_tags=returned_tags, raw=raw))
+
+    def iter_phones(self, mini=True, page_size=PAGE_SIZE, returned_tags=None, raw=False):
+        """
+        Get phone details, fetched page by page
+        :param mini: yield tuples of phone details
+        :param page_size: number of rows to fetch per request
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are yielded when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
+        :return: A generator of dictionary's
+        """
+        resp = self._iter_list('listPhone', 'phone', page_size, raw,
+                {'name': '%'}, returnedTags=self._projection('listPhone', returned_tags) or {
                     'name': '',
                     'product': '',
                     'protocol': '',
                     'locationName': '',
-                })[1]['return']['phone']
-        if mini:
-            return [(i['name'],
+                })
+        if mini and returned_tags is None:
+            return ((i['name'],
                      i['product'],
                      i['protocol'],
                      i['locationName']['value'],
-                     ) for i in resp]
+                     ) for i in resp)
         else:
             return resp
 
-    def get_phone(self, phone):
+    def get_phone(self, phone, returned_tags=None):
         """
         Get device profile parameters
         :param phone: profile name
+        :param returned_tags: field paths to return eg ['name', 'description'], None for every field
         :return: result dictionary
         """
-        resp = self.client.service.getPhone(name=phone)
+        resp = self.client.service.getPhone(name=phone,
+                                            returnedTags=self._projection('getPhone', returned_tags))
 
         result = {
             'success': False,
@@ -2256,6 +3055,39 @@ class AXL(object):
             result['error'] = resp[1].faultstring
             return result
 
+    def get_phone_inventory(self, name='%', chunk_size=SQL_CHUNK_SIZE, batch_size=BATCH_SIZE):
+        """
+        Get phones with their device pool, calling search space, location, owner and lines
+        from joined SQL queries, in a handful of requests rather than a get_phone per phone
+        :param name: phone name with % wildcards
+        :param chunk_size: number of rows to fetch per request
+        :param batch_size: number of phones to fetch the lines of per query
+        :return: A list of dictionary's shaped like the get_phone response
+        """
+        return list(self.iter_phone_inventory(name=name, chunk_size=chunk_size, batch_size=batch_size))
+
+    def iter_phone_inventory(self, name='%', chunk_size=SQL_CHUNK_SIZE, batch_size=BATCH_SIZE):
+        """
+        Get phones with their device pool, calling search space, location, owner and lines
+        from joined SQL queries, fetched batch by batch in pkid order
+        :param name: phone name with % wildcards
+        :param chunk_size: number of rows to fetch per request
+        :param batch_size: number of phones to fetch the lines of per query
+        :return: A generator of dictionary's shaped like the get_phone response
+        """
+        phones = self.iter_sql_query(phone_query(name), key='pkid', chunk_size=chunk_size)
+        while True:
+            batch = list(itertools.islice(phones, batch_size))
+            if not batch:
+                return
+            # the lines of the batch are the lines of the phones between its first and last pkid
+            lines = {}
+            query = line_query(name, batch[0]['pkid'], batch[-1]['pkid'])
+            for i in self.iter_sql_query(query, key='pkid', chunk_size=chunk_size):
+                lines.setdefault(str(i['fkdevice']), []).append(i)
+            for i in batch:
+                yield as_phone(i, lines.get(str(i['pkid']), []))
+
     def add_phone(self,
                   phone,
                   description='',
@@ -2402,35 +3234,50 @@ class AXL(object):
             result['error'] = resp[1].faultstring
             return result
 
-    def get_device_profiles(self, mini=True):
+    def get_device_profiles(self, mini=True, returned_tags=None, raw=False):
         """
         Get device profile details
         :param mini: return a list of tuples of device profile details
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are returned when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
         :return: A list of dictionary's
         """
-        resp = self.client.service.listDeviceProfile(
-                {'name': '%'}, returnedTags={
+        return list(self.iter_device_profiles(mini=mini, returned_tags=returned_tags, raw=raw))
+
+    def iter_device_profiles(self, mini=True, page_size=PAGE_SIZE, returned_tags=None, raw=False):
+        """
+        Get device profile details, fetched page by page
+        :param mini: yield tuples of device profile details
+        :param page_size: number of rows to fetch per request
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are yielded when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
+        :return: A generator of dictionary's
+        """
+        resp = self._iter_list('listDeviceProfile', 'deviceProfile', page_size, raw,
+                {'name': '%'}, returnedTags=self._projection('listDeviceProfile', returned_tags) or {
                     'name': '',
                     'product': '',
                     'protocol': '',
                     'phoneTemplateName': '',
-                })[1]['return']['deviceProfile']
-        if mini:
-            return [(i['name'],
+                })
+        if mini and returned_tags is None:
+            return ((i['name'],
                      i['product'],
                      i['protocol'],
                      i['phoneTemplateName']['value'],
-                     ) for i in resp]
+                     ) for i in resp)
         else:
             return resp
 
-    def get_device_profile(self, profile):
+    def get_device_profile(self, profile, returned_tags=None):
         """
         Get device profile parameters
         :param profile: profile name
+        :param returned_tags: field paths to return eg ['name', 'description'], None for every field
         :return: result dictionary
         """
-        resp = self.client.service.getDeviceProfile(name=profile)
+        resp = self.client.service.getDeviceProfile(name=profile,
+                                                    returnedTags=self._projection('getDeviceProfile', returned_tags))
 
         result = {
             'success': False,
@@ -2557,33 +3404,48 @@ class AXL(object):
             result['error'] = resp[1].faultstring
             return result
 
-    def get_users(self, mini=True):
+    def get_users(self, mini=True, returned_tags=None, raw=False):
         """
         Get users details
         :param mini: return a list of tuples of user details
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are returned when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
         :return: A list of dictionary's
         """
-        resp = self.client.service.listUser(
-                {'userid': '%'}, returnedTags={
+        return list(self.iter_users(mini=mini, returned_tags=returned_tags, raw=raw))
+
+    def iter_users(self, mini=True, page_size=PAGE_SIZE, returned_tags=None, raw=False):
+        """
+        Get users details, fetched page by page
+        :param mini: yield tuples of user details
+        :param page_size: number of rows to fetch per request
+        :param returned_tags: field paths to return eg ['name', 'description'], dictionaries are yielded when given
+        :param raw: parse the replies without suds, faster for large clusters, objects are dictionaries
+        :return: A generator of dictionary's
+        """
+        resp = self._iter_list('listUser', 'user', page_size, raw,
+                {'userid': '%'}, returnedTags=self._projection('listUser', returned_tags) or {
                     'userid': '',
                     'firstName': '',
                     'lastName': '',
-                })[1]['return']['user']
-        if mini:
-            return [(i['userid'],
+                })
+        if mini and returned_tags is None:
+            return ((i['userid'],
                      i['firstName'],
                      i['lastName'],
-                     ) for i in resp]
+                     ) for i in resp)
         else:
             return resp
 
-    def get_user(self, user_id):
+    def get_user(self, user_id, returned_tags=None):
         """
         Get user parameters
         :param user_id: profile name
+        :param returned_tags: field paths to return eg ['name', 'description'], None for every field
         :return: result dictionary
         """
-        resp = self.client.service.getUser(userid=user_id)
+        resp = self.client.service.getUser(userid=user_id,
+                                           returnedTags=self._projection('getUser', returned_tags))
 
         result = {
             'success': False,
@@ -2664,15 +3526,15 @@ class AXL(object):
             'error': '',
         }
 
-        resp = self.client.service.getDeviceProfile(name=device_profile)
+        profile = self.get_device_profile(device_profile)
 
-        if resp[0] == 500 and '{0} was not found'.format(device_profile) in resp[1].faultstring:
+        if not profile['success']:
             result['response'] = 'Device profile: {0} not found'.format(device_profile)
-            result['error'] = resp[1].faultstring
+            result['error'] = profile['error']
             return result
 
         else:
-            uuid = resp[1]['return']['deviceProfile']['_uuid'][1:-1]
+            uuid = profile['response']['_uuid'][1:-1]
 
         resp = self.client.service.updateUser(
                 userid=user_id,
@@ -2758,6 +3620,19 @@ class AXL(object):
             result['error'] = resp[1].faultstring
             return result
 
+    def update_user(self, user_id, first_name=None, last_name=None):
+        """
+        Update a user, arguments left as None are not changed
+        :param user_id: User ID of the user to update
+        :param first_name: First name of the user
+        :param last_name: Last name of the user
+        :return: result dictionary
+        """
+        return self._update_object('updateUser', 'User', user_id, {
+            'firstName': first_name,
+            'lastName': last_name,
+        }, key='userid')
+
     def delete_user(self, user_id):
         """
         Delete a user
@@ -2783,4 +3658,86 @@ class AXL(object):
         else:
             result['response'] = 'User could not be deleted'
             result['error'] = resp[1].faultstring
-            return result
\ No newline at end of file
+            return result
+
+
+def _recorded(method):
+    """
+    Record the request attempts of a method and add them to its result dictionary
+    """
+    @functools.wraps(method)
+    def call(self, *args, **kwargs):
+        with recording() as record:
+            result = method(self, *args, **kwargs)
+        return annotate(result, record)
+    return call
+
+
+def _lookup_key(kind, name):
+    """
+    Lookup cache key of an object, UCM object names are case insensitive
+    """
+    return kind, name.lower() if isinstance(name, str) else name
+
+
+def _cached(method, kind):
+    """
+    Serve a get_<object>(name) method from the lookup cache, only successful results are cached.
+    Calls with a returned_tags projection are not cached. Every caller gets its own copy of the result,
+    changing the response does not change the cached entry.
+    """
+    param = list(inspect.signature(method).parameters)[1]
+
+    @functools.wraps(method)
+    def call(self, *args, **kwargs):
+        if self.lookup_cache is None or len(args) > 1 or kwargs.get('returned_tags') is not None:
+            return method(self, *args, **kwargs)
+        key = _lookup_key(kind, args[0] if args else kwargs.get(param))
+        result = self.lookup_cache.get(key)
+        if result is not None:
+            return copy.deepcopy(result)
+        result = method(self, *args, **kwargs)
+        if result['success']:
+            self.lookup_cache.put(key, copy.deepcopy(result))
+        return result
+    return call
+
+
+def _invalidating(method, kind):
+    """
+    Remove the object an add, update or delete method changes from the lookup cache
+    """
+    param = list(inspect.signature(method).parameters)[1]
+
+    @functools.wraps(method)
+    def call(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            if self.lookup_cache is not None:
+                names = args[0] if args else kwargs.get(param)
+                for i in names if isinstance(names, list) else [names]:
+                    self.lookup_cache.invalidate(_lookup_key(kind, i))
+    return call
+
+
+# object kinds named by a pattern and a partition, a get by pattern alone is not a cache key
+_UNCACHED = ('directory_number', 'route_pattern')
+
+# object kinds with a get_<object>(name) method eg device_pool, longest first
+_kinds = sorted((i[len('get_'):] for i, m in inspect.getmembers(AXL, inspect.isfunction)
+                 if i.startswith('get_') and len(inspect.signature(m).parameters) == 3
+                 and 'mini' not in inspect.signature(m).parameters and i[len('get_'):] not in _UNCACHED),
+                key=len, reverse=True)
+
+for _name, _method in inspect.getmembers(AXL, inspect.isfunction):
+    if _name.startswith(('_', 'iter_')) or _name == 'bulk':
+        continue
+    _verb, _, _rest = _name.partition('_')
+    if _verb == 'get' and _rest in _kinds:
+        _method = _cached(_method, _rest)
+    elif _verb in ('add', 'update', 'delete'):
+        _kind = next((i for i in _kinds if _rest == i or _rest.startswith(i + '_')), None)
+        if _kind is not None:
+            _method = _invalidating(_method, _kind)
+    setattr(AXL, _name, _recorded(_method))
@@ -0,0 +1,284 @@
+"""
+Instrumentation of the SOAP operations AXL sends.
+Hooks are called before every operation is sent and after its reply is parsed, with an event holding
+the operation name, request and response sizes, wall time, serialization and parse time and HTTP status.
+Every operation is also counted in a per operation latency histogram that can be read at any time.
+"""
+
+import bisect
+import contextvars
+import threading
+import time
+
+from suds.plugin import MessagePlugin
+
+_event = contextvars.ContextVar('axl_call_event', default=None)
+
+# Histogram bucket upper bounds in seconds, from 0.5ms growing by half up to about 95s
+BUCKETS = tuple(0.0005 * 1.5 ** i for i in range(31))
+
+
+class CallEvent(object):
+    """
+    One SOAP operation
+    """
+
+    def __init__(self, operation):
+        """
+        :param operation: AXL operation name eg getPhone
+        """
+        self.operation = operation
+        self.request_bytes = 0
+        self.response_bytes = 0
+        self.status = None
+        self.error = None
+        self.seconds = 0.0
+        self.serialize_seconds = 0.0
+        self.parse_seconds = 0.0
+
+        self.started = time.perf_counter()
+        self.sent = None
+        self.received = None
+
+    def __repr__(self):
+        return '<CallEvent {0} status={1} {2:.4f}s>'.format(self.operation, self.status, self.seconds)
+
+
+class LatencyHistogram(object):
+    """
+    Counts of latencies in exponentially growing buckets
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        """
+        :param buckets: increasing bucket upper bounds in seconds, longer latencies go in an overflow bucket
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, error=False):
+        """
+        Count a latency
+        :param seconds: latency
+        :param error: whether the operation failed
+        """
+        i = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += seconds
+            self.max = max(self.max, seconds)
+            if error:
+                self.errors += 1
+
+    def percentile(self, percent):
+        """
+        Estimate a percentile, interpolated within its bucket
+        :param percent: percentile between 0 and 100
+        :return: seconds, None when nothing was counted
+        """
+        with self._lock:
+            if not self.count:
+                return None
+            rank = self.count * percent / 100.0
+            seen = 0
+            for i, n in enumerate(self.counts):
+                if n and seen + n >= rank:
+                    low = self.buckets[i - 1] if i else 0.0
+                    high = self.buckets[i] if i < len(self.buckets) else self.max
+                    return min(low + (high - low) * (rank - seen) / n, self.max)
+                seen += n
+            return self.max
+
+    def snapshot(self):
+        """
+        Consistent copy of the counts
+        :return: tuple of the bucket counts, the overflow bucket last, the count and the sum of latencies
+        """
+        with self._lock:
+            return list(self.counts), self.count, self.sum
+
+    def stats(self):
+        """
+        Summary of the histogram
+        :return: dictionary of count, errors, mean, p50, p95, p99 and max
+        """
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'mean': self.sum / self.count if self.count else None,
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'p99': self.percentile(99),
+            'max': self.max,
+        }
+
+
+class _Timing(MessagePlugin):
+    """
+    suds plugin that marks when the request is serialized and the reply arrives
+    """
+
+    def __init__(self, instruments):
+        self.instruments = instruments
+
+    def sending(self, context):
+        event = _event.get()
+        if event is not None:
+            self.instruments.sending(event, context.envelope)
+
+    def received(self, context):
+        event = _event.get()
+        if event is not None:
+            self.instruments.received(event, len(context.reply or b''))
+
+
+class Instruments(object):
+    """
+    Hooks and latency histograms of the SOAP operations of an AXL instance.
+    Hooks run on the thread making the call, keep them quick.
+    """
+
+    def __init__(self):
+        self.before = []
+        self.after = []
+        self.histograms = {}
+        self.plugin = _Timing(self)
+        self._lock = threading.Lock()
+
+    def add_hook(self, before=None, after=None):
+        """
+        Add hooks
+        :param before: called with the CallEvent once the request is serialized, before it is sent
+        :param after: called with the completed CallEvent once the reply is parsed
+        """
+        if before is not None:
+            self.before.append(before)
+        if after is not None:
+            self.after.append(after)
+
+    def remove_hook(self, hook):
+        """
+        Remove a before or after hook
+        :param hook: the hook to remove
+        """
+        for hooks in (self.before, self.after):
+            if hook in hooks:
+                hooks.remove(hook)
+
+    @staticmethod
+    def fire(hooks, event):
+        for hook in list(hooks):
+            hook(event)
+
+    def histogram(self, operation):
+        """
+        Latency histogram of an operation, created on first use
+        :param operation: AXL operation name
+        :return: LatencyHistogram
+        """
+        histogram = self.histograms.get(operation)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(operation, LatencyHistogram())
+        return histogram
+
+    def latency(self):
+        """
+        Latency summary of every operation sent so far
+        :return: dictionary of operation name to histogram stats
+        """
+        return dict((operation, histogram.stats()) for operation, histogram in list(self.histograms.items()))
+
+    def start(self, operation):
+        """
+        Start the event of an operation, the plugin fills it in while suds builds and parses the messages
+        :param operation: AXL operation name
+        :return: tuple of the event and the token to pass to stop
+        """
+        event = CallEvent(operation)
+        return event, _event.set(event)
+
+    def sending(self, event, envelope):
+        """
+        Mark the request of an event serialized and call the before hooks
+        :param event: CallEvent
+        :param envelope: request bytes
+        """
+        event.sent = time.perf_counter()
+        event.serialize_seconds = event.sent - event.started
+        event.request_bytes = len(envelope)
+        self.fire(self.before, event)
+
+    def received(self, event, size):
+        """
+        Mark the reply of an event received
+        :param event: CallEvent
+        :param size: reply size in bytes
+        """
+        event.received = time.perf_counter()
+        event.response_bytes = size
+
+    def pause(self, token):
+        """
+        Detach an event from the running code while its reply is awaited, the wall time keeps running
+        :param token: token returned by start
+        """
+        _event.reset(token)
+
+    def resume(self, event):
+        """
+        Make an event current again to parse its reply
+        :param event: CallEvent
+        :return: token to pass to stop
+        """
+        return _event.set(event)
+
+    def stop(self, event, token, result=None, error=None):
+        """
+        Complete an event, count it and call the after hooks
+        :param event: CallEvent
+        :param token: token returned by start or resume
+        :param result: value suds returned, a tuple of status and response
+        :param error: exception raised by the call
+        """
+        _event.reset(token)
+        end = time.perf_counter()
+        event.seconds = end - event.started
+        if event.received is not None:
+            event.parse_seconds = end - event.received
+        if isinstance(result, tuple):
+            event.status = result[0]
+        event.error = error
+        self.histogram(event.operation).observe(event.seconds, error=error is not None or event.status != 200)
+        self.fire(self.after, event)
+
+
+class InstrumentedService(object):
+    """
+    Wraps the service of a suds client so every operation is instrumented
+    """
+
+    def __init__(self, service, instruments):
+        self._service = service
+        self._instruments = instruments
+
+    def __getattr__(self, name):
+        method = getattr(self._service, name)
+        instruments = self._instruments
+
+        def call(*args, **kwargs):
+            event, token = instruments.start(name)
+            try:
+                result = method(*args, **kwargs)
+            except Exception as e:
+                instruments.stop(event, token, error=e)
+                raise
+            instruments.stop(event, token, result)
+            return result
+        return call
@@ -0,0 +1,140 @@
+"""
+Bulk inventory readers built on executeSQLQuery.
+Phones are read with their device pool, calling search space, location, owner and lines from joined
+queries over the device, devicenumplanmap, numplan and enduser tables, a few thousand at a time, instead
+of a getPhone request per phone. Every phone becomes a dictionary shaped like the getPhone response:
+references are dictionaries of _uuid and value, class is cls like suds names it and the lines
+are under lines.line.
+"""
+
+# Phones per lines query, the device query is chunked by iter_sql_query
+BATCH_SIZE = 5000
+
+PHONE_QUERY = """select d.pkid, d.name, d.description, tp.name as product, tc.name as class,
+tdp.name as protocol, d.fkdevicepool, dp.name as devicepoolname, d.fkcallingsearchspace,
+css.name as callingsearchspacename, d.fklocation, l.name as locationname, d.fkenduser, eu.userid as owneruserid
+from device d
+inner join typeproduct tp on tp.enum = d.tkproduct
+inner join typeclass tc on tc.enum = d.tkclass
+inner join typedeviceprotocol tdp on tdp.enum = d.tkdeviceprotocol
+left outer join devicepool dp on dp.pkid = d.fkdevicepool
+left outer join callingsearchspace css on css.pkid = d.fkcallingsearchspace
+left outer join location l on l.pkid = d.fklocation
+left outer join enduser eu on eu.pkid = d.fkenduser
+where d.tkclass = 1 and d.name like {0}"""
+
+LINE_QUERY = """select dnpm.pkid, dnpm.fkdevice, dnpm.numplanindex, dnpm.display, dnpm.displayascii,
+dnpm.label, dnpm.e164mask, n.pkid as fknumplan, n.dnorpattern, n.fkroutepartition, rp.name as routepartitionname
+from devicenumplanmap dnpm
+inner join device d on d.pkid = dnpm.fkdevice
+inner join numplan n on n.pkid = dnpm.fknumplan
+left outer join routepartition rp on rp.pkid = n.fkroutepartition
+where d.tkclass = 1 and d.name like {0} and d.pkid >= {1} and d.pkid <= {2}"""
+
+
+def quote(value):
+    """
+    SQL string literal
+    :param value: string
+    :return: the value quoted for executeSQLQuery
+    """
+    return "'{0}'".format(str(value).replace("'", "''"))
+
+
+def phone_query(name='%'):
+    """
+    Query of the phones with their references, one row per phone
+    :param name: phone name with % wildcards
+    :return: SQL query, the pkid column is unique
+    """
+    return PHONE_QUERY.format(quote(name))
+
+
+def line_query(name, first, last):
+    """
+    Query of the lines of the phones in a range of pkids, one row per line appearance
+    :param name: phone name with % wildcards, the same as the phone query
+    :param first: lowest phone pkid
+    :param last: highest phone pkid
+    :return: SQL query, the pkid column is unique
+    """
+    return LINE_QUERY.format(quote(name), quote(first), quote(last))
+
+
+def value(row, column):
+    """
+    Column of an executeSQLQuery row, empty and null columns are empty strings
+    :param row: suds row or dictionary
+    :param column: column name
+    :return: string
+    """
+    try:
+        data = row[column]
+    except (KeyError, AttributeError):
+        return ''
+    return '' if data is None else str(data)
+
+
+def uuid(pkid):
+    """
+    AXL uuid of a pkid
+    :param pkid: pkid as SQL returns it eg 4a3c1e5d-...
+    :return: uuid as AXL returns it eg {4A3C1E5D-...}, empty for an empty pkid
+    """
+    return '{{{0}}}'.format(pkid.upper()) if pkid else ''
+
+
+def reference(row, pkid, name):
+    """
+    Reference to another object shaped like an AXL XFkType
+    :param row: executeSQLQuery row
+    :param pkid: column of the pkid of the object
+    :param name: column of the name of the object
+    :return: dictionary of _uuid and value, None when the reference is not set
+    """
+    if not value(row, pkid):
+        return None
+    return {'_uuid': uuid(value(row, pkid)), 'value': value(row, name)}
+
+
+def as_line(row):
+    """
+    Line appearance of a phone shaped like a getPhone lines.line entry
+    :param row: row of the line query
+    :return: dictionary
+    """
+    return {
+        '_uuid': uuid(value(row, 'pkid')),
+        'index': value(row, 'numplanindex'),
+        'display': value(row, 'display'),
+        'displayAscii': value(row, 'displayascii'),
+        'label': value(row, 'label'),
+        'e164Mask': value(row, 'e164mask'),
+        'dirn': {
+            '_uuid': uuid(value(row, 'fknumplan')),
+            'pattern': value(row, 'dnorpattern'),
+            'routePartitionName': reference(row, 'fkroutepartition', 'routepartitionname'),
+        },
+    }
+
+
+def as_phone(row, lines):
+    """
+    Phone shaped like the getPhone response
+    :param row: row of the phone query
+    :param lines: rows of the line query for the phone
+    :return: dictionary
+    """
+    return {
+        '_uuid': uuid(value(row, 'pkid')),
+        'name': value(row, 'name'),
+        'description': value(row, 'description'),
+        'product': value(row, 'product'),
+        'cls': value(row, 'class'),
+        'protocol': value(row, 'protocol'),
+        'devicePoolName': reference(row, 'fkdevicepool', 'devicepoolname'),
+        'callingSearchSpaceName': reference(row, 'fkcallingsearchspace', 'callingsearchspacename'),
+        'locationName': reference(row, 'fklocation', 'locationname'),
+        'ownerUserName': reference(row, 'fkenduser', 'owneruserid'),
+        'lines': {'line': sorted((as_line(i) for i in lines), key=lambda i: int(i['index'] or 0))},
+    }
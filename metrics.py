@@ -0,0 +1,217 @@
+"""
+In-process metrics of AXL clients in the OpenMetrics text format.
+Register AXL or AsyncAXL instances with a MetricsRegistry. Their SOAP operations are counted by an
+instrumentation hook, connection pool, session and rate limiter counters are read from the transports
+when the metrics are rendered. Metrics are labelled with the UCM host.
+
+    registry = MetricsRegistry()
+    registry.register(ucm)
+    registry.serve(port=9464)  # http://127.0.0.1:9464/metrics
+"""
+
+import collections
+import http.server
+import threading
+import weakref
+
+from .hooks import LatencyHistogram
+
+# Latency histogram buckets in seconds
+METRIC_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+
+# transport stat, metric name, type and help
+TRANSPORT_METRICS = (
+    ('connects', 'axl_pool_connects', 'counter', 'Connections opened'),
+    ('handshakes', 'axl_pool_handshakes', 'counter', 'TLS handshakes'),
+    ('resumed', 'axl_pool_resumed', 'counter', 'TLS handshakes that resumed a session'),
+    ('requests', 'axl_pool_requests', 'counter', 'HTTP requests sent'),
+    ('reused', 'axl_pool_reused', 'counter', 'HTTP requests sent on a reused connection'),
+    ('idle', 'axl_pool_idle_connections', 'gauge', 'Idle connections'),
+    ('pool_size', 'axl_pool_size', 'gauge', 'Maximum connections or requests in flight'),
+    ('sessions', 'axl_sessions', 'counter', 'UCM sessions started'),
+    ('session_reused', 'axl_session_reused', 'counter', 'Requests authenticated by the session cookie'),
+    ('session_expired', 'axl_session_expired', 'counter', 'Session cookies UCM no longer accepted'),
+)
+
+
+def _labels(**labels):
+    """
+    Render a label set
+    :param labels: label names and values
+    :return: label set eg {host="10.0.0.1",operation="getPhone"}
+    """
+    return '{' + ','.join('{0}="{1}"'.format(k, str(v).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n'))
+                          for k, v in sorted(labels.items())) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class MetricsRegistry(object):
+    """
+    Counters, gauges and latency histograms of the registered AXL clients
+    """
+
+    def __init__(self, buckets=METRIC_BUCKETS):
+        """
+        :param buckets: latency histogram bucket upper bounds in seconds
+        """
+        self.buckets = buckets
+        self.requests = collections.Counter()
+        self.request_bytes = collections.Counter()
+        self.response_bytes = collections.Counter()
+        self.in_flight = collections.Counter()
+        self.histograms = {}
+        self._clients = weakref.WeakSet()
+        self._lock = threading.Lock()
+
+    def register(self, ucm):
+        """
+        Collect the metrics of an AXL or AsyncAXL instance
+        :param ucm: AXL or AsyncAXL instance
+        """
+        host = getattr(ucm, 'axl', ucm).cucm
+
+        def before(event):
+            with self._lock:
+                self.in_flight[host] += 1
+
+        def after(event):
+            if event.error is not None:
+                status = 'error'
+            elif event.status is None:
+                status = 'none'
+            else:
+                status = str(int(event.status))
+            key = (host, event.operation)
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                with self._lock:
+                    histogram = self.histograms.setdefault(key, LatencyHistogram(self.buckets))
+            histogram.observe(event.seconds)
+            with self._lock:
+                # before hooks are only called for requests that were serialized
+                if event.sent is not None:
+                    self.in_flight[host] -= 1
+                self.requests[host, event.operation, status] += 1
+                self.request_bytes[key] += event.request_bytes
+                self.response_bytes[key] += event.response_bytes
+
+        ucm.instruments.add_hook(before=before, after=after)
+        self._clients.add(ucm)
+
+    def _transports(self):
+        """
+        Transport and rate limiter stats summed per host
+        :return: dictionary of host to Counter of stats, limiter stats are keyed by (kind, stat)
+        """
+        hosts = collections.defaultdict(collections.Counter)
+        for ucm in list(self._clients):
+            stats = hosts[getattr(ucm, 'axl', ucm).cucm]
+            transport = ucm.transport
+            if hasattr(transport, 'stats'):
+                stats.update(transport.stats())
+            size = getattr(transport, 'pool_size', getattr(transport, 'concurrency', None))
+            if size is not None:
+                stats['pool_size'] += size
+            limiter = getattr(transport, 'limiter', None)
+            if limiter is not None:
+                for kind, limits in limiter.stats().items():
+                    stats[kind, 'throttled'] += limits['throttled']
+                    stats[kind, 'rate'] += limits['rate']
+        return hosts
+
+    def render(self):
+        """
+        Render every metric
+        :return: OpenMetrics text exposition
+        """
+        lines = []
+
+        def family(name, kind, help, samples):
+            lines.append('# TYPE {0} {1}'.format(name, kind))
+            lines.append('# HELP {0} {1}'.format(name, help))
+            lines.extend('{0}{1} {2}'.format(sample, _labels(**labels), _number(value))
+                         for sample, labels, value in samples)
+
+        with self._lock:
+            requests = dict(self.requests)
+            request_bytes = dict(self.request_bytes)
+            response_bytes = dict(self.response_bytes)
+            in_flight = dict(self.in_flight)
+            histograms = dict(self.histograms)
+
+        family('axl_requests', 'counter', 'SOAP operations sent by status, error for requests that failed to send',
+               [('axl_requests_total', {'host': h, 'operation': o, 'status': s}, n)
+                for (h, o, s), n in sorted(requests.items())])
+        family('axl_request_bytes', 'counter', 'SOAP request bytes sent',
+               [('axl_request_bytes_total', {'host': h, 'operation': o}, n)
+                for (h, o), n in sorted(request_bytes.items())])
+        family('axl_response_bytes', 'counter', 'SOAP response bytes received',
+               [('axl_response_bytes_total', {'host': h, 'operation': o}, n)
+                for (h, o), n in sorted(response_bytes.items())])
+        family('axl_in_flight', 'gauge', 'SOAP operations waiting for a reply',
+               [('axl_in_flight', {'host': h}, n) for h, n in sorted(in_flight.items())])
+
+        samples = []
+        for (host, operation), histogram in sorted(histograms.items()):
+            counts, count, total = histogram.snapshot()
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float('inf'),), counts):
+                cumulative += n
+                samples.append(('axl_request_duration_seconds_bucket',
+                                {'host': host, 'operation': operation, 'le': _number(float(bound))}, cumulative))
+            samples.append(('axl_request_duration_seconds_count', {'host': host, 'operation': operation}, count))
+            samples.append(('axl_request_duration_seconds_sum', {'host': host, 'operation': operation}, total))
+        family('axl_request_duration_seconds', 'histogram', 'SOAP operation wall time', samples)
+
+        transports = sorted(self._transports().items())
+        for stat, name, kind, help in TRANSPORT_METRICS:
+            family(name, kind, help, [(name + ('_total' if kind == 'counter' else ''), {'host': h}, s[stat])
+                                      for h, s in transports if stat in s])
+        limiters = sorted(set(k[0] for h, s in transports for k in s if isinstance(k, tuple)))
+        family('axl_throttled', 'counter', 'Requests UCM throttled',
+               [('axl_throttled_total', {'host': h, 'limiter': i}, s[i, 'throttled'])
+                for h, s in transports for i in limiters if (i, 'throttled') in s])
+        family('axl_rate_limit', 'gauge', 'Requests per second allowed by the rate limiter',
+               [('axl_rate_limit', {'host': h, 'limiter': i}, s[i, 'rate'])
+                for h, s in transports for i in limiters if (i, 'rate') in s])
+
+        lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, host='127.0.0.1', port=9464):
+        """
+        Serve the metrics on /metrics from a background thread
+        :param host: address to listen on
+        :param port: port to listen on, 0 for a free port
+        :return: the running server, its url is server.url, stop it with server.shutdown()
+        """
+        registry = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = http.server.ThreadingHTTPServer((host, port), Handler)
+        server.daemon_threads = True
+        server.url = 'http://{0}:{1}/metrics'.format(host, server.server_address[1])
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
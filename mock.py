@@ -0,0 +1,779 @@
+"""
+Local mock AXL server for benchmarking and offline testing.
+Serves the list, get, add, update and remove operations AXL uses for phones, lines, users,
+device pools and the other objects, plus executeSQLQuery, from synthetic datasets of any size.
+Per call latency, throttling and response payload size are configurable.
+
+Run a mock server with 10000 phones, lines and users and 20ms latency:
+    python -m axl.mock --size 10000 --latency 0.02
+
+Point an AXL client at it with the WSDL the mock writes, or the real AXLAPI.wsdl:
+    ucm = AXL('username', 'password', mock.wsdl, '127.0.0.1')
+    ucm.client.set_options(location=mock.url)
+"""
+
+import argparse
+import collections
+import http.server
+import itertools
+import os
+import random
+import re
+import shutil
+import tempfile
+import threading
+import time
+import xml.etree.ElementTree as ElementTree
+import zlib
+from xml.sax.saxutils import escape
+
+# AXL object tag: (name used in faults, key field, fields)
+KINDS = collections.OrderedDict([
+    ('phone', ('Phone', 'name', (
+        'name', 'description', 'product', 'class', 'protocol', 'protocolSide', 'devicePoolName',
+        'commonDeviceConfigName', 'locationName', 'phoneTemplateName', 'callingSearchSpaceName',
+        'automatedAlternateRoutingCssName', 'subscribeCallingSearchSpaceName', 'lines'))),
+    ('line', ('Line', 'pattern', (
+        'pattern', 'description', 'routePartitionName', 'alertingName', 'asciiAlertingName',
+        'voiceMailProfileName', 'shareLineAppearanceCssName', 'callForwardAll'))),
+    ('user', ('User', 'userid', (
+        'userid', 'firstName', 'lastName', 'userProfile', 'password', 'pin', 'phoneProfiles',
+        'defaultProfile', 'subscribeCallingSearchSpaceName', 'primaryExtension', 'associatedGroups'))),
+    ('deviceProfile', ('Device Profile', 'name', (
+        'name', 'description', 'product', 'class', 'protocol', 'protocolSide', 'phoneTemplateName', 'lines'))),
+    ('devicePool', ('Device Pool', 'name', (
+        'name', 'dateTimeSettingName', 'callManagerGroupName', 'mediaResourceListName', 'regionName',
+        'srstName', 'locationName', 'localRouteGroup'))),
+    ('region', ('Region', 'name', ('name', 'relatedRegions'))),
+    ('location', ('Location', 'name', (
+        'name', 'withinAudioBandwidth', 'withinVideoBandwidth', 'withinImmersiveKbits', 'kbits', 'videoKbits'))),
+    ('srst', ('SRST', 'name', ('name', 'port', 'ipAddress', 'SipPort'))),
+    ('conferenceBridge', ('Conference Bridge', 'name', (
+        'name', 'description', 'product', 'devicePoolName', 'locationName', 'securityProfileName'))),
+    ('transcoder', ('Transcoder', 'name', ('name', 'description', 'product', 'devicePoolName'))),
+    ('h323Gateway', ('H323 Gateway', 'name', (
+        'name', 'description', 'product', 'protocol', 'protocolSide', 'callingSearchSpaceName',
+        'devicePoolName', 'locationName', 'sigDigits', 'mediaResourceListName'))),
+    ('routeGroup', ('Route Group', 'name', ('name', 'distributionAlgorithm', 'members'))),
+    ('routeList', ('Route List', 'name', (
+        'name', 'description', 'callManagerGroupName', 'routeListEnabled', 'members'))),
+    ('routePartition', ('Route Partition', 'name', ('name', 'description', 'timeScheduleIdName'))),
+    ('css', ('Calling Search Space', 'name', ('name', 'description', 'members'))),
+    ('routePattern', ('Route Pattern', 'pattern', (
+        'pattern', 'description', 'routePartitionName', 'blockEnable', 'destination'))),
+    ('mediaResourceGroup', ('Media Resource Group', 'name', ('name', 'description', 'multicast', 'members'))),
+    ('mediaResourceList', ('Media Resource List', 'name', ('name', 'members'))),
+    ('ctiRoutePoint', ('CTI Route Point', 'name', (
+        'name', 'description', 'product', 'class', 'protocol', 'protocolSide', 'callingSearchSpaceName',
+        'devicePoolName', 'locationName', 'lines'))),
+])
+
+# fields holding a reference to another object, returned as text with a uuid attribute
+FOREIGN_KEYS = frozenset(
+    ['devicePoolName', 'commonDeviceConfigName', 'locationName', 'phoneTemplateName', 'callingSearchSpaceName',
+     'automatedAlternateRoutingCssName', 'subscribeCallingSearchSpaceName', 'routePartitionName',
+     'voiceMailProfileName', 'shareLineAppearanceCssName', 'userProfile', 'defaultProfile',
+     'dateTimeSettingName', 'callManagerGroupName', 'mediaResourceListName', 'regionName', 'srstName',
+     'securityProfileName', 'timeScheduleIdName', 'sigDigits'])
+
+# fields holding nested elements
+COMPLEX = frozenset(
+    ['lines', 'callForwardAll', 'phoneProfiles', 'primaryExtension', 'associatedGroups', 'localRouteGroup',
+     'relatedRegions', 'members', 'destination'])
+
+# values of the generated objects, the key and description are made up from the object number
+DEFAULTS = {
+    'product': 'Cisco 7841',
+    'class': 'Phone',
+    'protocol': 'SIP',
+    'protocolSide': 'User',
+    'devicePoolName': 'Default',
+    'locationName': 'Hub_None',
+    'phoneTemplateName': 'Standard 7841 SIP',
+    'callingSearchSpaceName': 'Internal_CSS',
+    'routePartitionName': 'Internal_PT',
+    'alertingName': 'Alerting',
+    'asciiAlertingName': 'Alerting',
+    'dateTimeSettingName': 'CMLocal',
+    'callManagerGroupName': 'Default',
+    'regionName': 'Default',
+    'srstName': 'Disable',
+    'withinAudioBandwidth': '0',
+    'withinVideoBandwidth': '384',
+    'withinImmersiveKbits': '384',
+    'port': '2000',
+    'ipAddress': '10.0.0.1',
+    'SipPort': '5060',
+    'securityProfileName': 'Non Secure Conference Bridge',
+    'sigDigits': '99',
+    'distributionAlgorithm': 'Circular',
+    'routeListEnabled': 'true',
+    'blockEnable': 'false',
+    'multicast': 'false',
+}
+
+KEY_FORMATS = {
+    'phone': 'SEP{0:012X}',
+    'deviceProfile': 'UDP{0:012X}',
+    'line': '{0}',
+    'user': 'user{0:06d}',
+    'routePattern': '9.{0}X',
+}
+
+# table: (object tag, (column, field)), field _uuid is the pkid
+SQL_TABLES = {
+    'device': ('phone', (('pkid', '_uuid'), ('name', 'name'), ('description', 'description'))),
+    'numplan': ('line', (('pkid', '_uuid'), ('dnorpattern', 'pattern'), ('description', 'description'))),
+    'enduser': ('user', (('pkid', '_uuid'), ('userid', 'userid'), ('firstname', 'firstName'),
+                         ('lastname', 'lastName'))),
+    'devicepool': ('devicePool', (('pkid', '_uuid'), ('name', 'name'))),
+    'region': ('region', (('pkid', '_uuid'), ('name', 'name'))),
+    'location': ('location', (('pkid', '_uuid'), ('name', 'name'))),
+    'routepartition': ('routePartition', (('pkid', '_uuid'), ('name', 'name'), ('description', 'description'))),
+    'callingsearchspace': ('css', (('pkid', '_uuid'), ('name', 'name'), ('description', 'description'))),
+}
+
+_SELECT = re.compile(
+    r"\s*select\s+(?:skip\s+(?P<skip>\d+)\s+)?(?:first\s+(?P<first>\d+)\s+)?(?P<columns>.+?)\s+"
+    r"from\s+(?:\((?P<query>.*)\)\s*\w*|(?P<table>\w+))"
+    r"(?:\s+where\s+(?:\w+\.)?(?P<column>\w+)\s*(?P<op>=|>|<|like)\s*'(?P<value>(?:[^']|'')*)')?"
+    r"(?:\s+order\s+by\s+(?:\w+\.)?(?P<order>\w+))?\s*$", re.I | re.S)
+
+ENVELOPE = """<?xml version="1.0" encoding="UTF-8"?>
+<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/">
+<soapenv:Body><ns:{0}Response xmlns:ns="http://www.cisco.com/AXL/API/{1}">
+<return>{2}</return>
+</ns:{0}Response></soapenv:Body></soapenv:Envelope>"""
+
+FAULT = """<?xml version="1.0" encoding="UTF-8"?>
+<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/"><soapenv:Body><soapenv:Fault>
+<faultcode>soapenv:Server</faultcode>
+<faultstring>{0}</faultstring>
+</soapenv:Fault></soapenv:Body></soapenv:Envelope>"""
+
+THROTTLE_FAULT = 'Maximum AXL Memory Allocation Consumed'
+
+
+class MockFault(Exception):
+    """
+    SOAP fault returned by the mock server
+    """
+
+
+def operation_names(tag):
+    """
+    AXL operation names for an object
+    :param tag: object tag eg devicePool
+    :return: dictionary of verb to operation name eg {'get': 'getDevicePool', ...}
+    """
+    name = tag[0].upper() + tag[1:]
+    return dict((verb, verb + name) for verb in ('add', 'get', 'update', 'remove', 'list'))
+
+
+def key_fields(tag):
+    """
+    Fields that identify an object in get, update and remove requests
+    :param tag: object tag
+    :return: tuple of field names
+    """
+    key = KINDS[tag][1]
+    if key == 'pattern':
+        return key, 'routePartitionName', 'uuid'
+    return key, 'uuid'
+
+
+def wsdl(version='10.5'):
+    """
+    Generate a WSDL for the operations the mock serves.
+    Requests are loosely typed so any AXL arguments are accepted, responses are typed like the AXL schema.
+    :param version: AXL version
+    :return: WSDL document
+    """
+    def element(name, type, optional=True, many=False):
+        return '<xsd:element name="{0}" type="{1}"{2}{3}/>'.format(
+            name, type, ' minOccurs="0"' if optional else '', ' maxOccurs="unbounded"' if many else '')
+
+    def request(name, *elements):
+        return '<xsd:element name="{0}"><xsd:complexType><xsd:sequence>{1}</xsd:sequence></xsd:complexType>' \
+               '</xsd:element>'.format(name, ''.join(elements))
+
+    def response(name, *elements):
+        return '<xsd:element name="{0}Response"><xsd:complexType><xsd:complexContent>' \
+               '<xsd:extension base="axl:APIResponse"><xsd:sequence><xsd:element name="return">' \
+               '<xsd:complexType><xsd:sequence>{1}</xsd:sequence></xsd:complexType></xsd:element>' \
+               '</xsd:sequence></xsd:extension></xsd:complexContent></xsd:complexType></xsd:element>'.format(
+                   name, ''.join(elements))
+
+    def field_type(field):
+        if field in FOREIGN_KEYS:
+            return 'axl:XFkType'
+        elif field in COMPLEX:
+            return 'xsd:anyType'
+        return 'xsd:string'
+
+    types = [
+        '<xsd:complexType name="APIResponse"><xsd:attribute name="sequence" type="xsd:unsignedLong"/>'
+        '</xsd:complexType>',
+        '<xsd:complexType name="StandardResponse"><xsd:complexContent><xsd:extension base="axl:APIResponse">'
+        '<xsd:sequence><xsd:element name="return" type="xsd:string"/></xsd:sequence></xsd:extension>'
+        '</xsd:complexContent></xsd:complexType>',
+        '<xsd:complexType name="XFkType"><xsd:simpleContent><xsd:extension base="xsd:string">'
+        '<xsd:attribute name="uuid" type="xsd:string"/></xsd:extension></xsd:simpleContent></xsd:complexType>',
+        request('executeSQLQuery', element('sql', 'xsd:string', optional=False)),
+        response('executeSQLQuery', element('row', 'xsd:anyType', many=True)),
+    ]
+    operations = ['executeSQLQuery']
+
+    for tag, (label, key, fields) in KINDS.items():
+        names = operation_names(tag)
+        res = 'R' + names['get'][len('get'):]
+        keys = [element(i, 'xsd:string') for i in key_fields(tag)]
+        types.extend([
+            '<xsd:complexType name="{0}"><xsd:sequence>{1}</xsd:sequence>'
+            '<xsd:attribute name="uuid" type="xsd:string"/></xsd:complexType>'.format(
+                res, ''.join(element(i, field_type(i)) for i in fields)),
+            request(names['add'], element(tag, 'xsd:anyType', optional=False)),
+            request(names['get'], *keys + [element('returnedTags', 'axl:' + res)]),
+            request(names['update'], *keys + [element(i, 'xsd:anyType') for i in fields if i != key]),
+            request(names['remove'], *keys),
+            request(names['list'], element('searchCriteria', 'xsd:anyType', optional=False),
+                    element('returnedTags', 'axl:' + res), element('skip', 'xsd:unsignedLong'),
+                    element('first', 'xsd:unsignedLong')),
+            response(names['get'], element(tag, 'axl:' + res, optional=False)),
+            response(names['list'], element(tag, 'axl:' + res, many=True)),
+        ])
+        for verb in ('add', 'update', 'remove'):
+            types.append('<xsd:element name="{0}Response" type="axl:StandardResponse"/>'.format(names[verb]))
+        operations.extend(names[verb] for verb in ('add', 'get', 'update', 'remove', 'list'))
+
+    messages = ''.join(
+        '<message name="{0}In"><part element="axl:{0}" name="axlParams"/></message>'
+        '<message name="{0}Out"><part element="axl:{0}Response" name="axlParams"/></message>'.format(i)
+        for i in operations)
+    port = ''.join(
+        '<operation name="{0}"><input message="s0:{0}In"/><output message="s0:{0}Out"/></operation>'.format(i)
+        for i in operations)
+    binding = ''.join(
+        '<operation name="{0}"><soap:operation soapAction="CUCM:DB ver={1} {0}"/>'
+        '<input><soap:body use="literal"/></input><output><soap:body use="literal"/></output>'
+        '</operation>'.format(i, version) for i in operations)
+
+    return """<?xml version="1.0" encoding="UTF-8"?>
+<definitions xmlns="http://schemas.xmlsoap.org/wsdl/" xmlns:soap="http://schemas.xmlsoap.org/wsdl/soap/"
+             xmlns:xsd="http://www.w3.org/2001/XMLSchema" xmlns:s0="http://www.cisco.com/AXLAPIService/"
+             xmlns:axl="http://www.cisco.com/AXL/API/{0}" targetNamespace="http://www.cisco.com/AXLAPIService/">
+  <types><xsd:schema targetNamespace="http://www.cisco.com/AXL/API/{0}">{1}</xsd:schema></types>
+  {2}
+  <portType name="AXLPort">{3}</portType>
+  <binding name="AXLAPIBinding" type="s0:AXLPort">
+    <soap:binding style="document" transport="http://schemas.xmlsoap.org/soap/http"/>{4}
+  </binding>
+  <service name="AXLAPIService">
+    <port binding="s0:AXLAPIBinding" name="AXLAPIService"><soap:address location="https://CCMSERVERNAME:8443/axl/"/></port>
+  </service>
+</definitions>
+""".format(version, ''.join(types), messages, port, binding)
+
+
+def _local(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def _like(value):
+    """
+    Compile an AXL search criteria or SQL LIKE value
+    :param value: value with % wildcards
+    :return: compiled case insensitive pattern
+    """
+    return re.compile('^' + '.*'.join(re.escape(i) for i in value.split('%')) + '$', re.I | re.S)
+
+
+class Table(object):
+    """
+    Objects of one type. The generated objects are made up on demand from their number,
+    only added and updated objects are stored.
+    """
+
+    def __init__(self, tag, size, code):
+        """
+        :param tag: object tag eg phone
+        :param size: number of generated objects
+        :param code: number in the uuids of the objects
+        """
+        self.tag = tag
+        self.label, self.key, self.fields = KINDS[tag]
+        self.code = code
+        self.key_format = KEY_FORMATS.get(tag, tag + '{0:06d}')
+        self.size = size
+        # lower case key: object number, or (object number, fields) once stored
+        self.rows = collections.OrderedDict(
+            (self.key_format.format(i).lower(), i) for i in range(size))
+        self.numbers = {}
+
+    def uuid(self, number):
+        return '{{{0:08X}-0000-4000-8000-{1:012X}}}'.format(self.code, number)
+
+    def generate(self, number):
+        """
+        Fields of a generated object
+        :param number: object number
+        :return: dictionary of fields
+        """
+        key = self.key_format.format(number)
+        fields = {self.key: key}
+        for i in self.fields:
+            if i in DEFAULTS:
+                fields[i] = DEFAULTS[i]
+        if 'description' in self.fields:
+            fields['description'] = '{0} {1}'.format(self.label, key)
+        if self.tag == 'user':
+            fields['firstName'] = 'First{0}'.format(number)
+            fields['lastName'] = 'Last{0}'.format(number)
+        return fields
+
+    def find(self, keys):
+        """
+        Find an object
+        :param keys: dictionary of key fields, either the key or uuid
+        :return: tuple of object number and fields
+        """
+        if keys.get(self.key):
+            row = self.rows.get(keys[self.key].lower())
+        else:
+            # uuids end in the object number
+            uuid = (keys.get('uuid') or '').strip('{}').upper()
+            prefix = self.uuid(0)[1:-13]
+            number = int(uuid[len(prefix):], 16) if uuid.startswith(prefix) and len(uuid) == len(prefix) + 12 else -1
+            row = self.rows.get(self.numbers.get(number, self.key_format.format(number)).lower())
+            if row is not None and (row if isinstance(row, int) else row[0]) != number:
+                row = None
+        if row is None:
+            raise MockFault('Item not valid: The specified {0} {1} was not found'.format(
+                self.label, keys.get(self.key) or keys.get('uuid', '')))
+        if isinstance(row, int):
+            return row, self.generate(row)
+        return row
+
+    def add(self, fields):
+        """
+        Add an object
+        :param fields: dictionary of fields, fields the object does not have are ignored
+        :return: uuid of the new object
+        """
+        key = fields.get(self.key, '')
+        if key.lower() in self.rows:
+            raise MockFault('Could not insert new row - duplicate value in a UNIQUE INDEX column (Unique Index:).')
+        number = self.size + len(self.numbers)
+        self.numbers[number] = key
+        self.rows[key.lower()] = (number, dict((i, fields[i]) for i in self.fields if i in fields))
+        return self.uuid(number)
+
+    def update(self, keys, fields):
+        """
+        Update an object
+        :param keys: dictionary of key fields
+        :param fields: dictionary of fields to change
+        :return: uuid of the object
+        """
+        number, stored = self.find(keys)
+        stored = dict(stored)
+        stored.update((i, fields[i]) for i in self.fields if i in fields and i != self.key)
+        self.rows[stored[self.key].lower()] = (number, stored)
+        return self.uuid(number)
+
+    def remove(self, keys):
+        """
+        Remove an object
+        :param keys: dictionary of key fields
+        :return: uuid of the removed object
+        """
+        number, stored = self.find(keys)
+        del self.rows[stored[self.key].lower()]
+        return self.uuid(number)
+
+    def select(self, criteria, skip=0, first=None):
+        """
+        List objects matching search criteria
+        :param criteria: dictionary of field to value with % wildcards
+        :param skip: number of matching objects to skip
+        :param first: maximum number of objects to return
+        :return: list of tuples of object number and fields
+        """
+        criteria = dict((k, _like(v)) for k, v in criteria.items() if v.strip('%') and k in self.fields)
+        rows = (i if isinstance(i, tuple) else (i, None) for i in self.rows.values())
+        if criteria:
+            rows = ((n, f or self.generate(n)) for n, f in rows)
+            rows = ((n, f) for n, f in rows if all(
+                isinstance(f.get(k), str) and v.match(f[k]) for k, v in criteria.items()))
+        page = itertools.islice(rows, skip, None if first is None else skip + first)
+        return [(n, f or self.generate(n)) for n, f in page]
+
+    def __len__(self):
+        return len(self.rows)
+
+
+class MockAXL(object):
+    """
+    Mock AXL server on a local port
+    """
+
+    def __init__(self, size=1000, sizes=None, latency=0.0, jitter=0.0, row_latency=0.0, rate_limit=None,
+                 fault_rate=0.0, padding=0, sql_max_rows=None, version='10.5', host='127.0.0.1', port=0, seed=None):
+        """
+        :param size: number of phones, lines and users, there are size // 100 of every other object
+        :param sizes: dictionary of object tag to number of objects, overrides size eg {'devicePool': 50}
+        :param latency: seconds every call takes
+        :param jitter: up to this many seconds are added at random to every call
+        :param row_latency: seconds added per returned object or row
+        :param rate_limit: requests per second answered, requests over the rate get a 503 like a throttled UCM
+        :param fault_rate: share of requests answered with an AXL memory allocation fault
+        :param padding: characters added to the description of every returned object
+        :param sql_max_rows: SQL queries returning more rows fail with a query request too large fault
+        :param version: AXL version of the generated WSDL and response namespace
+        :param host: address to listen on
+        :param port: port to listen on, a free port by default
+        :param seed: random seed of the jitter and faults
+        """
+        counts = dict((i, size if i in ('phone', 'line', 'user') else max(1, size // 100)) for i in KINDS)
+        counts.update(sizes or {})
+        self.tables = dict((tag, Table(tag, counts[tag], n)) for n, tag in enumerate(KINDS))
+        self.operations = {'executeSQLQuery': ('sql', None)}
+        for tag in KINDS:
+            self.operations.update((name, (verb, tag)) for verb, name in operation_names(tag).items())
+
+        self.latency = latency
+        self.jitter = jitter
+        self.row_latency = row_latency
+        self.rate_limit = rate_limit
+        self.fault_rate = fault_rate
+        self.padding = padding
+        self.sql_max_rows = sql_max_rows
+        self.version = version
+        self.random = random.Random(seed)
+
+        self.requests = collections.Counter()
+        self.throttled = 0
+        self.faults = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._window = collections.deque()
+        self._lock = threading.Lock()
+
+        self._dir = tempfile.mkdtemp(prefix='axl-mock-')
+        with open(os.path.join(self._dir, 'AXLAPI.wsdl'), 'w') as f:
+            f.write(wsdl(version))
+        self.wsdl = 'file://' + os.path.join(self._dir, 'AXLAPI.wsdl')
+
+        self.server = http.server.ThreadingHTTPServer((host, port), _MockHandler)
+        self.server.daemon_threads = True
+        self.server.mock = self
+        self.url = 'http://{0}:{1}/axl/'.format(host, self.server.server_address[1])
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        """
+        Stop the server and remove the generated WSDL
+        """
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self._dir, ignore_errors=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def stats(self):
+        """
+        Server counters
+        :return: dictionary of counters, requests holds the number of requests per operation
+        """
+        with self._lock:
+            return {
+                'requests': dict(self.requests),
+                'throttled': self.throttled,
+                'faults': self.faults,
+                'bytes_in': self.bytes_in,
+                'bytes_out': self.bytes_out,
+                'objects': dict((tag, len(table)) for tag, table in self.tables.items()),
+            }
+
+    def admit(self):
+        """
+        Apply the rate limit and fault injection to a request
+        :return: tuple of status and body to answer with, None to serve the request
+        """
+        with self._lock:
+            if self.rate_limit is not None:
+                now = time.monotonic()
+                while self._window and now - self._window[0] >= 1.0:
+                    self._window.popleft()
+                if len(self._window) >= self.rate_limit:
+                    self.throttled += 1
+                    return 503, b''
+                self._window.append(now)
+            if self.fault_rate and self.random.random() < self.fault_rate:
+                self.faults += 1
+                return 500, FAULT.format(THROTTLE_FAULT).encode('utf-8')
+        return None
+
+    def delay(self, rows=0):
+        """
+        Seconds to wait before answering
+        :param rows: number of returned objects or rows
+        """
+        with self._lock:
+            jitter = self.random.uniform(0, self.jitter) if self.jitter else 0.0
+        return self.latency + jitter + self.row_latency * rows
+
+    def handle(self, operation, body):
+        """
+        Serve a SOAP request
+        :param operation: AXL operation name
+        :param body: request envelope
+        :return: tuple of status, response envelope and number of returned objects or rows
+        """
+        with self._lock:
+            self.requests[operation] += 1
+        try:
+            if operation not in self.operations:
+                raise MockFault('Operation {0} is not supported by the mock server'.format(operation))
+            verb, tag = self.operations[operation]
+            request = next(iter(next(i for i in ElementTree.fromstring(body) if _local(i.tag) == 'Body')))
+            with self._lock:
+                content, rows = getattr(self, '_' + verb)(request, tag)
+        except MockFault as e:
+            return 500, FAULT.format(escape(str(e))).encode('utf-8'), 0
+        except (ElementTree.ParseError, StopIteration):
+            return 500, FAULT.format('Unable to parse the request').encode('utf-8'), 0
+        return 200, ENVELOPE.format(operation, self.version, content).encode('utf-8'), rows
+
+    @staticmethod
+    def _children(element):
+        return dict((_local(i.tag), i if len(i) else (i.text or '')) for i in element)
+
+    def _returned_tags(self, args):
+        # no returnedTags returns every field
+        returned = args.get('returnedTags')
+        return set(self._children(returned)) if not isinstance(returned, (str, type(None))) else None
+
+    def _render(self, table, number, fields, tags=None):
+        """
+        Render an object like AXL does
+        :param tags: fields to return, every field by default
+        """
+        parts = ['<{0} uuid="{1}">'.format(table.tag, table.uuid(number))]
+        for i in table.fields:
+            if tags and i not in tags or i not in fields:
+                continue
+            value = fields[i]
+            if not isinstance(value, str):
+                parts.append(''.join(ElementTree.tostring(j, encoding='unicode') for j in value).join(
+                    ('<{0}>'.format(i), '</{0}>'.format(i))))
+            elif i in FOREIGN_KEYS and not value:
+                parts.append('<{0} uuid=""/>'.format(i))
+            elif i in FOREIGN_KEYS:
+                parts.append('<{0} uuid="{{{1:08X}-0000-4000-8000-{2:012X}}}">{3}</{0}>'.format(
+                    i, zlib.crc32(i.encode()), zlib.crc32(value.encode()), escape(value)))
+            else:
+                if i == 'description' and self.padding:
+                    value += ' ' * self.padding
+                parts.append('<{0}>{1}</{0}>'.format(i, escape(value)))
+        parts.append('</{0}>'.format(table.tag))
+        return ''.join(parts)
+
+    def _add(self, request, tag):
+        obj = next(iter(request), None)
+        if obj is None:
+            raise MockFault('Missing {0} in the request'.format(tag))
+        return self.tables[tag].add(self._children(obj)), 0
+
+    def _get(self, request, tag):
+        table = self.tables[tag]
+        args = self._children(request)
+        number, fields = table.find(args)
+        return self._render(table, number, fields, self._returned_tags(args)), 1
+
+    def _update(self, request, tag):
+        args = self._children(request)
+        keys = dict((i, args.pop(i)) for i in key_fields(tag) if i in args)
+        if tag == 'region' and not isinstance(args.get('relatedRegions'), (str, type(None))):
+            self._relate(keys, args.pop('relatedRegions'))
+        return self.tables[tag].update(keys, args), 0
+
+    def _relate(self, keys, related):
+        """
+        Set region relationships like UCM does, only the relationships sent change and a relationship
+        is shared by both regions
+        :param keys: key fields of the region updated
+        :param related: relatedRegions element of the request
+        """
+        table = self.tables['region']
+        name = table.find(keys)[1]['name']
+        pairs = []
+        for relationship in related:
+            other = next((i.text or '' for i in relationship if _local(i.tag) == 'regionName'), '')
+            table.find({'name': other})
+            pairs.append((name, other, relationship))
+            if other.lower() != name.lower():
+                mirror = ElementTree.Element(relationship.tag)
+                for i in relationship:
+                    ElementTree.SubElement(mirror, i.tag).text = name if _local(i.tag) == 'regionName' else i.text
+                pairs.append((other, name, mirror))
+
+        for region, other, relationship in pairs:
+            fields = table.find({'name': region})[1]
+            current = fields.get('relatedRegions')
+            stored = ElementTree.Element('relatedRegions')
+            for i in current if not isinstance(current, (str, type(None))) else ():
+                if next((j.text or '' for j in i if _local(j.tag) == 'regionName'), '').lower() != other.lower():
+                    stored.append(i)
+            stored.append(relationship)
+            table.update({'name': region}, {'relatedRegions': stored})
+
+    def _remove(self, request, tag):
+        return self.tables[tag].remove(self._children(request)), 0
+
+    def _list(self, request, tag):
+        table = self.tables[tag]
+        args = self._children(request)
+        criteria = args.get('searchCriteria')
+        criteria = self._children(criteria) if not isinstance(criteria, (str, type(None))) else {}
+        tags = self._returned_tags(args)
+        skip = int(args.get('skip') or 0)
+        first = int(args['first']) if args.get('first') else None
+        rows = table.select(criteria, skip, first)
+        return ''.join(self._render(table, n, f, tags) for n, f in rows), len(rows)
+
+    def _sql(self, request, tag):
+        sql = ''.join(request.itertext())
+        rows = self._select(sql)
+        if self.sql_max_rows is not None and len(rows) > self.sql_max_rows:
+            raise MockFault('Query request too large. Total rows matched: {0} rows. '
+                            'Suggestive Row Fetch: less than {1} rows'.format(len(rows), self.sql_max_rows))
+        content = ''.join(
+            '<row>{0}</row>'.format(''.join('<{0}>{1}</{0}>'.format(k, escape(v)) for k, v in row.items()))
+            for row in rows)
+        return content, len(rows)
+
+    def _select(self, sql):
+        """
+        Run a query over the tables, supports SKIP and FIRST, sub queries,
+        a single WHERE condition and ORDER BY
+        :param sql: query
+        :return: list of rows
+        """
+        match = _SELECT.match(sql)
+        if match is None:
+            raise MockFault('A syntax error has occurred.')
+
+        if match.group('query') is not None:
+            rows = self._select(match.group('query'))
+        elif match.group('table').lower() in SQL_TABLES:
+            tag, columns = SQL_TABLES[match.group('table').lower()]
+            table = self.tables[tag]
+            rows = [collections.OrderedDict(
+                (column, table.uuid(n)[1:-1].lower() if field == '_uuid' else f.get(field, ''))
+                for column, field in columns) for n, f in table.select({})]
+        else:
+            raise MockFault('The specified table ({0}) is not in the database.'.format(match.group('table')))
+
+        if match.group('column') is not None:
+            column, op, value = match.group('column').lower(), match.group('op').lower(), \
+                match.group('value').replace("''", "'")
+            if rows and column not in rows[0]:
+                raise MockFault('Column ({0}) not found in any table in the query (or SLV is undefined).'.format(
+                    column))
+            if op == 'like':
+                pattern = _like(value)
+                rows = [i for i in rows if pattern.match(i[column])]
+            elif op == '=':
+                rows = [i for i in rows if i[column] == value]
+            elif op == '>':
+                rows = [i for i in rows if i[column] > value]
+            else:
+                rows = [i for i in rows if i[column] < value]
+        if match.group('order') is not None:
+            rows.sort(key=lambda i: i.get(match.group('order').lower(), ''))
+
+        skip = int(match.group('skip') or 0)
+        first = int(match.group('first')) if match.group('first') else None
+        rows = rows[skip:None if first is None else skip + first]
+
+        columns = [i.strip().split('.')[-1].lower() for i in match.group('columns').split(',')]
+        if columns != ['*']:
+            missing = [i for i in columns if rows and i not in rows[0]]
+            if missing:
+                raise MockFault('Column ({0}) not found in any table in the query (or SLV is undefined).'.format(
+                    missing[0]))
+            rows = [collections.OrderedDict((c, i[c]) for c in columns) for i in rows]
+        return rows
+
+
+class _MockHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Hands SOAP requests to the mock and answers after the configured latency
+    """
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        mock = self.server.mock
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        operation = self.headers.get('SOAPAction', '').strip('"').split(' ')[-1]
+
+        refused = mock.admit()
+        if refused is not None:
+            status, data = refused
+            rows = 0
+        else:
+            status, data, rows = mock.handle(operation, body)
+
+        delay = mock.delay(rows)
+        if delay > 0:
+            time.sleep(delay)
+
+        with mock._lock:
+            mock.bytes_in += len(body)
+            mock.bytes_out += len(data)
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/xml; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m axl.mock', description='Mock AXL server')
+    parser.add_argument('--size', type=int, default=1000, help='number of phones, lines and users')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds every call takes')
+    parser.add_argument('--jitter', type=float, default=0.0, help='random seconds added to every call')
+    parser.add_argument('--row-latency', type=float, default=0.0, help='seconds added per returned row')
+    parser.add_argument('--rate-limit', type=float, default=None, help='requests per second before throttling')
+    parser.add_argument('--fault-rate', type=float, default=0.0, help='share of requests answered with a fault')
+    parser.add_argument('--padding', type=int, default=0, help='characters added to every description')
+    parser.add_argument('--sql-max-rows', type=int, default=None, help='rows a SQL query may return')
+    parser.add_argument('--version', default='10.5', help='AXL version')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    mock = MockAXL(size=args.size, latency=args.latency, jitter=args.jitter, row_latency=args.row_latency,
+                   rate_limit=args.rate_limit, fault_rate=args.fault_rate, padding=args.padding,
+                   sql_max_rows=args.sql_max_rows, version=args.version, host=args.host, port=args.port)
+    print('url: {0}\nwsdl: {1}'.format(mock.url, mock.wsdl))
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        mock.close()
+
+
+if __name__ == '__main__':
+    main()
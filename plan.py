@@ -0,0 +1,267 @@
+"""
+Declarative desired state for UCM objects.
+A desired state document lists objects by kind with the arguments of their add_<kind> method:
+
+    {'location': [{'location': 'SITE1_LOC', 'within_audio_bw': 512}],
+     'region': [{'region': 'SITE1_REG'}],
+     'device_pool': [{'device_pool': 'SITE1_DP', 'region': 'SITE1_REG', 'location': 'SITE1_LOC'}],
+     'partition': [{'partition': 'OLD_PT', 'absent': True}]}
+
+plan reads the current objects of every kind in the document with one list call and works out the
+smallest set of adds, updates and deletes that bring UCM to the desired state. Only the arguments given
+are compared, list arguments like members are sent with adds but not compared. An object with absent set
+is deleted when it exists. Applying the plan of a converged site sends no writes.
+"""
+
+import collections
+import time
+
+from .schedule import Task
+from .schedule import schedule
+
+
+class Kind(object):
+    """
+    How a kind of object is read, compared and changed
+    """
+
+    def __init__(self, key, field, fields):
+        """
+        :param key: argument of the add, update and delete methods holding the name eg device_pool
+        :param field: AXL field of the name eg name
+        :param fields: dictionary of add and update method argument to the AXL field it sets, the compared arguments
+        """
+        self.key = key
+        self.field = field
+        self.fields = fields
+
+
+# kinds in the order they are added, they are deleted in reverse order
+KINDS = collections.OrderedDict([
+    ('location', Kind('location', 'name', {
+        'within_audio_bw': 'withinAudioBandwidth',
+        'within_video_bw': 'withinVideoBandwidth',
+        'within_immersive_kbits': 'withinImmersiveKbits',
+    })),
+    ('region', Kind('region', 'name', {})),
+    ('srst', Kind('srst', 'name', {
+        'ip_address': 'ipAddress',
+        'port': 'port',
+        'sip_port': 'SipPort',
+    })),
+    ('partition', Kind('partition', 'name', {
+        'description': 'description',
+        'time_schedule_name': 'timeScheduleIdName',
+    })),
+    ('calling_search_space', Kind('calling_search_space', 'name', {
+        'description': 'description',
+    })),
+    ('device_pool', Kind('device_pool', 'name', {
+        'date_time_group': 'dateTimeSettingName',
+        'region': 'regionName',
+        'location': 'locationName',
+        'media_resource_group_list': 'mediaResourceListName',
+        'srst': 'srstName',
+        'cm_group': 'callManagerGroupName',
+    })),
+    ('user', Kind('user_id', 'userid', {
+        'first_name': 'firstName',
+        'last_name': 'lastName',
+    })),
+])
+
+# list method of every kind
+LISTS = {
+    'location': 'get_locations',
+    'region': 'get_regions',
+    'srst': 'get_srsts',
+    'partition': 'get_partitions',
+    'calling_search_space': 'get_calling_search_spaces',
+    'device_pool': 'get_device_pools',
+    'user': 'get_users',
+}
+
+SYMBOLS = {'add': '+', 'update': '~', 'delete': '-'}
+
+
+def _text(value):
+    """
+    Comparable text of a field, references are compared by name
+    """
+    if isinstance(value, dict):
+        value = value.get('value')
+    elif hasattr(value, 'value'):
+        value = value.value
+    return '' if value is None else str(value)
+
+
+class Change(object):
+    """
+    One add, update or delete
+    """
+
+    def __init__(self, action, kind, name, arguments, diff=None):
+        """
+        :param action: add, update or delete
+        :param kind: object kind eg device_pool
+        :param name: object name
+        :param arguments: method arguments for an add or delete, AXL fields to set for an update
+        :param diff: dictionary of AXL field to a tuple of current and desired value, for an update
+        """
+        self.action = action
+        self.kind = kind
+        self.name = name
+        self.arguments = arguments
+        self.diff = diff or {}
+
+    def method_arguments(self):
+        """
+        Arguments of the add_, update_ or delete_<kind> method, an update sets only the fields that differ
+        :return: dictionary of argument to value
+        """
+        if self.action != 'update':
+            return self.arguments
+        spec = KINDS[self.kind]
+        arguments = dict((a, self.arguments[f]) for a, f in spec.fields.items() if f in self.arguments)
+        arguments[spec.key] = self.name
+        return arguments
+
+    def apply(self, axl):
+        """
+        Make the change
+        :param axl: AXL instance
+        :return: result dictionary
+        """
+        return getattr(axl, '{0}_{1}'.format(self.action, self.kind))(**self.method_arguments())
+
+    def task(self):
+        """
+        The change as a scheduler task, the references of an update are read from the fields it sets
+        :return: Task
+        """
+        return Task('{0}_{1}'.format(self.action, self.kind), self.method_arguments(), self.apply)
+
+    def __str__(self):
+        text = '{0} {1} {2}'.format(SYMBOLS[self.action], self.kind, self.name)
+        if self.diff:
+            text += ' ' + ', '.join('{0}: {1!r} -> {2!r}'.format(k, *v) for k, v in sorted(self.diff.items()))
+        return text
+
+    def __repr__(self):
+        return '<Change {0}>'.format(self)
+
+
+class Plan(object):
+    """
+    Changes that bring UCM to a desired state, in the order they are applied
+    """
+
+    def __init__(self, changes, unchanged=0):
+        """
+        :param changes: list of Change
+        :param unchanged: number of objects already in the desired state
+        """
+        self.changes = changes
+        self.unchanged = unchanged
+
+    def summary(self):
+        """
+        :return: dictionary of the number of adds, updates, deletes and unchanged objects
+        """
+        counts = collections.Counter(i.action for i in self.changes)
+        return {'add': counts['add'], 'update': counts['update'], 'delete': counts['delete'],
+                'unchanged': self.unchanged}
+
+    def apply(self, axl, workers=1):
+        """
+        Make the changes, one after the other or with workers threads. The adds and updates are then
+        scheduled in dependency order and the deletes follow one after the other.
+        :param axl: AXL instance
+        :param workers: number of worker threads
+        :return: result dictionary, the response is the list of result dictionaries in plan order
+        """
+        start = time.perf_counter()
+        if workers > 1:
+            writes = [i for i in self.changes if i.action != 'delete']
+            deletes = [i for i in self.changes if i.action == 'delete']
+            written = iter(schedule(axl, [i.task() for i in writes], workers=workers)['response'])
+            deleted = iter([i.apply(axl) for i in deletes])
+            responses = [next(deleted if i.action == 'delete' else written) for i in self.changes]
+        else:
+            responses = [i.apply(axl) for i in self.changes]
+        seconds = time.perf_counter() - start
+
+        failed = len([i for i in responses if not i['success']])
+
+        result = {
+            'success': failed == 0,
+            'response': responses,
+            'error': '',
+            'seconds': seconds,
+        }
+
+        if failed:
+            result['error'] = '{0} of {1} changes failed'.format(failed, len(responses))
+        return result
+
+    def __len__(self):
+        return len(self.changes)
+
+    def __str__(self):
+        return '\n'.join(str(i) for i in self.changes)
+
+
+def current(axl, kind, fields):
+    """
+    Current objects of a kind
+    :param axl: AXL instance
+    :param kind: object kind
+    :param fields: AXL fields to read besides the name
+    :return: dictionary of name to dictionary of AXL field to text
+    """
+    spec = KINDS[kind]
+    tags = [spec.field] + sorted(fields)
+    objects = getattr(axl, LISTS[kind])(returned_tags=tags, raw=True)
+    return dict((_text(i[spec.field]), dict((f, _text(i.get(f))) for f in fields)) for i in objects)
+
+
+def plan(axl, desired):
+    """
+    Work out the changes that bring UCM to a desired state
+    :param axl: AXL instance
+    :param desired: desired state document, dictionary of kind to a list of add method arguments,
+        an object with absent set to True is deleted
+    :return: Plan
+    """
+    unknown = [i for i in desired if i not in KINDS]
+    if unknown:
+        raise ValueError('Unknown object kinds: {0}'.format(', '.join(sorted(unknown))))
+
+    changes, deletes = [], []
+    unchanged = 0
+    for kind, spec in KINDS.items():
+        if not desired.get(kind):
+            continue
+        compared = set(spec.fields[a] for i in desired[kind] for a in i if a in spec.fields)
+        existing = current(axl, kind, compared)
+
+        for item in desired[kind]:
+            arguments = dict((k, v) for k, v in item.items() if k != 'absent')
+            name = str(arguments[spec.key])
+            if item.get('absent'):
+                if name in existing:
+                    deletes.append(Change('delete', kind, name, {spec.key: name}))
+                else:
+                    unchanged += 1
+            elif name not in existing:
+                changes.append(Change('add', kind, name, arguments))
+            else:
+                diff = dict((spec.fields[a], (existing[name][spec.fields[a]], _text(v)))
+                            for a, v in arguments.items()
+                            if a in spec.fields and existing[name][spec.fields[a]] != _text(v))
+                if diff:
+                    changes.append(Change('update', kind, name, dict((k, v[1]) for k, v in diff.items()), diff))
+                else:
+                    unchanged += 1
+
+    return Plan(changes + deletes[::-1], unchanged)
@@ -0,0 +1,64 @@
+"""
+returnedTags projections.
+AXL get and list operations return only the fields named in returnedTags, a projection is given
+as a list of dotted field paths eg ['name', 'lines.line.dirn.pattern'] and checked against the schema.
+"""
+
+
+def returned_tags(paths):
+    """
+    Build the returnedTags argument of a list of field paths
+    :param paths: dotted field paths eg ['name', 'lines.line.dirn.pattern']
+    :return: nested dictionary eg {'name': '', 'lines': {'line': {'dirn': {'pattern': ''}}}}
+    """
+    tags = {}
+    for path in paths:
+        node = tags
+        parts = path.split('.')
+        for part in parts[:-1]:
+            if not isinstance(node.get(part), dict):
+                node[part] = {}
+            node = node[part]
+        if parts[-1] not in node:
+            node[parts[-1]] = ''
+    return tags
+
+
+def validate(method, paths):
+    """
+    Check field paths against the returnedTags type of an operation
+    :param method: suds method of the operation
+    :param paths: dotted field paths
+    :raise ValueError: when the operation has no returnedTags or a path names an unknown field
+    """
+    params = dict((i[0], i[1]) for i in method.binding.input.param_defs(method))
+    if 'returnedTags' not in params:
+        raise ValueError('{0} does not take returnedTags'.format(method.name))
+    root = params['returnedTags'].resolve()
+
+    for path in paths:
+        node = root
+        for part in path.split('.'):
+            # anything goes below an untyped element
+            if node.any():
+                break
+            child = node.get_child(part)[0]
+            if child is None:
+                if part.lstrip('_') == 'uuid' and node.get_attribute('uuid')[0] is not None:
+                    break
+                raise ValueError('{0} is not a field of {1} returnedTags'.format(path, method.name))
+            node = child.resolve()
+
+
+def projection(wsdl, operation, paths):
+    """
+    Validated returnedTags of an operation
+    :param wsdl: suds wsdl of the client
+    :param operation: AXL operation name eg getPhone
+    :param paths: dotted field paths
+    :return: returnedTags dictionary
+    """
+    if isinstance(paths, str):
+        paths = [paths]
+    validate(wsdl.services[0].ports[0].methods[operation], paths)
+    return returned_tags(paths)
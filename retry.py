@@ -0,0 +1,119 @@
+"""
+Retrying AXL requests that failed for a transient reason, a dropped connection or a gateway error.
+Reads are retried freely. Adds are retried too, UCM rejects a second add of the same object with a
+duplicate value fault so it can not provision twice. When that fault answers a retry of an add whose
+earlier attempt may have been applied, the add is reported as successful and marked applied_on_retry:
+the fault can not tell an add applied by the earlier attempt from an object that existed before.
+Other writes are not retried, they are not known to be safe to apply twice.
+"""
+
+import contextlib
+import contextvars
+import http.client
+import random
+
+from .throttle import is_read
+
+# Responses that mean the request did not reach or was not answered by UCM
+TRANSIENT_STATUS = (502, 503, 504)
+
+# Errors of a request that failed on the way to or from UCM
+TRANSIENT_ERRORS = (OSError, EOFError, http.client.HTTPException)
+
+_record = contextvars.ContextVar('axl_retry_record', default=None)
+
+
+class Record(object):
+    """
+    Attempts made by one AXL method call
+    """
+
+    def __init__(self):
+        self.attempts = 0
+        self.applied = False
+
+
+@contextlib.contextmanager
+def recording():
+    """
+    Record the attempts of the requests made in the block, nested blocks add to the outer record
+    :return: the record, None in a nested block
+    """
+    if _record.get() is not None:
+        yield None
+        return
+    record = Record()
+    token = _record.set(record)
+    try:
+        yield record
+    finally:
+        _record.reset(token)
+
+
+def current():
+    """
+    The record of the running AXL method call
+    :return: Record, None outside a method call
+    """
+    return _record.get()
+
+
+def annotate(result, record):
+    """
+    Add the attempts to a result dictionary, an add whose earlier attempt was applied is successful
+    and marked applied_on_retry, the object may also have existed before the add
+    :param result: value returned by an AXL method
+    :param record: Record of the call, None for a nested call
+    :return: result
+    """
+    if record is None or not isinstance(result, dict) or 'success' not in result:
+        return result
+    if record.applied and not result['success']:
+        result['success'] = True
+        result['error'] = ''
+        result['applied_on_retry'] = True
+    result['attempts'] = record.attempts
+    return result
+
+
+def is_duplicate(operation, status, data):
+    """
+    Whether a response is UCM rejecting an add because the object exists
+    :param operation: AXL operation name
+    :param status: HTTP status
+    :param data: response body
+    :return: bool
+    """
+    return operation.startswith('add') and status == 500 and b'duplicate value' in data
+
+
+class RetryPolicy(object):
+    """
+    Exponential backoff with full jitter, the n-th retry waits a random time up to backoff * 2 ** n seconds
+    """
+
+    def __init__(self, attempts=4, backoff=0.5, max_backoff=15.0):
+        """
+        :param attempts: maximum number of attempts of a request
+        :param backoff: seconds to wait at most before the first retry
+        :param max_backoff: seconds to wait at most before any retry
+        """
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def retryable(self, operation):
+        """
+        Whether an operation may be sent again
+        :param operation: AXL operation name eg getPhone
+        :return: bool
+        """
+        return is_read(operation) or operation.startswith('add')
+
+    def delay(self, attempt):
+        """
+        Seconds to wait before an attempt
+        :param attempt: number of the attempt, 1 for the first retry
+        :return: seconds
+        """
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1)))
@@ -0,0 +1,295 @@
+"""
+Dependency aware scheduling of provisioning calls.
+The names an add, update or delete call refers to, a device pool, calling search space, partition,
+route group, the members of a list or the lines of a phone, are matched with the objects the other
+calls add. A call runs once every call adding an object it refers to has succeeded, so independent
+calls run concurrently on a bounded pool of worker threads in waves: locations and regions, then
+device pools, and so on. When a call fails every call that depends on it is skipped.
+References to objects that are not added by the calls are assumed to exist.
+"""
+
+import concurrent.futures
+import inspect
+import threading
+import time
+
+from .foley import AXL
+
+# arguments naming another object: kind of the object
+REFERENCES = {
+    'region': 'region',
+    'moh_region': 'region',
+    'location': 'location',
+    'srst': 'srst',
+    'route_group': 'route_group',
+    'route_list': 'route_list',
+    'media_resource_group_list': 'media_resource_group_list',
+    'device_pool': 'device_pool',
+    'partition': 'partition',
+    'route_partition_name': 'partition',
+    'css': 'calling_search_space',
+    'aar_css': 'calling_search_space',
+    'subscribe_css': 'calling_search_space',
+    'shared_line_css': 'calling_search_space',
+    'call_forward_css': 'calling_search_space',
+    'clng_party_nat_trans_css': 'calling_search_space',
+    'clng_party_inat_trans_css': 'calling_search_space',
+    'clng_party_unknown_trans_css': 'calling_search_space',
+    'clng_party_sub_trans_css': 'calling_search_space',
+    'gateway': 'device',
+    'device_profile': 'device',
+    'default_profile': 'device',
+}
+
+# kind of the members of an add method with a members list
+MEMBERS = {
+    'calling_search_space': 'partition',
+    'route_group': 'device',
+    'route_list': 'route_group',
+    'media_resource_group': 'device',
+    'media_resource_group_list': 'media_resource_group',
+}
+
+# kinds that are devices, their names are unique across every kind of device
+DEVICES = frozenset(['phone', 'h323_gateway', 'conference_bridge', 'transcoder', 'cti_route_point',
+                     'device_profile'])
+
+# object kinds with an add_<kind> method, longest first
+KINDS = sorted((i[len('add_'):] for i, m in inspect.getmembers(AXL, inspect.isfunction) if i.startswith('add_')),
+               key=len, reverse=True)
+
+
+def _kind(method):
+    """
+    :param method: method name eg update_device_pool_rg_mrgl
+    :return: object kind the method changes eg device_pool, None for other methods
+    """
+    verb, _, rest = method.partition('_')
+    if verb not in ('add', 'update', 'delete'):
+        return None
+    return next((i for i in KINDS if rest == i or rest.startswith(i + '_')), None)
+
+
+def _parameter(method, kind):
+    """
+    :return: the argument of a method naming the object it changes eg user_id
+    """
+    function = getattr(AXL, method, None) or getattr(AXL, 'add_' + kind)
+    return list(inspect.signature(function).parameters)[1]
+
+
+def _key(kind, name):
+    return 'device' if kind in DEVICES else kind, name
+
+
+class Task(object):
+    """
+    One call
+    """
+
+    def __init__(self, method, kwargs, call=None):
+        """
+        :param method: name of the AXL method eg add_device_pool
+        :param kwargs: method keyword arguments, the references are read from them
+        :param call: function of the AXL instance making the call, the method is called by default
+        """
+        self.method = method
+        self.kwargs = kwargs
+        self.call = call or (lambda axl: getattr(axl, method)(**kwargs))
+
+    @property
+    def name(self):
+        """
+        Name of the object the call changes, the pattern and partition for a directory number,
+        a list of names for a method changing many objects eg update_region_matrix
+        """
+        kind = _kind(self.method)
+        if kind is None:
+            return None
+        if kind == 'directory_number':
+            return self.kwargs.get(_parameter(self.method, kind)), self.kwargs.get('route_partition_name', '')
+        return self.kwargs.get(_parameter(self.method, kind))
+
+    def adds(self):
+        """
+        :return: key of the object the call adds, None when it adds nothing
+        """
+        if not self.method.startswith('add_') or _kind(self.method) is None:
+            return None
+        return _key(_kind(self.method), self.name)
+
+    def references(self):
+        """
+        :return: set of keys of the objects the call refers to
+        """
+        kind = _kind(self.method)
+        keys = set()
+        if kind is not None and not self.method.startswith('add_'):
+            if isinstance(self.name, list):
+                keys.update(_key(kind, i) for i in self.name)
+            else:
+                keys.add(_key(kind, self.name))
+        own = _parameter(self.method, kind) if kind is not None else None
+        for argument, value in self.kwargs.items():
+            if argument == own or not value:
+                continue
+            if argument in REFERENCES and isinstance(value, str):
+                keys.add(_key(REFERENCES[argument], value))
+            elif argument == 'members' and kind in MEMBERS:
+                keys.update(_key(MEMBERS[kind], i) for i in value)
+            elif argument == 'lines':
+                for line in value:
+                    keys.add(('directory_number', (line[0], line[1])))
+                    if line[1]:
+                        keys.add(('partition', line[1]))
+        return keys
+
+    def __str__(self):
+        name = self.name
+        if isinstance(name, tuple):
+            name = '/'.join(name)
+        elif isinstance(name, list):
+            name = ','.join(name)
+        return '{0} {1}'.format(self.method, name)
+
+
+def _task(item):
+    return item if isinstance(item, Task) else Task(*item)
+
+
+def dependencies(tasks):
+    """
+    Calls each call depends on
+    :param tasks: list of Task
+    :return: list of sets of task indexes, one per task
+    """
+    adders = {}
+    for n, task in enumerate(tasks):
+        if task.adds() is not None:
+            adders.setdefault(task.adds(), n)
+    return [set(adders[i] for i in task.references() if i in adders and adders[i] != n)
+            for n, task in enumerate(tasks)]
+
+
+def waves(tasks):
+    """
+    Group the calls into waves, every call depends only on calls of earlier waves
+    :param tasks: list of Task or tuples of method name and keyword arguments
+    :return: list of lists of Task
+    """
+    tasks = [_task(i) for i in tasks]
+    depends = dependencies(tasks)
+    level = {}
+
+    def visit(n, path):
+        if n in path:
+            raise ValueError('Dependency cycle: {0}'.format(' -> '.join(str(tasks[i]) for i in path + [n])))
+        if n not in level:
+            level[n] = 1 + max([visit(i, path + [n]) for i in depends[n]] or [-1])
+        return level[n]
+
+    for n in range(len(tasks)):
+        visit(n, [])
+    result = [[] for i in range(max(level.values()) + 1 if level else 0)]
+    for n, task in enumerate(tasks):
+        result[level[n]].append(task)
+    return result
+
+
+def schedule(axl, tasks, workers=8):
+    """
+    Run calls concurrently in dependency order on a bounded pool of worker threads.
+    A call starts as soon as the calls it depends on have succeeded, the dependants of a failed call are skipped.
+    :param axl: AXL instance
+    :param tasks: list of Task or tuples of method name and keyword arguments eg ('add_region', {'region': 'r1'})
+    :param workers: number of worker threads
+    :return: result dictionary, the response is the list of result dictionaries in input order
+
+    example usage:
+    >>> schedule(ucm, [('add_region', {'region': 'SITE1_REG'}),
+    ...                ('add_location', {'location': 'SITE1_LOC'}),
+    ...                ('add_device_pool', {'device_pool': 'SITE1_DP', 'region': 'SITE1_REG',
+    ...                                     'location': 'SITE1_LOC'})], workers=4)
+    """
+    tasks = [_task(i) for i in tasks]
+    levels = waves(tasks)
+    depends = dependencies(tasks)
+    dependants = [[] for i in tasks]
+    for n, i in enumerate(depends):
+        for j in i:
+            dependants[j].append(n)
+
+    if hasattr(axl.transport, 'grow'):
+        axl.transport.grow(workers)
+
+    def call(task):
+        try:
+            return task.call(axl)
+        except Exception as e:
+            return {
+                'success': False,
+                'response': 'Unknown error',
+                'error': str(e),
+            }
+
+    responses = [None] * len(tasks)
+    waiting = [len(i) for i in depends]
+    # callbacks of calls that are already done run in the thread adding them, which may hold the lock
+    lock = threading.RLock()
+    done = threading.Event()
+    remaining = [len(tasks)]
+
+    def skip(n, cause):
+        for i in dependants[n]:
+            if responses[i] is None:
+                responses[i] = {
+                    'success': False,
+                    'response': 'Skipped',
+                    'error': '{0} failed'.format(tasks[cause]),
+                }
+                remaining[0] -= 1
+                skip(i, cause)
+
+    start = time.perf_counter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+
+        def finished(n, future):
+            with lock:
+                responses[n] = future.result()
+                remaining[0] -= 1
+                if responses[n]['success']:
+                    for i in dependants[n]:
+                        waiting[i] -= 1
+                        if waiting[i] == 0 and responses[i] is None:
+                            submit(i)
+                else:
+                    skip(n, n)
+                if remaining[0] == 0:
+                    done.set()
+
+        def submit(n):
+            executor.submit(call, tasks[n]).add_done_callback(lambda future: finished(n, future))
+
+        with lock:
+            if not tasks:
+                done.set()
+            for n in range(len(tasks)):
+                if waiting[n] == 0:
+                    submit(n)
+        done.wait()
+    seconds = time.perf_counter() - start
+
+    failed = len([i for i in responses if not i['success']])
+
+    result = {
+        'success': failed == 0,
+        'response': responses,
+        'error': '',
+        'seconds': seconds,
+        'per_second': len(responses) / seconds if seconds else 0.0,
+        'waves': len(levels),
+    }
+
+    if failed:
+        result['error'] = '{0} of {1} calls failed'.format(failed, len(responses))
+    return result
@@ -0,0 +1,213 @@
+"""
+Parsed AXL WSDL/XSD schema handling.
+Parsing AXLAPI.wsdl and AXLSoap.xsd takes seconds, so the parsed suds
+definitions are pickled to disk and reused by later processes.
+Cache entries are keyed by WSDL location, file mtime and content hash,
+so editing or replacing the schema files invalidates them automatically.
+Within a process the parsed definitions are shared by every client of the same WSDL.
+"""
+
+import glob
+import hashlib
+import os
+import threading
+import urllib.parse
+import urllib.request
+
+from suds.cache import ObjectCache
+from suds.client import Client
+from suds.client import ServiceSelector
+from suds.options import Options
+from suds.transport.https import HttpAuthenticated
+
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache')), 'axl')
+
+
+def wsdl_path(wsdl):
+    """
+    Get the local file system path of a WSDL location
+    :param wsdl: wsdl file location, either a file:// url or a plain path
+    :return: path to the wsdl file, None for remote wsdl locations
+    """
+    url = urllib.parse.urlparse(wsdl)
+    if url.scheme == 'file':
+        return urllib.request.url2pathname(url.path)
+    elif url.scheme == '' or len(url.scheme) == 1:
+        # plain path, single letter schemes are windows drive letters
+        return wsdl
+    return None
+
+
+def fingerprint(wsdl):
+    """
+    Fingerprint the schema files of a local WSDL.
+    The WSDL imports the .xsd files that sit beside it, so all of them are included.
+    :param wsdl: wsdl file location
+    :return: hex digest of the schema file names, mtimes and contents, None for remote wsdl locations
+    """
+    path = wsdl_path(wsdl)
+    if path is None or not os.path.isfile(path):
+        return None
+
+    files = [path] + sorted(glob.glob(os.path.join(os.path.dirname(path), '*.xsd')))
+    digest = hashlib.sha1()
+    for i in files:
+        digest.update('{0}:{1}\0'.format(os.path.basename(i), os.stat(i).st_mtime_ns).encode())
+        with open(i, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SchemaCache(ObjectCache):
+    """
+    On-disk cache of parsed WSDL definitions.
+    Use with the suds option cachingpolicy=1 so the whole parsed WSDL is cached
+    rather than the raw XML documents.
+    """
+
+    def __init__(self, wsdl, location=DEFAULT_CACHE_DIR, **duration):
+        """
+        :param wsdl: wsdl file location the cache is for
+        :param location: cache directory
+        :param duration: optional expiry as datetime.timedelta keyword arguments,
+               only needed for remote wsdl locations which can not be fingerprinted
+        """
+        self.wsdl = wsdl
+        self.fingerprint = fingerprint(wsdl)
+        super(SchemaCache, self).__init__(location, **duration)
+
+    def key(self, id):
+        """
+        Add the schema fingerprint to a suds cache id
+        :param id: suds cache id
+        :return: cache id
+        """
+        if self.fingerprint is None:
+            return id
+        return '{0}-{1}'.format(id, self.fingerprint[:20])
+
+    def get(self, id):
+        wsdl = super(SchemaCache, self).get(self.key(id))
+        if getattr(wsdl, 'imports', None):
+            # AXLAPI.wsdl imports AXLSoap.xsd with a wsdl:import, the schema is merged into the
+            # wsdl types when parsed and the import keeps no definitions of its own, which the
+            # suds reader expects of every import on a cached wsdl
+            wsdl.imports = [i for i in wsdl.imports if i.imported is not None]
+        return wsdl
+
+    def put(self, id, object):
+        self.purge_stale(id)
+        return super(SchemaCache, self).put(self.key(id), object)
+
+    def purge(self, id):
+        return super(SchemaCache, self).purge(self.key(id))
+
+    def purge_stale(self, id):
+        """
+        Remove entries for the same id that were stored for an older version of the schema
+        :param id: suds cache id
+        """
+        current = os.path.join(self.location, '{0}-{1}.{2}'.format(self.fnprefix, self.key(id), self.fnsuffix()))
+        pattern = os.path.join(self.location, '{0}-{1}*.{2}'.format(self.fnprefix, id, self.fnsuffix()))
+        for i in glob.glob(pattern):
+            if i != current:
+                try:
+                    os.remove(i)
+                except OSError:
+                    pass
+
+
+class SharedSchema(object):
+    """
+    Parsed WSDL definitions shared by many suds clients.
+    The definitions are treated as immutable, each client gets its own options
+    such as the location and transport.
+    """
+
+    def __init__(self, wsdl, **options):
+        """
+        :param wsdl: wsdl file location
+        :param options: suds options used to parse the wsdl
+        """
+        prototype = Client(wsdl, **options)
+
+        # The parsed definitions keep a reference to the options they were parsed with,
+        # don't let that hold on to the credentials of whoever parsed them first
+        prototype.options.transport = HttpAuthenticated()
+
+        self.wsdl = prototype.wsdl
+        self.factory = prototype.factory
+        self.sd = prototype.sd
+
+    def client(self, **options):
+        """
+        Create a suds client using the shared definitions
+        :param options: suds options for the client
+        :return: suds client
+        """
+        client = _SharedClient()
+        client.options = Options()
+        client.options.transport = HttpAuthenticated()
+        client.set_options(**options)
+        client.wsdl = self.wsdl
+        client.factory = self.factory
+        client.service = ServiceSelector(client, self.wsdl.services)
+        client.sd = self.sd
+        client.messages = dict(tx=None, rx=None)
+        return client
+
+
+class _SharedClient(Client):
+    """
+    suds client built from shared definitions rather than by parsing a wsdl
+    """
+
+    def __init__(self):
+        pass
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+
+def _option_key(value):
+    """
+    Hashable value of a suds option, plugins such as ImportDoctor are compared by their attributes
+    """
+    if isinstance(value, (list, tuple)):
+        return tuple(_option_key(i) for i in value)
+    elif isinstance(value, dict):
+        return tuple(sorted((k, _option_key(v)) for k, v in value.items()))
+    elif isinstance(value, (str, bytes, int, float, bool, type(None))):
+        return value
+    elif hasattr(value, '__dict__'):
+        return type(value).__name__, _option_key(vars(value))
+    return repr(value)
+
+
+def shared_schema(wsdl, **options):
+    """
+    Get the process wide parsed schema for a wsdl and options, parsing it on first use.
+    The transport and caching options only change how the wsdl is fetched and stored, not the parsed definitions,
+    so they are not part of the key.
+    :param wsdl: wsdl file location
+    :param options: suds options used to parse the wsdl on first use
+    :return: SharedSchema
+    """
+    parsing = dict((k, v) for k, v in options.items() if k not in ('transport', 'cache', 'cachingpolicy'))
+    key = wsdl, _option_key(parsing)
+    with _shared_lock:
+        if key not in _shared:
+            _shared[key] = SharedSchema(wsdl, **options)
+        return _shared[key]
+
+
+def clear_shared_schemas():
+    """
+    Forget the process wide parsed schemas, clients already built keep theirs
+    """
+    with _shared_lock:
+        _shared.clear()
@@ -0,0 +1,265 @@
+"""
+Local SQLite snapshot of the UCM configuration.
+The device, numplan, enduser, devicepool and the other tables a report needs are copied into an indexed
+SQLite file with executeSQLQuery, reports then run against the file in milliseconds.
+Gateways, SIP trunks and route lists are rows of the device table told apart by tkclass, route patterns and
+translation patterns are rows of numplan told apart by tkpatternusage. Route list and route group members,
+media resource groups and lists and calling search space members are copied from their own tables.
+A sync compares the pkids and a fingerprint of every row on UCM with the snapshot and fetches only the
+rows that were added or changed, rows removed from UCM are removed from the snapshot. The fingerprint is an
+ifx_checksum folded over the columns on the server, so the comparison downloads a pkid and an integer per row.
+The tables keep their UCM names and columns so the same SQL works against both.
+"""
+
+import collections
+import sqlite3
+import time
+
+from .inventory import as_phone
+from .inventory import quote
+from .inventory import value
+
+# pkids per query fetching changed rows
+BATCH_SIZE = 500
+
+# Share of changed rows over which a table is fetched whole instead of by pkid
+FULL_FETCH = 0.5
+
+
+class Table(object):
+    """
+    A UCM table in the snapshot
+    """
+
+    def __init__(self, source, columns, where='', indexes=()):
+        """
+        :param source: FROM clause, the table and its alias first eg 'device d inner join ...'
+        :param columns: SQL expressions of the columns to copy eg ['d.name', 'tp.name as product']
+        :param where: condition of the rows to copy, empty for every row
+        :param indexes: columns to index in the snapshot
+        """
+        self.source = source
+        self.alias = source.split()[1]
+        self.expressions = list(columns)
+        self.columns = [i.split()[-1].split('.')[-1].lower() for i in columns]
+        self.where = where
+        self.indexes = indexes
+
+    def _query(self, select, pkids=None):
+        conditions = [self.where] if self.where else []
+        if pkids is not None:
+            conditions.append('{0}.pkid in ({1})'.format(self.alias, ', '.join(quote(i) for i in pkids)))
+        return 'select {0}.pkid, {1} from {2}{3}'.format(
+            self.alias, select, self.source, ' where ' + ' and '.join(conditions) if conditions else '')
+
+    def fingerprint_query(self):
+        """
+        Query of the pkid and fingerprint of every row, the fingerprint is a checksum of the columns
+        computed by the server so only the pkid and an integer come back
+        :return: SQL query
+        """
+        fingerprint = '0'
+        for i in self.expressions:
+            fingerprint = "ifx_checksum(nvl({0}::lvarchar, ''), {1})".format(i.split()[0], fingerprint)
+        return self._query(fingerprint + ' as fingerprint')
+
+    def rows_query(self, pkids=None):
+        """
+        Query of the columns of the rows
+        :param pkids: pkids of the rows to fetch, None for every row
+        :return: SQL query
+        """
+        return self._query(', '.join(self.expressions), pkids)
+
+
+TABLES = collections.OrderedDict([
+    ('location', Table('location l', ['l.name'], indexes=('name',))),
+    ('region', Table('region r', ['r.name'], indexes=('name',))),
+    ('srst', Table('srst s', ['s.name'], indexes=('name',))),
+    ('mediaresourcegroup', Table('mediaresourcegroup mrg', ['mrg.name', 'mrg.description', 'mrg.multicast'],
+                                 indexes=('name',))),
+    ('mediaresourcegroupmember', Table('mediaresourcegroupmember mrgm', ['mrgm.fkmediaresourcegroup',
+                                                                        'mrgm.fkdevice'],
+                                       indexes=('fkmediaresourcegroup', 'fkdevice'))),
+    ('mediaresourcelist', Table('mediaresourcelist mrl', ['mrl.name'], indexes=('name',))),
+    ('mediaresourcelistmember', Table('mediaresourcelistmember mrlm', ['mrlm.fkmediaresourcelist',
+                                                                      'mrlm.fkmediaresourcegroup', 'mrlm.sortorder'],
+                                      indexes=('fkmediaresourcelist', 'fkmediaresourcegroup'))),
+    ('devicepool', Table('devicepool dp', ['dp.name', 'dp.fkregion', 'dp.fksrst', 'dp.fkcallmanagergroup',
+                                           'dp.fkdatetimesetting', 'dp.fklocation', 'dp.fkmediaresourcelist'],
+                         indexes=('name', 'fkregion', 'fklocation', 'fkmediaresourcelist'))),
+    ('routepartition', Table('routepartition rp', ['rp.name', 'rp.description'], indexes=('name',))),
+    ('callingsearchspace', Table('callingsearchspace css', ['css.name', 'css.description', 'css.clause'],
+                                 indexes=('name',))),
+    ('callingsearchspacemember', Table('callingsearchspacemember cssm', ['cssm.fkcallingsearchspace',
+                                                                        'cssm.fkroutepartition', 'cssm.sortorder'],
+                                       indexes=('fkcallingsearchspace', 'fkroutepartition'))),
+    ('routegroup', Table('routegroup rg', ['rg.name'], indexes=('name',))),
+    ('routegroupdevicemap', Table('routegroupdevicemap rgdm', ['rgdm.fkroutegroup', 'rgdm.fkdevice',
+                                                              'rgdm.deviceselectionorder'],
+                                  indexes=('fkroutegroup', 'fkdevice'))),
+    ('routelist', Table('routelist rl', ['rl.fkdevice', 'rl.fkroutegroup', 'rl.selectionorder'],
+                        indexes=('fkdevice', 'fkroutegroup'))),
+    ('numplan', Table('numplan n', ['n.dnorpattern', 'n.description', 'n.fkroutepartition', 'n.tkpatternusage',
+                                    'n.calledpartytransformationmask', 'n.prefixdigitsout', 'n.blockenable',
+                                    'n.fkcallingsearchspace_translation'],
+                      indexes=('dnorpattern', 'fkroutepartition', 'tkpatternusage'))),
+    ('enduser', Table('enduser eu', ['eu.userid', 'eu.firstname', 'eu.lastname', 'eu.mailid',
+                                     'eu.telephonenumber'], indexes=('userid',))),
+    ('device', Table(
+        'device d inner join typeproduct tp on tp.enum = d.tkproduct inner join typeclass tc on tc.enum = d.tkclass '
+        'inner join typedeviceprotocol tdp on tdp.enum = d.tkdeviceprotocol',
+        ['d.name', 'd.description', 'd.tkclass', 'tp.name as product', 'tc.name as class', 'tdp.name as protocol',
+         'd.fkdevicepool', 'd.fkcallingsearchspace', 'd.fklocation', 'd.fkenduser', 'd.fkmediaresourcelist'],
+        indexes=('name', 'tkclass', 'fkdevicepool', 'fkcallingsearchspace', 'fklocation', 'fkenduser'))),
+    ('devicenumplanmap', Table('devicenumplanmap dnpm', ['dnpm.fkdevice', 'dnpm.fknumplan', 'dnpm.numplanindex',
+                                                         'dnpm.display', 'dnpm.displayascii', 'dnpm.label',
+                                                         'dnpm.e164mask'], indexes=('fkdevice', 'fknumplan'))),
+])
+
+PHONES = """select d.*, dp.name as devicepoolname, css.name as callingsearchspacename, l.name as locationname,
+eu.userid as owneruserid
+from device d
+left outer join devicepool dp on dp.pkid = d.fkdevicepool
+left outer join callingsearchspace css on css.pkid = d.fkcallingsearchspace
+left outer join location l on l.pkid = d.fklocation
+left outer join enduser eu on eu.pkid = d.fkenduser
+where d.tkclass = 1 and d.name like ?
+order by d.pkid"""
+
+LINES = """select dnpm.*, n.dnorpattern, n.fkroutepartition, rp.name as routepartitionname
+from devicenumplanmap dnpm
+inner join device d on d.pkid = dnpm.fkdevice
+inner join numplan n on n.pkid = dnpm.fknumplan
+left outer join routepartition rp on rp.pkid = n.fkroutepartition
+where d.tkclass = 1 and d.name like ?"""
+
+
+class Snapshot(object):
+    """
+    UCM tables copied into a SQLite file, kept up to date by sync
+    """
+
+    def __init__(self, axl, path, tables=TABLES, batch_size=BATCH_SIZE):
+        """
+        :param axl: AXL instance to sync from
+        :param path: SQLite file, created when it does not exist
+        :param tables: dictionary of table name to Table to copy
+        :param batch_size: number of pkids per query fetching changed rows
+
+        example usage:
+        >>> from axl.snapshot import Snapshot
+        >>> snapshot = Snapshot(ucm, 'cluster.db')
+        >>> snapshot.sync()
+        >>> snapshot.query('select name from device where fkdevicepool = ?', [pkid])
+        """
+        self.axl = axl
+        self.path = path
+        self.tables = tables
+        self.batch_size = batch_size
+        self.db = sqlite3.connect(path)
+        self.db.row_factory = sqlite3.Row
+        self._create()
+
+    def _create(self):
+        with self.db:
+            self.db.execute('create table if not exists snapshot_sync (name text primary key, synced real, '
+                            'added integer, updated integer, deleted integer, unchanged integer)')
+            for name, table in self.tables.items():
+                self.db.execute('create table if not exists "{0}" (pkid text primary key, fingerprint text, {1})'
+                                .format(name, ', '.join('"{0}" text'.format(i) for i in table.columns)))
+                # a snapshot made before a column was copied gets the column, its rows are fetched again
+                existing = [i[1] for i in self.db.execute('pragma table_info("{0}")'.format(name))]
+                missing = [i for i in table.columns if i not in existing]
+                for i in missing:
+                    self.db.execute('alter table "{0}" add column "{1}" text'.format(name, i))
+                if missing:
+                    self.db.execute('update "{0}" set fingerprint = null'.format(name))
+                for i in table.indexes:
+                    self.db.execute('create index if not exists "{0}_{1}" on "{0}" ("{1}")'.format(name, i))
+
+    def sync(self, tables=None):
+        """
+        Bring the snapshot up to date, only added and changed rows are fetched
+        :param tables: names of the tables to sync, every table by default
+        :return: dictionary of table name to counts of the added, updated, deleted and unchanged rows
+        """
+        return collections.OrderedDict((i, self._sync(i, self.tables[i])) for i in tables or self.tables)
+
+    def _sync(self, name, table):
+        remote = dict((str(i['pkid']), value(i, 'fingerprint'))
+                      for i in self.axl.iter_sql_query(table.fingerprint_query(), key='pkid'))
+        local = dict(self.db.execute('select pkid, fingerprint from "{0}"'.format(name)).fetchall())
+
+        changed = set(i for i, f in remote.items() if local.get(i) != f)
+        deleted = [i for i in local if i not in remote]
+
+        if len(changed) > len(remote) * FULL_FETCH:
+            queries = [table.rows_query()]
+        else:
+            ordered = sorted(changed)
+            queries = [table.rows_query(ordered[i:i + self.batch_size])
+                       for i in range(0, len(ordered), self.batch_size)]
+
+        insert = 'insert or replace into "{0}" (pkid, fingerprint, {1}) values ({2})'.format(
+            name, ', '.join('"{0}"'.format(i) for i in table.columns), ', '.join('?' * (len(table.columns) + 2)))
+        with self.db:
+            for query in queries:
+                rows = (i for i in self.axl.iter_sql_query(query, key='pkid') if str(i['pkid']) in changed)
+                self.db.executemany(insert, ([str(i['pkid']), remote[str(i['pkid'])]] +
+                                             [value(i, c) for c in table.columns] for i in rows))
+            self.db.executemany('delete from "{0}" where pkid = ?'.format(name), ((i,) for i in deleted))
+
+            counts = collections.OrderedDict([
+                ('added', len([i for i in changed if i not in local])),
+                ('updated', len([i for i in changed if i in local])),
+                ('deleted', len(deleted)),
+                ('unchanged', len(remote) - len(changed)),
+            ])
+            self.db.execute('insert or replace into snapshot_sync values (?, ?, ?, ?, ?, ?)',
+                            [name, time.time()] + list(counts.values()))
+        return counts
+
+    def query(self, sql, parameters=()):
+        """
+        Run a query against the snapshot
+        :param sql: SQLite query
+        :param parameters: query parameters
+        :return: list of dictionary's
+        """
+        return [dict(i) for i in self.db.execute(sql, parameters)]
+
+    def phones(self, name='%'):
+        """
+        Phones with their device pool, calling search space, location, owner and lines
+        :param name: phone name with % wildcards
+        :return: A list of dictionary's shaped like the get_phone response
+        """
+        lines = {}
+        for i in self.query(LINES, [name]):
+            lines.setdefault(i['fkdevice'], []).append(i)
+        return [as_phone(i, lines.get(i['pkid'], [])) for i in self.query(PHONES, [name])]
+
+    def stats(self):
+        """
+        Rows and last sync of every table
+        :return: dictionary of table name to a dictionary of rows, the time of the last sync and its counts
+        """
+        synced = dict((i['name'], i) for i in self.query('select * from snapshot_sync'))
+        result = collections.OrderedDict()
+        for name in self.tables:
+            result[name] = {'rows': self.db.execute('select count(*) from "{0}"'.format(name)).fetchone()[0]}
+            result[name].update((k, v) for k, v in synced.get(name, {}).items() if k != 'name')
+        return result
+
+    def close(self):
+        """
+        Close the SQLite file
+        """
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
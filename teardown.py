@@ -0,0 +1,344 @@
+"""
+Dependency ordered teardown of UCM objects.
+UCM refuses to delete an object that is still referenced, a region used by a device pool fails with
+pk_region_pkid is still being referenced. teardown finds every object that refers to the objects to delete,
+and the objects that refer to those, with SQL queries on the reference tables, one query per reference
+and level. The objects are then deleted level by level, every referencing object before the objects it
+refers to, and the deletes of a level run concurrently.
+Objects with no delete method, route lists, route and translation patterns, trunks and remote destination
+profiles, block the objects they refer to. Directory numbers and patterns are named by a tuple of the pattern
+and its partition, a pattern is only unique within its partition.
+"""
+
+import collections
+import concurrent.futures
+import time
+
+from .inventory import quote
+from .inventory import value
+
+# Names per reference query
+BATCH_SIZE = 200
+
+# device tkclass, the enum of typeclass: kind
+DEVICE_CLASSES = {
+    1: 'phone',
+    2: 'h323_gateway',
+    4: 'conference_bridge',
+    5: 'transcoder',
+    10: 'cti_route_point',
+    14: 'route_list',
+    18: 'trunk',
+    20: 'remote_destination_profile',
+    254: 'device_profile',
+}
+
+DEVICE_KINDS = frozenset(DEVICE_CLASSES.values())
+
+# kinds named by a pattern and a partition
+PATTERN_KINDS = frozenset(['directory_number', 'route_pattern', 'translation_pattern'])
+
+# kinds that can not be deleted
+UNDELETABLE = frozenset(['route_list', 'route_pattern', 'translation_pattern', 'trunk', 'remote_destination_profile'])
+
+_DEVICES = 'select d.name, d.tkclass, {0}.name as ref from device d '
+
+_PATTERNS = ('select n.dnorpattern as name, rp.name as partition, {0}.name as ref from numplan n '
+             'left outer join routepartition rp on rp.pkid = n.fkroutepartition ')
+
+# numplan columns of the calling search spaces of a line
+LINE_CSS = ['n.fkcallingsearchspace_sharedlineappearance', 'n.fkcallingsearchspace_cfb',
+            'n.fkcallingsearchspace_cfbint', 'n.fkcallingsearchspace_cfna', 'n.fkcallingsearchspace_cfnaint',
+            'n.fkcallingsearchspace_cfur', 'n.fkcallingsearchspace_cfurint', 'n.fkcallingsearchspace_pff',
+            'n.fkcallingsearchspace_pffint']
+
+# devicepool columns of calling search spaces
+DEVICE_POOL_CSS = ['dp.fkcallingsearchspace_aar', 'dp.fkcallingsearchspace_autoregistration',
+                   'dp.fkcallingsearchspace_adjunct', 'dp.fkcallingsearchspace_mobility',
+                   'dp.fkcallingsearchspace_cgpntransform', 'dp.fkcallingsearchspace_cdpntransform']
+
+# kind: list of tuples of the referencing kind, device for a device kind from its tkclass, and the query of
+# the referencing objects, the name, the partition of a pattern and ref, the name of the referenced object,
+# formatted with the quoted names of the referenced objects
+REFERENCES = {
+    'region': [
+        ('device_pool', 'select dp.name, r.name as ref from devicepool dp inner join region r on r.pkid = dp.fkregion '
+                        'where r.name in ({0})'),
+    ],
+    'srst': [
+        ('device_pool', 'select dp.name, s.name as ref from devicepool dp inner join srst s on s.pkid = dp.fksrst '
+                        'where s.name in ({0})'),
+    ],
+    'location': [
+        ('device_pool', 'select dp.name, l.name as ref from devicepool dp inner join location l '
+                        'on l.pkid = dp.fklocation where l.name in ({0})'),
+        ('device', _DEVICES.format('l') + 'inner join location l on l.pkid = d.fklocation where l.name in ({0})'),
+    ],
+    'device_pool': [
+        ('device', _DEVICES.format('dp') + 'inner join devicepool dp on dp.pkid = d.fkdevicepool '
+                                           'where dp.name in ({0})'),
+    ],
+    'calling_search_space': [
+        ('device', _DEVICES.format('css') + 'inner join callingsearchspace css '
+                                            'on css.pkid in (d.fkcallingsearchspace, d.fkcallingsearchspace_aar) '
+                                            'where css.name in ({0})'),
+        ('device_pool', 'select dp.name, css.name as ref from devicepool dp inner join callingsearchspace css '
+                        'on css.pkid in (' + ', '.join(DEVICE_POOL_CSS) + ') where css.name in ({0})'),
+        ('directory_number', _PATTERNS.format('css') + 'inner join callingsearchspace css '
+                             'on css.pkid in (' + ', '.join(LINE_CSS) + ') '
+                             'where n.tkpatternusage = 2 and css.name in ({0})'),
+        ('translation_pattern', _PATTERNS.format('css') + 'inner join callingsearchspace css '
+                                'on css.pkid = n.fkcallingsearchspace_translation '
+                                'where n.tkpatternusage = 3 and css.name in ({0})'),
+    ],
+    'partition': [
+        ('directory_number', _PATTERNS.format('rp') + 'where n.tkpatternusage = 2 and rp.name in ({0})'),
+        ('route_pattern', _PATTERNS.format('rp') + 'where n.tkpatternusage = 5 and rp.name in ({0})'),
+        ('translation_pattern', _PATTERNS.format('rp') + 'where n.tkpatternusage = 3 and rp.name in ({0})'),
+        ('calling_search_space', 'select css.name, rp.name as ref from callingsearchspace css '
+                                 'inner join callingsearchspacemember m on m.fkcallingsearchspace = css.pkid '
+                                 'inner join routepartition rp on rp.pkid = m.fkroutepartition '
+                                 'where rp.name in ({0})'),
+    ],
+    'route_group': [
+        ('route_list', 'select d.name, rg.name as ref from routelist rl inner join device d on d.pkid = rl.fkdevice '
+                       'inner join routegroup rg on rg.pkid = rl.fkroutegroup where rg.name in ({0})'),
+    ],
+    'media_resource_group': [
+        ('media_resource_group_list', 'select mrl.name, mrg.name as ref from mediaresourcelist mrl '
+                                      'inner join mediaresourcelistmember m on m.fkmediaresourcelist = mrl.pkid '
+                                      'inner join mediaresourcegroup mrg on mrg.pkid = m.fkmediaresourcegroup '
+                                      'where mrg.name in ({0})'),
+    ],
+    'media_resource_group_list': [
+        ('device_pool', 'select dp.name, mrl.name as ref from devicepool dp inner join mediaresourcelist mrl '
+                        'on mrl.pkid = dp.fkmediaresourcelist where mrl.name in ({0})'),
+        ('device', _DEVICES.format('mrl') + 'inner join mediaresourcelist mrl on mrl.pkid = d.fkmediaresourcelist '
+                                            'where mrl.name in ({0})'),
+    ],
+    'device': [
+        ('route_group', 'select rg.name, d.name as ref from routegroup rg '
+                        'inner join routegroupdevicemap m on m.fkroutegroup = rg.pkid '
+                        'inner join device d on d.pkid = m.fkdevice where d.name in ({0})'),
+        ('media_resource_group', 'select mrg.name, d.name as ref from mediaresourcegroup mrg '
+                                 'inner join mediaresourcegroupmember m on m.fkmediaresourcegroup = mrg.pkid '
+                                 'inner join device d on d.pkid = m.fkdevice where d.name in ({0})'),
+    ],
+}
+
+
+def _kind(row, kind):
+    """
+    Kind of a referencing object
+    """
+    if kind != 'device':
+        return kind
+    tkclass = int(str(row['tkclass']))
+    return DEVICE_CLASSES.get(tkclass, 'device class {0}'.format(tkclass))
+
+
+def _name(row, kind):
+    """
+    Name of a referencing object, a tuple of the pattern and partition for a pattern
+    """
+    if kind in PATTERN_KINDS:
+        return str(row['name']), value(row, 'partition')
+    return str(row['name'])
+
+
+def _label(item):
+    """
+    Text of a tuple of kind and name
+    """
+    kind, name = item
+    return '{0} {1}'.format(kind, '/'.join(name) if isinstance(name, tuple) else name)
+
+
+class Teardown(object):
+    """
+    Objects to delete in dependency order, a dry run until it is applied
+    """
+
+    def __init__(self, levels, blocked, references):
+        """
+        :param levels: list of lists of tuples of kind and name, the first level is deleted first
+        :param blocked: dictionary of tuple of kind and name to the reason it can not be deleted
+        :param references: dictionary of tuple of kind and name to the set of objects referring to it
+        """
+        self.levels = levels
+        self.blocked = blocked
+        self.references = references
+
+    def __len__(self):
+        return sum(len(i) for i in self.levels)
+
+    def __str__(self):
+        lines = []
+        for n, level in enumerate(self.levels):
+            lines.append('level {0}:'.format(n + 1))
+            lines.extend('  - {0}'.format(_label(i)) for i in level)
+        if self.blocked:
+            lines.append('blocked:')
+            lines.extend('  ! {0}: {1}'.format(_label(k), v) for k, v in sorted(self.blocked.items()))
+        return '\n'.join(lines)
+
+    def apply(self, axl, workers=8):
+        """
+        Delete the objects level by level, the deletes of a level run concurrently.
+        When a delete fails the objects it refers to are skipped.
+        :param axl: AXL instance
+        :param workers: number of worker threads
+        :return: result dictionary, the response is a dictionary of tuple of kind and name to result dictionary
+        """
+        if hasattr(axl.transport, 'grow'):
+            axl.transport.grow(workers)
+
+        def call(item):
+            try:
+                name = item[1] if isinstance(item[1], tuple) else (item[1],)
+                return getattr(axl, 'delete_' + item[0])(*name)
+            except Exception as e:
+                return {
+                    'success': False,
+                    'response': 'Unknown error',
+                    'error': str(e),
+                }
+
+        refers = collections.defaultdict(set)
+        for referenced, referencing in self.references.items():
+            for i in referencing:
+                refers[i].add(referenced)
+
+        responses = collections.OrderedDict()
+        skipped = {}
+
+        def skip(item, cause):
+            for i in refers[item]:
+                if i not in skipped:
+                    skipped[i] = cause
+                    skip(i, cause)
+
+        start = time.perf_counter()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            for level in self.levels:
+                pending = [i for i in level if i not in skipped]
+                for item, result in zip(pending, executor.map(call, pending)):
+                    responses[item] = result
+                    if not result['success']:
+                        skip(item, item)
+                for item in level:
+                    if item in skipped:
+                        responses[item] = {
+                            'success': False,
+                            'response': 'Skipped',
+                            'error': 'delete_{0} failed'.format(_label(skipped[item])),
+                        }
+        seconds = time.perf_counter() - start
+
+        for item, reason in self.blocked.items():
+            responses[item] = {
+                'success': False,
+                'response': 'Blocked',
+                'error': reason,
+            }
+
+        failed = len([i for i in responses.values() if not i['success']])
+
+        result = {
+            'success': failed == 0,
+            'response': responses,
+            'error': '',
+            'seconds': seconds,
+        }
+
+        if failed:
+            result['error'] = '{0} of {1} deletes failed'.format(failed, len(responses))
+        return result
+
+
+def references(axl, kind, names, batch_size=BATCH_SIZE):
+    """
+    Objects that refer to objects of one kind
+    :param axl: AXL instance
+    :param kind: kind of the referenced objects
+    :param names: names of the referenced objects
+    :param batch_size: number of names per query
+    :return: list of tuples of referenced name, referencing kind and referencing name
+    """
+    names = sorted(names)
+    found = []
+    for referencing, query in REFERENCES.get('device' if kind in DEVICE_KINDS else kind, []):
+        for n in range(0, len(names), batch_size):
+            sql = query.format(', '.join(quote(i) for i in names[n:n + batch_size]))
+            found.extend((str(i['ref']), _kind(i, referencing), _name(i, referencing)) for i in axl.iter_sql_query(sql))
+    return found
+
+
+def teardown(axl, objects, batch_size=BATCH_SIZE):
+    """
+    Find every object that has to be deleted before the objects given and order the deletes.
+    Nothing is deleted until the teardown is applied.
+    :param axl: AXL instance
+    :param objects: list of tuples of kind and name eg [('region', 'SITE1_REG'), ('partition', 'SITE1_PT')],
+        the name of a directory number is a tuple of pattern and partition
+    :param batch_size: number of names per reference query
+    :return: Teardown
+
+    example usage:
+    >>> site = teardown(ucm, [('device_pool', 'SITE1_DP'), ('region', 'SITE1_REG')])
+    >>> print(site)
+    >>> site.apply(ucm, workers=8)
+    """
+    unknown = [i for i in objects if not hasattr(axl, 'delete_' + i[0]) and i[0] not in UNDELETABLE]
+    if unknown:
+        raise ValueError('Unknown object kinds: {0}'.format(', '.join(sorted(set(i[0] for i in unknown)))))
+
+    referenced_by = collections.defaultdict(set)
+    seen = set(objects)
+    frontier = list(objects)
+    while frontier:
+        kinds = collections.defaultdict(set)
+        for kind, name in frontier:
+            kinds[kind].add(name)
+        frontier = []
+        for kind, names in kinds.items():
+            for ref, referencing, name in references(axl, kind, names, batch_size):
+                referenced_by[(kind, ref)].add((referencing, name))
+                if (referencing, name) not in seen:
+                    seen.add((referencing, name))
+                    frontier.append((referencing, name))
+
+    # objects that can not be deleted block every object they refer to
+    blocked = {}
+    refers = collections.defaultdict(set)
+    for referenced, referencing in referenced_by.items():
+        for i in referencing:
+            refers[i].add(referenced)
+
+    def block(item, reason):
+        for i in refers[item]:
+            if i not in blocked:
+                blocked[i] = reason
+                block(i, reason)
+
+    for item in sorted(seen):
+        if not hasattr(axl, 'delete_' + item[0]):
+            blocked[item] = 'no delete method for {0}'.format(item[0])
+            block(item, 'referenced by {0}'.format(_label(item)))
+
+    level = {}
+
+    def visit(item, path):
+        if item in path:
+            raise ValueError('Reference cycle: {0}'.format(' -> '.join(_label(i) for i in path + [item])))
+        if item not in level:
+            level[item] = 1 + max([visit(i, path + [item]) for i in referenced_by[item]] or [-1])
+        return level[item]
+
+    deletable = sorted(i for i in seen if i not in blocked)
+    for item in deletable:
+        visit(item, [])
+    levels = [[] for i in range(max(level.values()) + 1 if level else 0)]
+    for item in deletable:
+        levels[level[item]].append(item)
+    return Teardown(levels, blocked, dict(referenced_by))
@@ -0,0 +1,244 @@
+"""
+Precompiled SOAP request templates.
+suds walks the schema to marshal the arguments of every call. For the hot write operations the
+envelope is instead compiled once per schema and argument shape: the arguments are marshalled with
+markers in place of their strings, the markers split the envelope into a template, and later calls
+with the same shape only escape and join their strings. A template is only used once it rendered
+the envelope suds built for the same arguments byte for byte.
+"""
+
+import re
+import threading
+import uuid
+import weakref
+
+from suds import WebFault
+from suds.client import _SoapClient
+from suds.sax import encoder
+
+# Operations sent from templates by default
+TEMPLATE_OPERATIONS = ('addPhone', 'addLine', 'addUser')
+
+_caches = weakref.WeakKeyDictionary()
+_caches_lock = threading.Lock()
+
+
+def template_cache(wsdl):
+    """
+    Get the template cache of a schema, every client of the schema shares it
+    :param wsdl: suds wsdl definitions
+    :return: TemplateCache
+    """
+    with _caches_lock:
+        cache = _caches.get(wsdl)
+        if cache is None:
+            cache = _caches[wsdl] = TemplateCache()
+        return cache
+
+
+def _shape(value, strings):
+    """
+    Signature of the structure and non string values of an argument, its strings are collected
+    :param value: argument
+    :param strings: list the non empty strings are appended to in order
+    :return: hashable signature, None when the argument can't be templated
+    """
+    if type(value) is str and value:
+        strings.append(value)
+        return str
+    elif isinstance(value, dict):
+        items = []
+        for k, v in value.items():
+            shape = _shape(v, strings)
+            if shape is None:
+                return None
+            items.append((k, shape))
+        return dict, tuple(items)
+    elif isinstance(value, (list, tuple)):
+        items = []
+        for i in value:
+            shape = _shape(i, strings)
+            if shape is None:
+                return None
+            items.append(shape)
+        return type(value), tuple(items)
+    elif value is None or type(value) in (str, bool, int, float):
+        return type(value), value
+    return None
+
+
+def _marked(value, marker, count):
+    """
+    Copy of an argument with markers in place of its non empty strings, in the order _shape collects them
+    """
+    if type(value) is str and value:
+        count[0] += 1
+        return marker.format(count[0] - 1)
+    elif isinstance(value, dict):
+        return dict((k, _marked(v, marker, count)) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        return type(value)(_marked(i, marker, count) for i in value)
+    return value
+
+
+class Template(object):
+    """
+    An envelope split into constant parts and the positions of the strings between them
+    """
+
+    __slots__ = ('parts', 'slots')
+
+    def __init__(self, parts, slots):
+        self.parts = parts
+        self.slots = slots
+
+    def render(self, strings):
+        """
+        :param strings: the strings of the arguments in order
+        :return: envelope text
+        """
+        out = [self.parts[0]]
+        for slot, part in zip(self.slots, self.parts[1:]):
+            out.append(encoder.encode(strings[slot]))
+            out.append(part)
+        return ''.join(out)
+
+
+class TemplateCache(object):
+    """
+    Compiled templates of the operations of one schema, keyed by operation and argument shape
+    """
+
+    def __init__(self, maxsize=1024):
+        """
+        :param maxsize: maximum number of templates, argument shapes beyond it are marshalled by suds
+        """
+        self.maxsize = maxsize
+        self.templates = {}
+        self.hits = 0
+        self.misses = 0
+
+    def envelope(self, method, args, kwargs):
+        """
+        Envelope of a call from its template, compiled on first use
+        :param method: suds method definition of the operation
+        :param args: call arguments
+        :param kwargs: call keyword arguments
+        :return: envelope text, None when the call can't be templated
+        """
+        strings = []
+        shape = _shape((args, kwargs), strings)
+        if shape is None:
+            return None
+        key = (method.name, shape)
+        template = self.templates.get(key, False)
+        if template is False:
+            self.misses += 1
+            template = self._compile(method, args, kwargs, strings)
+            if len(self.templates) < self.maxsize:
+                self.templates[key] = template
+            return template.render(strings) if template is not None else None
+        if template is None:
+            return None
+        self.hits += 1
+        return template.render(strings)
+
+    @staticmethod
+    def _compile(method, args, kwargs, strings):
+        """
+        Build the template of an argument shape
+        :return: Template, None when it does not reproduce the suds envelope
+        """
+        nonce = uuid.uuid4().hex
+        marker = 'axl' + nonce + 'x{0}x'
+        count = [0]
+        marked_args, marked_kwargs = _marked((args, kwargs), marker, count)
+        text = method.binding.input.get_message(method, marked_args, marked_kwargs).plain()
+
+        pieces = re.split('axl' + nonce + r'x(\d+)x', text)
+        template = Template(pieces[0::2], [int(i) for i in pieces[1::2]])
+        if sorted(template.slots) != list(range(len(strings))):
+            return None
+        if template.render(strings) != method.binding.input.get_message(method, args, kwargs).plain():
+            return None
+        return template
+
+    def stats(self):
+        """
+        :return: dictionary of templates compiled, calls rendered from a template and calls compiled
+        """
+        return {
+            'templates': len([i for i in list(self.templates.values()) if i is not None]),
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+
+class _Envelope(object):
+    """
+    A rendered envelope passed to suds in place of the document it marshals
+    """
+
+    def __init__(self, text):
+        self.text = text
+
+    def root(self):
+        return None
+
+    def plain(self):
+        return self.text
+
+    def str(self):
+        return self.text
+
+    def __str__(self):
+        return self.text
+
+
+class _TemplatedMethod(object):
+    """
+    Calls a suds method with the envelope rendered from its template
+    """
+
+    def __init__(self, client, method, templates):
+        self._client = client
+        self._method = method
+        self._templates = templates
+        # the wsdl method definition, like the suds method
+        self.method = method.method
+
+    def __call__(self, *args, **kwargs):
+        text = None
+        if not self._client.options.prettyxml:
+            text = self._templates.envelope(self.method, args, kwargs)
+        if text is None:
+            return self._method(*args, **kwargs)
+        try:
+            return _SoapClient(self._client, self.method).send(_Envelope(text))
+        except WebFault as e:
+            if self._client.options.faults:
+                raise
+            return 500, e
+
+
+class TemplatedService(object):
+    """
+    Wraps the service of a suds client so the given operations are sent from templates
+    """
+
+    def __init__(self, client, service, operations=TEMPLATE_OPERATIONS):
+        """
+        :param client: suds client
+        :param service: the service of the client
+        :param operations: names of the operations to send from templates
+        """
+        self._client = client
+        self._service = service
+        self._operations = frozenset(operations)
+        self._templates = template_cache(client.wsdl)
+
+    def __getattr__(self, name):
+        method = getattr(self._service, name)
+        if name not in self._operations:
+            return method
+        return _TemplatedMethod(self._client, method, self._templates)
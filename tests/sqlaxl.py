@@ -0,0 +1,80 @@
+"""
+SQLite stand in for the UCM database, shared by the tests of the executeSQLQuery based readers
+"""
+import threading
+import zlib
+
+from axl.foley import AXL
+
+
+def _checksum(data, checksum):
+    # stands in for the Informix ifx_checksum, a CRC of the value seeded by the previous checksum
+    return zlib.crc32(str(data).encode('utf-8'), checksum & 0xffffffff)
+
+
+class SQLAXL(AXL):
+    """
+    AXL running executeSQLQuery against a SQLite database and recording deletes
+    """
+
+    def __init__(self, cluster, failing=()):
+        """
+        :param cluster: sqlite3 connection holding the UCM tables
+        :param failing: tuples of kind and name whose delete fails
+        """
+        super(SQLAXL, self).__init__('axl_user', 'axl_pass', 'file:///AXLAPI.wsdl', '127.0.0.1',
+                                     schema_cache_dir=None)
+        self.cluster = cluster
+        self.cluster.create_function('ifx_checksum', 2, _checksum)
+        self.failing = failing
+        self.queries = []
+        self.deleted = []
+        self.lock = threading.Lock()
+
+    def iter_sql_query(self, query, key=None, chunk_size=None):
+        with self.lock:
+            self.queries.append(query)
+            query = query.replace('nvl(', 'ifnull(').replace('::lvarchar', '')
+            if key is not None:
+                # rows come in key order like the chunks of iter_sql_query
+                query = 'select * from ({0}) order by {1}'.format(query, key)
+            rows = self.cluster.execute(query)
+            columns = [i[0] for i in rows.description]
+            return iter([dict(zip(columns, i)) for i in rows])
+
+    def _delete(self, kind, name):
+        if (kind, name) in self.failing:
+            return {'success': False, 'response': 'Could not delete', 'error': 'still being referenced'}
+        with self.lock:
+            self.deleted.append((kind, name))
+        return {'success': True, 'response': 'Deleted', 'error': ''}
+
+    def delete_region(self, region):
+        return self._delete('region', region)
+
+    def delete_location(self, location):
+        return self._delete('location', location)
+
+    def delete_device_pool(self, device_pool):
+        return self._delete('device_pool', device_pool)
+
+    def delete_phone(self, phone):
+        return self._delete('phone', phone)
+
+    def delete_device_profile(self, profile):
+        return self._delete('device_profile', profile)
+
+    def delete_h323_gateway(self, h323_gateway):
+        return self._delete('h323_gateway', h323_gateway)
+
+    def delete_route_group(self, route_group):
+        return self._delete('route_group', route_group)
+
+    def delete_partition(self, partition):
+        return self._delete('partition', partition)
+
+    def delete_calling_search_space(self, calling_search_space):
+        return self._delete('calling_search_space', calling_search_space)
+
+    def delete_directory_number(self, directory_number, route_partition_name=''):
+        return self._delete('directory_number', (directory_number, route_partition_name))
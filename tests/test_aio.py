@@ -0,0 +1,112 @@
+"""
+asyncio client tests against a local stub server, these do not need a Unified Communications server
+"""
+import asyncio
+import inspect
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from axl.aio import AsyncAXL, AsyncTransport, _run
+from axl.bench import stub_server
+from axl.cache import TTLCache
+from axl.foley import AXL
+from axl.mock import MockAXL, wsdl
+
+
+class TestAsyncAXL(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.wsdl = 'file://' + os.path.join(self.dir, 'AXLAPI.wsdl')
+        with open(os.path.join(self.dir, 'AXLAPI.wsdl'), 'w') as f:
+            f.write(wsdl())
+        self.server = stub_server()
+        transport = AsyncTransport('axl_user', 'axl_pass', concurrency=4, limiter=None)
+        self.ucm = AsyncAXL('axl_user', 'axl_pass', self.wsdl, '127.0.0.1', schema_cache_dir=None, transport=transport)
+        self.ucm.client.set_options(location=self.server.url)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.dir)
+
+    def test_methods_of_axl_are_coroutines(self):
+        self.assertTrue(inspect.iscoroutinefunction(AsyncAXL.get_phone))
+        self.assertTrue(inspect.iscoroutinefunction(AsyncAXL.add_directory_number))
+        self.assertTrue(inspect.isasyncgenfunction(AsyncAXL.iter_phones))
+
+    def test_delete_phone_returns_result_dictionary(self):
+        result = asyncio.run(self.ucm.delete_phone('SEP000000000001'))
+        self.assertEqual(result, {'success': True, 'response': 'Phone successfully deleted', 'error': '', 'attempts': 1})
+
+    def test_concurrent_calls_are_bounded_by_concurrency(self):
+        async def delete_phones():
+            phones = [{'phone': 'SEP{0:012d}'.format(i)} for i in range(50)]
+            return await self.ucm.bulk('delete_phone', phones)
+
+        result = asyncio.run(delete_phones())
+        stats = self.ucm.transport.stats()
+
+        self.assertEqual(result['success'], True)
+        self.assertEqual(len(result['response']), 50)
+        self.assertLessEqual(stats['connects'], 4)
+
+
+class TestAsyncAXLReplay(unittest.TestCase):
+
+    def setUp(self):
+        self.mock = MockAXL(size=250, sql_max_rows=100)
+        transport = AsyncTransport('axl_user', 'axl_pass', concurrency=4, limiter=None)
+        self.ucm = AsyncAXL('axl_user', 'axl_pass', self.mock.wsdl, '127.0.0.1', schema_cache_dir=None,
+                            transport=transport, lookup_cache=TTLCache())
+        self.ucm.client.set_options(location=self.mock.url)
+
+    def tearDown(self):
+        self.mock.close()
+
+    def test_replies_are_matched_by_request_after_a_cache_hit(self):
+        def lookup_then_delete(run):
+            # the phone is cached by the second run, the third run only makes the removePhone call
+            return run.get_phone('SEP000000000001'), run.delete_phone('SEP000000000002')
+
+        (phone, deleted), run = asyncio.run(_run(self.ucm, lookup_then_delete, self.ucm._pass))
+
+        self.assertEqual(phone['response']['name'], 'SEP000000000001')
+        self.assertEqual(deleted['response'], 'Phone successfully deleted')
+        self.assertEqual(self.mock.requests['getPhone'], 1)
+        self.assertEqual(self.mock.requests['removePhone'], 1)
+
+    def test_generator_fetches_each_page_once(self):
+        async def phones():
+            return [i async for i in self.ucm.iter_phones(page_size=100)]
+
+        self.assertEqual(len(asyncio.run(phones())), 250)
+        self.assertEqual(self.mock.requests['listPhone'], 3)
+
+    def test_list_collects_the_generator_page_by_page(self):
+        big = MockAXL(size=2500)
+        self.addCleanup(big.close)
+        self.ucm.client.set_options(location=big.url)
+
+        with mock.patch.object(AXL, '_list_page', autospec=True, side_effect=AXL._list_page) as pages:
+            phones = asyncio.run(self.ucm.get_phones(False))
+
+        self.assertEqual(len(phones), 2500)
+        self.assertEqual(big.requests['listPhone'], 3)
+        # a run sending the page and a run reading its reply per page, not a run over every earlier page
+        self.assertEqual(pages.call_count, 6)
+
+    def test_sql_query_is_fetched_by_chunk(self):
+        async def rows():
+            return [i async for i in self.ucm.iter_sql_query('select pkid, name from device', key='pkid',
+                                                            chunk_size=100)]
+
+        self.assertEqual(len(asyncio.run(rows())), 250)
+        self.assertEqual(self.mock.requests['executeSQLQuery'], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
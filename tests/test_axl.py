@@ -28,6 +28,10 @@ class TestAXL(unittest.TestCase):
         result = ucm.get_locations(mini=True)
         self.assertIsInstance(result, list) and self.assertIsInstance(result[0], tuple)
 
+    def test_iter_locations_with_small_page_size_returns_all_location_details(self):
+        result = list(ucm.iter_locations(mini=True, page_size=1))
+        self.assertEqual(result, ucm.get_locations(mini=True))
+
     def test_add_location_and_delete_location_is_successful(self):
         add_loc = ucm.add_location('test_location')
         del_loc = ucm.delete_location('test_location')
@@ -48,6 +52,12 @@ class TestAXL(unittest.TestCase):
         result = ucm.delete_location(location)
         self.assertEqual(result['success'], False) and self.assertIn(result['response'], 'not found')
 
+    # SQL
+    def test_iter_sql_query_in_small_chunks_returns_all_rows(self):
+        query = 'select pkid, name from typemodel'
+        result = list(ucm.iter_sql_query(query, key='pkid', chunk_size=50))
+        self.assertEqual(len(result), len(ucm.execute_sql_query(query)['response']))
+
     # Region
     def test_get_region_returns_successful_and_region_details(self):
         region = 'Default'
@@ -778,6 +788,18 @@ class TestAXL(unittest.TestCase):
 
         self.assertIsInstance(result, list) and self.assertIsInstance(result[0], tuple)
 
+    def test_iter_phones_yields_phones_one_at_a_time_across_pages(self):
+        phones = ['sepfffffffffff1', 'sepfffffffffff2', 'sepfffffffffff3']
+        [ucm.add_phone(i) for i in phones]
+        result = ucm.iter_phones(mini=True, page_size=2)
+        first = next(result)
+        names = [first[0]] + [i[0] for i in result]
+
+        # clean up
+        [ucm.delete_phone(i) for i in phones]
+
+        self.assertIsInstance(first, tuple) and self.assertTrue(set(phones).issubset(names))
+
     def test_add_phone_and_delete_phone_is_successful(self):
         phone = 'sepaaaabbbbcccc'
         add_phone = ucm.add_phone(phone)
@@ -854,3 +876,15 @@ class TestAXL(unittest.TestCase):
         ucm.delete_user(user)
 
         self.assertEqual(result['success'], True) and self.assertEqual(result['response']['name'], user)
+
+    def test_bulk_add_user_returns_results_in_input_order(self):
+        users = ['test_bulk_user{0}'.format(i) for i in range(10)]
+        result = ucm.bulk('add_user', [{'user_id': i, 'last_name': i} for i in users], workers=4)
+        duplicate = ucm.bulk('add_user', [{'user_id': users[0], 'last_name': 'x'}, {'user_id': 'test_bulk_new',
+                                                                                    'last_name': 'x'}])
+
+        # clean up
+        ucm.bulk('delete_user', [{'user_id': i} for i in users + ['test_bulk_new']], workers=4)
+
+        self.assertEqual(result['success'], True) and self.assertEqual(len(result['response']), len(users))
+        self.assertEqual([i['success'] for i in duplicate['response']], [False, True])
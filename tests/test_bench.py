@@ -0,0 +1,61 @@
+"""
+Benchmark suite tests, these do not need a Unified Communications server
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from axl.bench import bench_parse, bench_suite, bench_templates, bench_transport, percentile
+from axl.mock import wsdl
+
+
+class TestBenchSuite(unittest.TestCase):
+
+    def test_percentile_is_nearest_rank(self):
+        samples = list(range(1, 101))
+        self.assertEqual(percentile(samples, 50), 50)
+        self.assertEqual(percentile(samples, 99), 99)
+        self.assertEqual(percentile([3.0], 95), 3.0)
+        self.assertIsNone(percentile([], 50))
+
+    def test_suite_reports_every_method_and_size(self):
+        result = bench_suite(sizes=(10, 20), methods=('get_phone', 'get_phones'), calls=5, list_calls=1)
+
+        cases = [(i['method'], i['size'], i['calls']) for i in result['results']]
+        self.assertEqual(cases, [('get_phone', 10, 5), ('get_phones', 10, 1), ('get_phone', 20, 5), ('get_phones', 20, 1)])
+        for i in result['results']:
+            self.assertGreater(i['ops_per_sec'], 0)
+            self.assertLessEqual(i['p50'], i['p99'])
+            self.assertGreater(i['bytes_received'], 0)
+
+    def test_parse_benchmark_compares_identical_rows(self):
+        result = bench_parse(size=20, rounds=1)
+
+        self.assertEqual(sorted(result), ['execute_sql_query', 'get_phones', 'get_phones_full'])
+        for i in result.values():
+            self.assertEqual(i['rows'], 20)
+            self.assertTrue(i['identical'])
+
+    def test_template_benchmark_reports_cpu_per_call(self):
+        result = bench_templates(calls=5)
+
+        self.assertEqual(sorted(result), ['add_directory_number', 'add_phone', 'add_user'])
+        for i in result.values():
+            self.assertGreater(i['suds_cpu_us'], 0)
+            self.assertGreater(i['template_cpu_us'], 0)
+
+    def test_transport_benchmark_resumes_tls_sessions(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            with open(os.path.join(tmp, 'AXLAPI.wsdl'), 'w') as f:
+                f.write(wsdl())
+            result = bench_transport('file://' + os.path.join(tmp, 'AXLAPI.wsdl'), calls=5, idle_timeout=0)
+        finally:
+            shutil.rmtree(tmp)
+
+        self.assertEqual((result['connects'], result['handshakes'], result['resumed']), (5, 1, 4))
+
+
+if __name__ == '__main__':
+    unittest.main()
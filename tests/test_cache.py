@@ -0,0 +1,147 @@
+"""
+Lookup cache tests, these do not need a Unified Communications server
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from axl.bench import STUB_REPLY, stub_server
+from axl.cache import TTLCache
+from axl.foley import AXL
+from axl.mock import MockAXL, wsdl
+from axl.transport import PooledTransport
+
+PHONE = b"""<?xml version="1.0" encoding="UTF-8"?>
+<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/">
+<soapenv:Body><ns:getPhoneResponse xmlns:ns="http://www.cisco.com/AXL/API/10.5">
+<return><phone><name>SEP000000000001</name></phone></return>
+</ns:getPhoneResponse></soapenv:Body></soapenv:Envelope>"""
+
+REMOVED = STUB_REPLY.format('removePhone').encode('utf-8')
+
+
+class Clock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache(unittest.TestCase):
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = TTLCache(maxsize=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_entries_expire_after_ttl(self):
+        clock = Clock()
+        cache = TTLCache(ttl=10, clock=clock)
+        cache.put('a', 1)
+        clock.now = 10
+
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats()['expired'], 1)
+
+    def test_entries_of_a_kind_are_invalidated(self):
+        cache = TTLCache()
+        cache.put(('region', 'a'), 1)
+        cache.put(('region', 'b'), 2)
+        cache.put(('location', 'a'), 3)
+        cache.invalidate_kind('region')
+
+        self.assertIsNone(cache.get(('region', 'b')))
+        self.assertEqual(cache.get(('location', 'a')), 3)
+        self.assertEqual(cache.stats()['invalidations'], 2)
+
+
+
+class TestLookupCache(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.wsdl = 'file://' + os.path.join(self.dir, 'AXLAPI.wsdl')
+        with open(os.path.join(self.dir, 'AXLAPI.wsdl'), 'w') as f:
+            f.write(wsdl())
+        self.server = stub_server(replies=[(200, PHONE), (200, REMOVED), (200, PHONE)])
+        transport = PooledTransport('axl_user', 'axl_pass', limiter=None)
+        self.ucm = AXL('axl_user', 'axl_pass', self.wsdl, '127.0.0.1', schema_cache_dir=None,
+                       transport=transport, lookup_cache=TTLCache())
+        self.ucm.client.set_options(location=self.server.url)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.dir)
+
+    def test_repeated_lookup_is_served_from_cache(self):
+        first = self.ucm.get_phone('SEP000000000001')
+        second = self.ucm.get_phone('SEP000000000001')
+
+        self.assertEqual(first['response']['name'], second['response']['name'])
+        self.assertEqual(second['attempts'], 0)
+        self.assertEqual(self.ucm.lookup_cache.stats()['hits'], 1)
+
+    def test_delete_invalidates_the_cached_object(self):
+        self.ucm.get_phone('SEP000000000001')
+        self.ucm.delete_phone(phone='SEP000000000001')
+        result = self.ucm.get_phone('SEP000000000001')
+
+        self.assertEqual(result['attempts'], 1)
+        self.assertEqual(self.ucm.lookup_cache.stats()['invalidations'], 1)
+
+
+class TestLookupCacheKinds(unittest.TestCase):
+
+    def setUp(self):
+        self.mock = MockAXL(size=100)
+        self.ucm = AXL('axl_user', 'axl_pass', self.mock.wsdl, '127.0.0.1', schema_cache_dir=None,
+                       transport=PooledTransport('axl_user', 'axl_pass', limiter=None), lookup_cache=TTLCache())
+        self.ucm.client.set_options(location=self.mock.url)
+
+    def tearDown(self):
+        self.mock.close()
+
+    def test_directory_numbers_are_not_cached(self):
+        # a pattern alone does not name a directory number, it may be in several partitions
+        self.ucm.get_directory_number('1')
+        self.ucm.get_directory_number('1')
+
+        self.assertEqual(self.mock.requests['getLine'], 2)
+        self.assertEqual(self.ucm.lookup_cache.stats()['size'], 0)
+
+    def test_names_are_compared_case_insensitively(self):
+        self.ucm.get_region('Region000000')
+        self.ucm.get_region('REGION000000')
+        self.ucm.delete_region('region000000')
+        self.ucm.get_region('Region000000')
+
+        self.assertEqual(self.mock.requests['getRegion'], 2)
+
+    def test_callers_get_their_own_copy_of_a_cached_result(self):
+        first = self.ucm.get_region('region000000')
+        first['response']['name'] = 'changed'
+        second = self.ucm.get_region('region000000')
+
+        self.assertEqual(second['response']['name'], 'region000000')
+        self.assertEqual(self.mock.requests['getRegion'], 1)
+
+    def test_update_region_invalidates_every_region(self):
+        self.ucm.get_region('region000000')
+        self.ucm.update_region('region000001')
+        self.ucm.get_region('region000000')
+
+        self.assertEqual(self.mock.requests['getRegion'], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Raw list and SQL parsing tests against the mock AXL server, these do not need a Unified Communications server
+"""
+import unittest
+
+from suds.sudsobject import Object
+
+from axl.fastparse import RowParser, returned_node
+from axl.foley import AXL, AXLFault
+from axl.mock import MockAXL
+from axl.transport import PooledTransport
+
+REPLY = """<?xml version="1.0" encoding="UTF-8"?>
+<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/">
+<soapenv:Body><ns:listPhoneResponse xmlns:ns="http://www.cisco.com/AXL/API/10.5"><return>
+<phone uuid="{1}"><name>SEP1</name><class>Phone</class><locationName uuid="{2}">Hub_None</locationName></phone>
+<phone uuid="{3}"><name>SEP2</name><description/></phone>
+</return></ns:listPhoneResponse></soapenv:Body></soapenv:Envelope>"""
+
+
+def plain(value):
+    """
+    A suds result as dictionaries and lists
+    """
+    if isinstance(value, Object):
+        return dict((k, plain(v)) for k, v in value)
+    if isinstance(value, list):
+        return [plain(i) for i in value]
+    return value
+
+
+class TestFastParse(unittest.TestCase):
+
+    def setUp(self):
+        self.mock = MockAXL(size=30, padding=2)
+        self.ucm = AXL('axl_user', 'axl_pass', self.mock.wsdl, '127.0.0.1', schema_cache_dir=None,
+                       transport=PooledTransport('axl_user', 'axl_pass', limiter=None))
+        self.ucm.client.set_options(location=self.mock.url)
+
+    def tearDown(self):
+        self.mock.close()
+
+    def test_mini_tuples_are_identical(self):
+        self.assertEqual(self.ucm.get_phones(raw=True), self.ucm.get_phones())
+        self.assertEqual(self.ucm.get_route_patterns(raw=True), self.ucm.get_route_patterns())
+        self.assertEqual(list(self.ucm.iter_users(page_size=7, raw=True)), list(self.ucm.iter_users(page_size=7)))
+
+    def test_objects_match_suds(self):
+        self.ucm.add_phone('SEP0000000000AA', lines=[('1000', 'Internal_PT', 'A', 'A', '', '')])
+        self.ucm.add_phone('SEP0000000000AB', lines=[('1001', 'Internal_PT', 'B', 'B', '', ''),
+                                                     ('1002', 'Internal_PT', 'C', 'C', '', '')])
+        tags = ['name', 'description', 'class', 'devicePoolName', 'lines']
+
+        raw = self.ucm.get_phones(returned_tags=tags, raw=True)
+
+        self.assertEqual(raw, plain(self.ucm.get_phones(returned_tags=tags)))
+        self.assertIsInstance(raw[0], dict)
+        self.assertEqual(raw[-1]['lines']['line'][1]['dirn']['pattern'], '1002')
+
+    def test_sql_rows_match_suds(self):
+        query = 'select pkid, name, description from device'
+        raw = self.ucm.execute_sql_query(query, raw=True)
+
+        self.assertTrue(raw['success'])
+        self.assertEqual(raw['response'], plain(self.ucm.execute_sql_query(query)['response']))
+
+    def test_faults(self):
+        result = self.ucm.execute_sql_query('select from', raw=True)
+        self.assertFalse(result['success'])
+        self.assertEqual(result['response'], 'Syntax error')
+
+        with MockAXL(size=10, fault_rate=1.0) as mock:
+            self.ucm.client.set_options(location=mock.url)
+            self.assertRaises(AXLFault, self.ucm.get_phones, raw=True)
+
+    def test_reply_is_parsed_as_it_arrives(self):
+        method = self.ucm.client.wsdl.services[0].ports[0].methods['listPhone']
+        parser = RowParser(returned_node(method, 'phone'))
+        reply = REPLY.encode('utf-8')
+        for i in range(len(reply)):
+            parser.feed(reply[i:i + 1])
+            if i == reply.index(b'</phone>') + len('</phone>'):
+                self.assertEqual(len(parser.rows), 1)
+
+        self.assertEqual(parser.close(), [
+            {'_uuid': '{1}', 'name': 'SEP1', 'cls': 'Phone', 'locationName': {'value': 'Hub_None', '_uuid': '{2}'}},
+            {'_uuid': '{3}', 'name': 'SEP2', 'description': ''},
+        ])
+
+if __name__ == '__main__':
+    unittest.main()
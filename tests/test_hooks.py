@@ -0,0 +1,63 @@
+"""
+Instrumentation tests against the mock AXL server, these do not need a Unified Communications server
+"""
+import unittest
+
+from axl.foley import AXL
+from axl.hooks import LatencyHistogram
+from axl.mock import MockAXL
+from axl.transport import PooledTransport
+
+
+class TestLatencyHistogram(unittest.TestCase):
+
+    def test_percentiles_fall_in_the_right_bucket(self):
+        histogram = LatencyHistogram(buckets=(0.01, 0.1, 1.0))
+        for i in range(90):
+            histogram.observe(0.005)
+        for i in range(10):
+            histogram.observe(0.5, error=True)
+
+        self.assertLessEqual(histogram.percentile(50), 0.01)
+        self.assertGreater(histogram.percentile(95), 0.1)
+        self.assertLessEqual(histogram.percentile(99), 0.5)
+        self.assertEqual(histogram.stats()['errors'], 10)
+
+
+class TestHooks(unittest.TestCase):
+
+    def setUp(self):
+        self.mock = MockAXL(size=10)
+        self.ucm = AXL('axl_user', 'axl_pass', self.mock.wsdl, '127.0.0.1', schema_cache_dir=None,
+                       transport=PooledTransport('axl_user', 'axl_pass', limiter=None))
+        self.ucm.client.set_options(location=self.mock.url)
+
+    def tearDown(self):
+        self.mock.close()
+
+    def test_hooks_see_every_operation(self):
+        before, after = [], []
+        self.ucm.instruments.add_hook(before=before.append, after=after.append)
+
+        self.ucm.get_phone('SEP000000000001')
+        self.ucm.get_phone('SEP00000000FFFF')
+
+        self.assertEqual([i.operation for i in before], ['getPhone', 'getPhone'])
+        self.assertEqual([i.status for i in after], [200, 500])
+        event = after[0]
+        self.assertGreater(event.request_bytes, 0)
+        self.assertGreater(event.response_bytes, 0)
+        self.assertGreater(event.seconds, event.serialize_seconds + event.parse_seconds)
+
+    def test_latency_is_counted_per_operation(self):
+        self.ucm.get_phones()
+        self.ucm.add_region('test_region')
+
+        latency = self.ucm.instruments.latency()
+        self.assertEqual(latency['listPhone']['count'], 1)
+        self.assertEqual(latency['addRegion']['count'], 1)
+        self.assertGreater(latency['addRegion']['p99'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
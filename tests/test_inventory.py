@@ -0,0 +1,108 @@
+"""
+Bulk inventory reader tests, these do not need a Unified Communications server
+"""
+import sqlite3
+import unittest
+
+from axl.inventory import as_phone, phone_query
+from axl.tests.sqlaxl import SQLAXL
+
+PHONES = [
+    {'pkid': 'a1', 'name': 'SEP1', 'description': 'Phone 1', 'product': 'Cisco 7841', 'class': 'Phone',
+     'protocol': 'SIP', 'fkdevicepool': 'd1', 'devicepoolname': 'DP1', 'fkcallingsearchspace': None,
+     'callingsearchspacename': None, 'fklocation': 'l1', 'locationname': 'Hub_None', 'fkenduser': 'e1',
+     'owneruserid': 'jsmith'},
+    {'pkid': 'a2', 'name': 'SEP2', 'description': '', 'product': 'Cisco 7841', 'class': 'Phone',
+     'protocol': 'SIP', 'fkdevicepool': 'd1', 'devicepoolname': 'DP1', 'fkcallingsearchspace': 'c1',
+     'callingsearchspacename': 'CSS1', 'fklocation': 'l1', 'locationname': 'Hub_None', 'fkenduser': None,
+     'owneruserid': None},
+    {'pkid': 'a3', 'name': 'SEP3', 'description': '', 'product': 'Cisco 7841', 'class': 'Phone',
+     'protocol': 'SIP', 'fkdevicepool': 'd1', 'devicepoolname': 'DP1', 'fkcallingsearchspace': None,
+     'callingsearchspacename': None, 'fklocation': 'l1', 'locationname': 'Hub_None', 'fkenduser': None,
+     'owneruserid': None},
+]
+
+LINES = [
+    {'pkid': 'm1', 'fkdevice': 'a1', 'numplanindex': '2', 'display': 'J Smith', 'displayascii': 'J Smith',
+     'label': '', 'e164mask': '', 'fknumplan': 'n2', 'dnorpattern': '1002', 'fkroutepartition': 'p1',
+     'routepartitionname': 'LINE_PT'},
+    {'pkid': 'm2', 'fkdevice': 'a1', 'numplanindex': '1', 'display': 'J Smith', 'displayascii': 'J Smith',
+     'label': '', 'e164mask': '', 'fknumplan': 'n1', 'dnorpattern': '1001', 'fkroutepartition': None,
+     'routepartitionname': None},
+    {'pkid': 'm3', 'fkdevice': 'a3', 'numplanindex': '1', 'display': '', 'displayascii': '',
+     'label': '', 'e164mask': '', 'fknumplan': 'n3', 'dnorpattern': '1003', 'fkroutepartition': None,
+     'routepartitionname': None},
+]
+
+
+CLUSTER = """
+create table typeproduct (enum integer, name text);
+create table typeclass (enum integer, name text);
+create table typedeviceprotocol (enum integer, name text);
+create table devicepool (pkid text, name text);
+create table callingsearchspace (pkid text, name text);
+create table location (pkid text, name text);
+create table enduser (pkid text, userid text);
+create table routepartition (pkid text, name text);
+create table numplan (pkid text, dnorpattern text, fkroutepartition text);
+create table device (pkid text, name text, description text, tkclass integer, tkproduct integer,
+                     tkdeviceprotocol integer, fkdevicepool text, fkcallingsearchspace text, fklocation text,
+                     fkenduser text);
+create table devicenumplanmap (pkid text, fkdevice text, fknumplan text, numplanindex integer, display text,
+                               displayascii text, label text, e164mask text);
+insert into typeproduct values (1, 'Cisco 7841');
+insert into typeproduct values (2, 'Cisco IOS H.323 Gateway');
+insert into typeclass values (1, 'Phone');
+insert into typeclass values (2, 'Gateway');
+insert into typedeviceprotocol values (11, 'SIP');
+insert into typedeviceprotocol values (2, 'H.225');
+insert into devicepool values ('d1', 'DP1');
+insert into callingsearchspace values ('c1', 'CSS1');
+insert into location values ('l1', 'Hub_None');
+insert into enduser values ('e1', 'jsmith');
+insert into routepartition values ('p1', 'LINE_PT');
+insert into numplan values ('n1', '1001', null);
+insert into numplan values ('n2', '1002', 'p1');
+insert into numplan values ('n3', '1003', null);
+insert into device values ('a3', 'SEP3', '', 1, 1, 11, 'd1', null, 'l1', null);
+insert into device values ('a1', 'SEP1', 'Phone 1', 1, 1, 11, 'd1', null, 'l1', 'e1');
+insert into device values ('a2', 'SEP2', '', 1, 1, 11, 'd1', 'c1', 'l1', null);
+insert into device values ('a4', 'GW1', '', 2, 2, 2, 'd1', null, 'l1', null);
+insert into devicenumplanmap values ('m1', 'a1', 'n2', 2, 'J Smith', 'J Smith', '', '');
+insert into devicenumplanmap values ('m2', 'a1', 'n1', 1, 'J Smith', 'J Smith', '', '');
+insert into devicenumplanmap values ('m3', 'a3', 'n3', 1, '', '', '', '');
+insert into devicenumplanmap values ('m4', 'a4', 'n3', 1, '', '', '', '');
+"""
+
+
+class TestInventory(unittest.TestCase):
+
+    def test_phones_are_shaped_like_get_phone(self):
+        phone = as_phone(PHONES[0], LINES[:2])
+
+        self.assertEqual(phone['_uuid'], '{A1}')
+        self.assertEqual(phone['devicePoolName'], {'_uuid': '{D1}', 'value': 'DP1'})
+        self.assertIsNone(phone['callingSearchSpaceName'])
+        self.assertEqual(phone['ownerUserName']['value'], 'jsmith')
+        self.assertEqual([i['dirn']['pattern'] for i in phone['lines']['line']], ['1001', '1002'])
+        self.assertEqual(phone['lines']['line'][1]['dirn']['routePartitionName']['value'], 'LINE_PT')
+
+    def test_names_are_quoted(self):
+        self.assertIn("d.name like 'O''Brien%'", phone_query("O'Brien%"))
+
+    def test_lines_are_fetched_per_batch(self):
+        cluster = sqlite3.connect(':memory:')
+        cluster.executescript(CLUSTER)
+        ucm = SQLAXL(cluster)
+        phones = ucm.get_phone_inventory(batch_size=2)
+
+        self.assertEqual([i['name'] for i in phones], ['SEP1', 'SEP2', 'SEP3'])
+        self.assertEqual([len(i['lines']['line']) for i in phones], [2, 0, 1])
+        self.assertEqual(phones[0], as_phone(PHONES[0], LINES[:2]))
+        self.assertEqual(phones[1]['callingSearchSpaceName']['value'], 'CSS1')
+        # one phone query and a lines query per batch
+        self.assertEqual(len(ucm.queries), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+"""
+Metrics registry tests against the mock AXL server, these do not need a Unified Communications server
+"""
+import unittest
+import urllib.request
+
+from axl.foley import AXL
+from axl.metrics import CONTENT_TYPE, MetricsRegistry
+from axl.mock import MockAXL
+from axl.transport import PooledTransport
+
+
+class TestMetricsRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.mock = MockAXL(size=10)
+        self.ucm = AXL('axl_user', 'axl_pass', self.mock.wsdl, '127.0.0.1', schema_cache_dir=None,
+                       transport=PooledTransport('axl_user', 'axl_pass', limiter=True))
+        self.ucm.client.set_options(location=self.mock.url)
+        self.registry = MetricsRegistry()
+        self.registry.register(self.ucm)
+
+    def tearDown(self):
+        self.mock.close()
+
+    def test_operations_are_counted_per_host_and_status(self):
+        self.ucm.get_phone('SEP000000000001')
+        self.ucm.get_phone('SEP000000000002')
+        self.ucm.get_phone('SEP00000000FFFF')
+
+        lines = self.registry.render().splitlines()
+        self.assertIn('axl_requests_total{host="127.0.0.1",operation="getPhone",status="200"} 2', lines)
+        self.assertIn('axl_requests_total{host="127.0.0.1",operation="getPhone",status="500"} 1', lines)
+        self.assertIn('axl_request_duration_seconds_bucket{host="127.0.0.1",le="+Inf",operation="getPhone"} 3', lines)
+        self.assertIn('axl_in_flight{host="127.0.0.1"} 0', lines)
+        self.assertIn('axl_pool_connects_total{host="127.0.0.1"} 1', lines)
+        self.assertIn('axl_throttled_total{host="127.0.0.1",limiter="read"} 0', lines)
+        self.assertEqual(lines[-1], '# EOF')
+
+    def test_metrics_are_served_over_http(self):
+        self.ucm.get_phone('SEP000000000001')
+        server = self.registry.serve(port=0)
+        try:
+            response = urllib.request.urlopen(server.url)
+            body = response.read().decode('utf-8')
+        finally:
+            server.shutdown()
+            server.server_close()
+
+        self.assertEqual(response.headers['Content-Type'], CONTENT_TYPE)
+        self.assertIn('# TYPE axl_request_duration_seconds histogram', body)
+
+
+if __name__ == '__main__':
+    unittest.main()
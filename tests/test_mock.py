@@ -0,0 +1,147 @@
+"""
+Mock AXL server tests, these do not need a Unified Communications server
+"""
+import time
+import unittest
+
+from suds.transport import Request, TransportError
+
+from axl.foley import AXL
+from axl.mock import MockAXL
+from axl.transport import PooledTransport
+
+GET_PHONE = b"""<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/"><soapenv:Body>
+<ns:getPhone xmlns:ns="http://www.cisco.com/AXL/API/10.5"><name>SEP000000000000</name></ns:getPhone>
+</soapenv:Body></soapenv:Envelope>"""
+
+
+class TestMockAXL(unittest.TestCase):
+
+    def setUp(self):
+        self.mock = MockAXL(size=250, sql_max_rows=100)
+        transport = PooledTransport('axl_user', 'axl_pass', limiter=None)
+        self.ucm = AXL('axl_user', 'axl_pass', self.mock.wsdl, '127.0.0.1', schema_cache_dir=None,
+                       transport=transport)
+        self.ucm.client.set_options(location=self.mock.url)
+
+    def tearDown(self):
+        self.mock.close()
+
+    def test_list_is_paged(self):
+        phones = list(self.ucm.iter_phones(page_size=100))
+
+        self.assertEqual(len(phones), 250)
+        self.assertEqual(phones[0], ('SEP000000000000', 'Cisco 7841', 'SIP', 'Hub_None'))
+        self.assertEqual(self.mock.stats()['requests']['listPhone'], 3)
+
+    def test_route_lists_are_listed_with_list_route_list(self):
+        # listRoutelist is not an AXL operation, the WSDL only has listRouteList
+        route_lists = self.ucm.get_route_lists()
+
+        self.assertEqual(len(route_lists), 2)
+        self.assertEqual(self.mock.stats()['requests']['listRouteList'], 1)
+
+    def test_add_get_and_remove(self):
+        self.assertEqual(self.ucm.add_region('test_region')['success'], True)
+        self.assertEqual(self.ucm.add_region('test_region')['response'], 'Region already exists')
+        self.assertEqual(self.ucm.get_region('test_region')['response']['name'], 'test_region')
+
+        self.assertEqual(self.ucm.delete_region('test_region')['success'], True)
+        self.assertEqual(self.ucm.get_region('test_region')['response'], 'Region: test_region not found')
+
+    def test_large_sql_query_is_chunked(self):
+        rows = list(self.ucm.iter_sql_query('select pkid, name from device', key='pkid', chunk_size=200))
+
+        self.assertEqual(len(rows), 250)
+        self.assertEqual(len(set(i['pkid'] for i in rows)), 250)
+
+
+class TestRegionMatrix(unittest.TestCase):
+
+    def setUp(self):
+        self.mock = MockAXL(size=10, sizes={'region': 5})
+        self.ucm = AXL('axl_user', 'axl_pass', self.mock.wsdl, '127.0.0.1', schema_cache_dir=None,
+                       transport=PooledTransport('axl_user', 'axl_pass', limiter=None))
+        self.ucm.client.set_options(location=self.mock.url)
+        self.regions = ['region000000', 'region000001']
+
+    def tearDown(self):
+        self.mock.close()
+
+    def test_each_relationship_is_sent_once(self):
+        result = self.ucm.update_region_matrix(self.regions)
+
+        self.assertTrue(result['success'], result['error'])
+        self.assertEqual(result['updated'], 9)
+        self.assertEqual(self.mock.stats()['requests'], {'listRegion': 1, 'updateRegion': 2})
+
+        matrix = self.ucm._region_matrix(['region000004', 'region000001'])[1]
+        self.assertEqual(sorted(matrix['region000004']), self.regions)
+        self.assertEqual(matrix['region000004']['region000000']['bandwidth'], '64 kbps')
+        self.assertEqual(matrix['region000001']['region000001']['bandwidth'], '256 kbps')
+
+    def test_only_changed_relationships_are_sent(self):
+        self.ucm.update_region_matrix(self.regions)
+        self.ucm.update_region_matrix(['region000002'] + self.regions, bandwidth='64 kbps')
+
+        result = self.ucm.update_region_matrix(['region000002'] + self.regions)
+        self.assertEqual(result['updated'], 0)
+        self.assertEqual(self.mock.stats()['requests']['updateRegion'], 3)
+
+    def test_relationships_are_split_across_requests(self):
+        result = self.ucm.update_region_matrix(self.regions, batch_size=2)
+
+        self.assertEqual(len(result['response']), 5)
+        self.assertEqual(self.mock.stats()['requests']['updateRegion'], 5)
+
+    def test_regions_are_read_page_by_page(self):
+        result = self.ucm.update_region_matrix(self.regions, page_size=2)
+
+        self.assertEqual(result['updated'], 9)
+        self.assertEqual(self.mock.stats()['requests']['listRegion'], 3)
+
+    def test_region_names_are_compared_case_insensitively(self):
+        self.ucm.update_region_matrix(self.regions)
+        result = self.ucm.update_region_matrix(['REGION000000', 'Region000001'])
+
+        self.assertTrue(result['success'], result['error'])
+        self.assertEqual(result['updated'], 0)
+
+    def test_unknown_regions_fail(self):
+        result = self.ucm.update_region_matrix(['reg_not_exists'] + self.regions)
+
+        self.assertFalse(result['success'])
+        self.assertEqual(result['error'], '1 of 3 updateRegion requests failed')
+        self.assertEqual(result['response'][0]['response'], 'Region: reg_not_exists not found')
+
+
+class TestMockFaults(unittest.TestCase):
+
+    def tearDown(self):
+        self.mock.close()
+
+    def send(self):
+        transport = PooledTransport('axl_user', 'axl_pass', limiter=None, retry=None)
+        request = Request(self.mock.url, GET_PHONE)
+        request.headers = {'SOAPAction': '"CUCM:DB ver=10.5 getPhone"'}
+        try:
+            return transport.send(request).code
+        except TransportError as e:
+            return e.httpcode
+
+    def test_requests_over_the_rate_limit_are_throttled(self):
+        self.mock = MockAXL(size=1, rate_limit=2)
+
+        self.assertEqual([self.send() for i in range(3)], [200, 200, 503])
+        self.assertEqual(self.mock.stats()['throttled'], 1)
+
+    def test_latency_is_added_to_every_call(self):
+        self.mock = MockAXL(size=1, latency=0.2)
+        start = time.monotonic()
+        self.send()
+
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+
+
+if __name__ == '__main__':
+    unittest.main()
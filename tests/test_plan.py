@@ -0,0 +1,90 @@
+"""
+Desired state plan tests against the mock AXL server, these do not need a Unified Communications server
+"""
+import unittest
+
+from axl.cache import TTLCache
+from axl.foley import AXL
+from axl.mock import MockAXL
+from axl.plan import plan
+from axl.transport import PooledTransport
+
+
+class TestPlan(unittest.TestCase):
+
+    def setUp(self):
+        self.mock = MockAXL(size=100)
+        self.ucm = AXL('axl_user', 'axl_pass', self.mock.wsdl, '127.0.0.1', schema_cache_dir=None,
+                       transport=PooledTransport('axl_user', 'axl_pass', limiter=None))
+        self.ucm.client.set_options(location=self.mock.url)
+        self.desired = {
+            'location': [{'location': 'SITE1_LOC'}, {'location': 'location000000', 'within_audio_bw': 512}],
+            'region': [{'region': 'SITE1_REG'}, {'region': 'region000000', 'absent': True}],
+            'device_pool': [{'device_pool': 'SITE1_DP', 'region': 'SITE1_REG', 'location': 'SITE1_LOC'}],
+        }
+
+    def tearDown(self):
+        self.mock.close()
+
+    def test_plan_holds_the_minimal_changes_in_dependency_order(self):
+        changes = plan(self.ucm, self.desired)
+
+        self.assertEqual(changes.summary(), {'add': 3, 'update': 1, 'delete': 1, 'unchanged': 0})
+        self.assertEqual([str(i) for i in changes.changes], [
+            '+ location SITE1_LOC',
+            "~ location location000000 withinAudioBandwidth: '0' -> '512'",
+            '+ region SITE1_REG',
+            '+ device_pool SITE1_DP',
+            '- region region000000',
+        ])
+
+    def test_a_converged_site_sends_no_writes(self):
+        result = plan(self.ucm, self.desired).apply(self.ucm)
+        self.assertTrue(result['success'], result['error'])
+
+        before = self.mock.stats()['requests']
+        changes = plan(self.ucm, self.desired)
+        requests = self.mock.stats()['requests']
+
+        self.assertEqual(len(changes), 0)
+        self.assertEqual(changes.summary()['unchanged'], 5)
+        self.assertEqual(dict((k, v - before.get(k, 0)) for k, v in requests.items() if v != before.get(k)),
+                         {'listLocation': 1, 'listRegion': 1, 'listDevicePool': 1})
+
+    def test_plan_can_be_applied_concurrently(self):
+        result = plan(self.ucm, self.desired).apply(self.ucm, workers=4)
+
+        self.assertTrue(result['success'], result['error'])
+        self.assertEqual(len(plan(self.ucm, self.desired)), 0)
+
+    def test_updates_go_through_the_axl_methods(self):
+        self.ucm.lookup_cache = TTLCache()
+        self.ucm.get_location('location000000')
+
+        result = plan(self.ucm, self.desired).apply(self.ucm)
+        location = self.ucm.get_location('location000000')
+
+        self.assertEqual(result['response'][1], {'success': True, 'response': 'Location successfully updated',
+                                                 'error': '', 'attempts': 1})
+        # the update removed the location from the lookup cache
+        self.assertEqual(location['attempts'], 1)
+        self.assertEqual(str(location['response']['withinAudioBandwidth']), '512')
+
+    def test_concurrent_responses_are_in_plan_order(self):
+        result = plan(self.ucm, self.desired).apply(self.ucm, workers=4)
+
+        self.assertEqual([i['response'] for i in result['response']], [
+            'Location successfully added',
+            'Location successfully updated',
+            'Region successfully added',
+            'Device pool successfully added',
+            'Region successfully deleted',
+        ])
+
+    def test_unknown_kinds_are_rejected(self):
+        with self.assertRaises(ValueError):
+            plan(self.ucm, {'gateway': [{'gateway': 'gw1'}]})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,59 @@
+"""
+returnedTags projection tests against the mock AXL server, these do not need a Unified Communications server
+"""
+import unittest
+
+from axl.cache import TTLCache
+from axl.foley import AXL
+from axl.mock import MockAXL
+from axl.projection import returned_tags
+from axl.transport import PooledTransport
+
+
+class TestReturnedTags(unittest.TestCase):
+
+    def test_paths_are_nested(self):
+        self.assertEqual(returned_tags(['name', 'lines.line.dirn.pattern', 'lines.line.index']),
+                         {'name': '', 'lines': {'line': {'dirn': {'pattern': ''}, 'index': ''}}})
+
+
+class TestProjection(unittest.TestCase):
+
+    def setUp(self):
+        self.mock = MockAXL(size=10)
+        self.ucm = AXL('axl_user', 'axl_pass', self.mock.wsdl, '127.0.0.1', schema_cache_dir=None,
+                       transport=PooledTransport('axl_user', 'axl_pass', limiter=None), lookup_cache=TTLCache())
+        self.ucm.client.set_options(location=self.mock.url)
+
+    def tearDown(self):
+        self.mock.close()
+
+    def test_get_returns_the_projected_fields(self):
+        result = self.ucm.get_phone('SEP000000000001', returned_tags=['name', 'devicePoolName'])
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['response']['name'], 'SEP000000000001')
+        self.assertEqual(result['response']['devicePoolName']['value'], 'Default')
+        self.assertFalse(hasattr(result['response'], 'description'))
+
+    def test_projected_get_is_not_cached(self):
+        self.ucm.get_phone('SEP000000000001', returned_tags=['name'])
+        result = self.ucm.get_phone('SEP000000000001')
+
+        self.assertEqual(result['response']['description'], 'Phone SEP000000000001')
+
+    def test_list_returns_dictionaries(self):
+        phones = self.ucm.get_phones(returned_tags=['name'])
+
+        self.assertEqual(len(phones), 10)
+        self.assertEqual(phones[0]['name'], 'SEP000000000000')
+        self.assertFalse(hasattr(phones[0], 'product'))
+
+    def test_unknown_fields_are_rejected_before_sending(self):
+        self.assertRaises(ValueError, self.ucm.get_phone, 'SEP000000000001', returned_tags=['nam'])
+        self.assertRaises(ValueError, self.ucm.get_phones, returned_tags=['name.value'])
+        self.assertEqual(self.mock.stats()['requests'], {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Retry tests against a local stub server, these do not need a Unified Communications server
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from suds.transport import Request, TransportError
+
+from axl.bench import stub_server
+from axl.foley import AXL
+from axl.mock import wsdl
+from axl.retry import RetryPolicy, recording
+from axl.tests.test_transport import get_phone_request
+from axl.transport import PooledTransport
+
+DUPLICATE = b"""<?xml version="1.0" encoding="UTF-8"?>
+<soapenv:Envelope xmlns:soapenv="http://schemas.xmlsoap.org/soap/envelope/"><soapenv:Body><soapenv:Fault>
+<faultcode>soapenv:Server</faultcode>
+<faultstring>Could not insert new row - duplicate value in a UNIQUE INDEX column (Unique Index:).</faultstring>
+</soapenv:Fault></soapenv:Body></soapenv:Envelope>"""
+
+BAD_GATEWAY = (502, b'')
+
+
+class TestRetry(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.wsdl = 'file://' + os.path.join(self.dir, 'AXLAPI.wsdl')
+        with open(os.path.join(self.dir, 'AXLAPI.wsdl'), 'w') as f:
+            f.write(wsdl())
+        self.transport = PooledTransport('axl_user', 'axl_pass', limiter=None, retry=RetryPolicy(backoff=0))
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.dir)
+
+    def ucm(self):
+        ucm = AXL('axl_user', 'axl_pass', self.wsdl, '127.0.0.1', schema_cache_dir=None, transport=self.transport)
+        ucm.client.set_options(location=self.server.url)
+        return ucm
+
+    def test_read_is_retried_after_bad_gateway(self):
+        self.server = stub_server(replies=[BAD_GATEWAY, BAD_GATEWAY])
+        with recording() as record:
+            reply = self.transport.send(get_phone_request(self.server.url))
+
+        self.assertEqual(reply.code, 200)
+        self.assertEqual(record.attempts, 3)
+
+    def test_remove_is_not_retried(self):
+        self.server = stub_server(replies=[BAD_GATEWAY])
+        request = Request(self.server.url, b'<removePhone/>')
+        request.headers = {'SOAPAction': '"CUCM:DB ver=10.5 removePhone"'}
+
+        with self.assertRaises(TransportError):
+            self.transport.send(request)
+
+    def test_add_applied_by_an_earlier_attempt_is_successful(self):
+        self.server = stub_server(replies=[BAD_GATEWAY, (500, DUPLICATE)])
+        result = self.ucm().add_region('test_region')
+
+        self.assertEqual(result['success'], True)
+        self.assertEqual(result['applied_on_retry'], True)
+        self.assertEqual(result['attempts'], 2)
+
+    def test_add_of_an_object_that_existed_before_is_marked(self):
+        # the first attempt never reached UCM, the region was there before the job ran
+        self.server = stub_server(replies=[BAD_GATEWAY, (500, DUPLICATE)])
+        ucm = self.ucm()
+        existing = ucm.add_region('test_region')
+        clean = ucm.add_region('new_region')
+
+        self.assertNotIn('applied_on_retry', clean)
+        self.assertEqual(existing['success'], True)
+        self.assertEqual(existing['applied_on_retry'], True)
+
+    def test_duplicate_add_without_retry_fails(self):
+        self.server = stub_server(replies=[(500, DUPLICATE)])
+        result = self.ucm().add_region('test_region')
+
+        self.assertEqual(result['success'], False)
+        self.assertEqual(result['response'], 'Region already exists')
+        self.assertEqual(result['attempts'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
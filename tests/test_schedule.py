@@ -0,0 +1,98 @@
+"""
+Dependency scheduling tests against the mock AXL server, these do not need a Unified Communications server
+"""
+import unittest
+
+from axl.foley import AXL
+from axl.mock import MockAXL
+from axl.schedule import schedule, waves
+from axl.transport import PooledTransport
+
+SITE = [
+    ('add_phone', {'phone': 'SEP0000000A0001', 'device_pool': 'SITE1_DP', 'css': 'SITE1_CSS',
+                   'lines': [('1001', 'SITE1_PT', 'Jim', 'Jim', 'Jim', '1001')]}),
+    ('add_directory_number', {'pattern': '1001', 'route_partition_name': 'SITE1_PT'}),
+    ('add_calling_search_space', {'calling_search_space': 'SITE1_CSS', 'members': ['SITE1_PT']}),
+    ('add_device_pool', {'device_pool': 'SITE1_DP', 'region': 'SITE1_REG', 'location': 'SITE1_LOC'}),
+    ('add_partition', {'partition': 'SITE1_PT'}),
+    ('add_region', {'region': 'SITE1_REG'}),
+    ('add_location', {'location': 'SITE1_LOC'}),
+    ('add_user', {'user_id': 'jim', 'last_name': 'Smith'}),
+]
+
+
+class TestSchedule(unittest.TestCase):
+
+    def setUp(self):
+        self.mock = MockAXL(size=10)
+        self.ucm = AXL('axl_user', 'axl_pass', self.mock.wsdl, '127.0.0.1', schema_cache_dir=None,
+                       transport=PooledTransport('axl_user', 'axl_pass', limiter=None))
+        self.ucm.client.set_options(location=self.mock.url)
+
+    def tearDown(self):
+        self.mock.close()
+
+    def test_calls_are_grouped_in_dependency_waves(self):
+        names = [sorted(i.method for i in wave) for wave in waves(SITE)]
+
+        self.assertEqual(names, [
+            ['add_location', 'add_partition', 'add_region', 'add_user'],
+            ['add_calling_search_space', 'add_device_pool', 'add_directory_number'],
+            ['add_phone'],
+        ])
+
+    def test_cycles_are_rejected(self):
+        with self.assertRaises(ValueError):
+            waves([('add_route_group', {'route_group': 'rg1', 'members': ['gw1']}),
+                   ('add_h323_gateway', {'h323_gateway': 'gw1', 'device_pool': 'dp1'}),
+                   ('add_device_pool', {'device_pool': 'dp1', 'route_group': 'rg1'})])
+
+    def test_directory_numbers_are_keyed_by_pattern_and_partition(self):
+        names = [sorted(str(i) for i in wave) for wave in waves([
+            ('delete_directory_number', {'directory_number': '1001', 'route_partition_name': 'SITE1_PT'}),
+            ('delete_directory_number', {'directory_number': '1001', 'route_partition_name': 'SITE2_PT'}),
+            ('add_directory_number', {'pattern': '1001', 'route_partition_name': 'SITE1_PT'}),
+        ])]
+
+        self.assertEqual(names, [
+            ['add_directory_number 1001/SITE1_PT', 'delete_directory_number 1001/SITE2_PT'],
+            ['delete_directory_number 1001/SITE1_PT'],
+        ])
+
+    def test_calls_changing_many_objects_refer_to_each_of_them(self):
+        names = [sorted(str(i) for i in wave) for wave in waves([
+            ('update_region_matrix', {'regions': ['SITE1_REG', 'SITE2_REG']}),
+            ('add_region', {'region': 'SITE2_REG'}),
+            ('add_region', {'region': 'SITE1_REG'}),
+        ])]
+
+        self.assertEqual(names, [
+            ['add_region SITE1_REG', 'add_region SITE2_REG'],
+            ['update_region_matrix SITE1_REG,SITE2_REG'],
+        ])
+
+    def test_site_is_provisioned_in_dependency_order(self):
+        result = schedule(self.ucm, SITE, workers=4)
+
+        self.assertTrue(result['success'], result['error'])
+        self.assertEqual(result['waves'], 3)
+        self.assertEqual(self.ucm.get_phone('SEP0000000A0001')['success'], True)
+
+    def test_dependants_of_a_failed_call_are_skipped(self):
+        tasks = [
+            ('add_region', {'region': 'region000000'}),
+            ('add_device_pool', {'device_pool': 'SITE2_DP', 'region': 'region000000'}),
+            ('add_phone', {'phone': 'SEP0000000A0002', 'device_pool': 'SITE2_DP'}),
+            ('add_location', {'location': 'SITE2_LOC'}),
+        ]
+        result = schedule(self.ucm, tasks, workers=4)
+
+        self.assertFalse(result['success'])
+        self.assertEqual([i['response'] for i in result['response']],
+                         ['Region already exists', 'Skipped', 'Skipped', 'Location successfully added'])
+        self.assertEqual(result['response'][2]['error'], 'add_region region000000 failed')
+        self.assertNotIn('addDevicePool', self.mock.stats()['requests'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+Schema cache tests, these do not need a Unified Communications server
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from axl.foley import AXL
+from axl.mock import wsdl
+from axl.schema import SchemaCache, clear_shared_schemas, fingerprint, shared_schema, wsdl_path
+
+
+class TestSchemaCache(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.wsdl = os.path.join(self.dir, 'AXLAPI.wsdl')
+        self.xsd = os.path.join(self.dir, 'AXLSoap.xsd')
+        with open(self.wsdl, 'w') as f:
+            f.write('<definitions/>')
+        with open(self.xsd, 'w') as f:
+            f.write('<schema/>')
+        self.cache_dir = os.path.join(self.dir, 'cache')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_wsdl_path_of_file_url_and_plain_path(self):
+        self.assertEqual(wsdl_path('file:///path/to/AXLAPI.wsdl'), '/path/to/AXLAPI.wsdl')
+        self.assertEqual(wsdl_path('/path/to/AXLAPI.wsdl'), '/path/to/AXLAPI.wsdl')
+
+    def test_remote_wsdl_has_no_fingerprint(self):
+        self.assertIsNone(wsdl_path('https://10.10.11.14:8443/axl/AXLAPI.wsdl'))
+        self.assertIsNone(fingerprint('https://10.10.11.14:8443/axl/AXLAPI.wsdl'))
+
+    def test_fingerprint_changes_when_xsd_changes(self):
+        before = fingerprint('file://' + self.wsdl)
+        with open(self.xsd, 'w') as f:
+            f.write('<schema><element/></schema>')
+        self.assertNotEqual(before, fingerprint('file://' + self.wsdl))
+
+    def test_cached_object_is_returned_for_unchanged_schema(self):
+        SchemaCache(self.wsdl, self.cache_dir).put('id-wsdl', {'parsed': True})
+        self.assertEqual(SchemaCache(self.wsdl, self.cache_dir).get('id-wsdl'), {'parsed': True})
+
+    def test_changed_schema_invalidates_and_purges_stale_entry(self):
+        SchemaCache(self.wsdl, self.cache_dir).put('id-wsdl', {'parsed': True})
+        with open(self.wsdl, 'w') as f:
+            f.write('<definitions><types/></definitions>')
+
+        cache = SchemaCache(self.wsdl, self.cache_dir)
+        self.assertIsNone(cache.get('id-wsdl'))
+
+        cache.put('id-wsdl', {'parsed': 'again'})
+        entries = [i for i in os.listdir(self.cache_dir) if i.startswith('suds-id-wsdl')]
+        self.assertEqual(len(entries), 1)
+
+
+class TestSharedSchema(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.wsdl = 'file://' + os.path.join(self.dir, 'AXLAPI.wsdl')
+        with open(os.path.join(self.dir, 'AXLAPI.wsdl'), 'w') as f:
+            f.write(wsdl())
+        clear_shared_schemas()
+
+    def tearDown(self):
+        clear_shared_schemas()
+        shutil.rmtree(self.dir)
+
+    def test_client_is_built_on_first_use(self):
+        ucm = AXL('axl_user', 'axl_pass', self.wsdl, '10.10.11.14', schema_cache_dir=None)
+        self.assertIsNone(ucm._client)
+        self.assertIs(ucm.client, ucm.client)
+
+    def test_instances_share_schema_and_keep_their_own_transport(self):
+        first = AXL('axl_user', 'axl_pass', self.wsdl, '10.10.11.14', schema_cache_dir=None).client
+        second = AXL('axl_user', 'axl_pass', self.wsdl, '10.10.11.15', schema_cache_dir=None).client
+
+        self.assertIs(first.wsdl, second.wsdl)
+        cached = AXL('axl_user', 'axl_pass', self.wsdl, '10.10.11.16', schema_cache_dir=self.dir).client
+        self.assertIs(cached.wsdl, first.wsdl)
+        self.assertIsNot(first.options.transport, second.options.transport)
+        self.assertEqual(second.options.location, 'https://10.10.11.15:8443/axl/')
+
+    def test_schemas_parsed_with_different_options_are_kept_apart(self):
+        plain = shared_schema(self.wsdl)
+
+        self.assertIs(shared_schema(self.wsdl, transport=object()), plain)
+        self.assertIsNot(shared_schema(self.wsdl, prefixes=False), plain)
+        self.assertIs(shared_schema(self.wsdl, prefixes=False), shared_schema(self.wsdl, prefixes=False))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+"""
+SQLite snapshot tests against a SQLite stand in for the UCM database, these do not need a Unified Communications server
+"""
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from axl.snapshot import TABLES, Snapshot, Table
+from axl.tests.sqlaxl import SQLAXL
+
+CLUSTER = """
+create table location (pkid text, name text);
+create table region (pkid text, name text);
+create table srst (pkid text, name text);
+create table mediaresourcegroup (pkid text, name text, description text, multicast text);
+create table mediaresourcegroupmember (pkid text, fkmediaresourcegroup text, fkdevice text);
+create table mediaresourcelist (pkid text, name text);
+create table mediaresourcelistmember (pkid text, fkmediaresourcelist text, fkmediaresourcegroup text,
+                                      sortorder integer);
+create table devicepool (pkid text, name text, fkregion text, fksrst text, fkcallmanagergroup text,
+                         fkdatetimesetting text, fklocation text, fkmediaresourcelist text);
+create table routepartition (pkid text, name text, description text);
+create table callingsearchspace (pkid text, name text, description text, clause text);
+create table callingsearchspacemember (pkid text, fkcallingsearchspace text, fkroutepartition text,
+                                       sortorder integer);
+create table routegroup (pkid text, name text);
+create table routegroupdevicemap (pkid text, fkroutegroup text, fkdevice text, deviceselectionorder integer);
+create table routelist (pkid text, fkdevice text, fkroutegroup text, selectionorder integer);
+create table numplan (pkid text, dnorpattern text, description text, fkroutepartition text, tkpatternusage integer,
+                      calledpartytransformationmask text, prefixdigitsout text, blockenable text,
+                      fkcallingsearchspace_translation text);
+create table enduser (pkid text, userid text, firstname text, lastname text, mailid text, telephonenumber text);
+create table typeproduct (enum integer, name text);
+create table typeclass (enum integer, name text);
+create table typedeviceprotocol (enum integer, name text);
+create table device (pkid text, name text, description text, tkclass integer, tkproduct integer,
+                     tkdeviceprotocol integer, fkdevicepool text, fkcallingsearchspace text, fklocation text,
+                     fkenduser text, fkmediaresourcelist text);
+create table devicenumplanmap (pkid text, fkdevice text, fknumplan text, numplanindex integer, display text,
+                               displayascii text, label text, e164mask text);
+insert into location values ('l1', 'Hub_None');
+insert into region values ('r1', 'Default');
+insert into devicepool values ('dp1', 'DP1', 'r1', null, null, null, 'l1', null);
+insert into routepartition values ('rp1', 'LINE_PT', '');
+insert into numplan values ('n1', '1001', '', 'rp1', 2, null, null, 'f', null);
+insert into numplan values ('n2', '9.@', '', 'rp1', 5, null, null, 'f', null);
+insert into enduser values ('eu1', 'jsmith', 'John', 'Smith', '', '1001');
+insert into typeproduct values (1, 'Cisco 7841');
+insert into typeclass values (1, 'Phone');
+insert into typeclass values (14, 'Route List');
+insert into typeproduct values (90, 'Route List');
+insert into typedeviceprotocol values (11, 'SIP');
+insert into typedeviceprotocol values (0, 'Digital Access PRI');
+insert into device values ('d1', 'SEP1', 'Phone 1', 1, 1, 11, 'dp1', null, 'l1', 'eu1', null);
+insert into device values ('d2', 'SEP2', 'Phone 2', 1, 1, 11, 'dp1', null, 'l1', null, null);
+insert into device values ('d3', 'RL1', '', 14, 90, 0, null, null, null, null, null);
+insert into routegroup values ('rg1', 'RG1');
+insert into routelist values ('rl1', 'd3', 'rg1', 1);
+insert into devicenumplanmap values ('m1', 'd1', 'n1', 1, 'John Smith', 'John Smith', '', '');
+insert into devicenumplanmap values ('m2', 'd3', 'n2', 1, '', '', '', '');
+"""
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.cluster = sqlite3.connect(':memory:')
+        self.cluster.executescript(CLUSTER)
+        self.ucm = SQLAXL(self.cluster)
+        self.snapshot = Snapshot(self.ucm, os.path.join(self.dir, 'cluster.db'))
+
+    def tearDown(self):
+        self.snapshot.close()
+        shutil.rmtree(self.dir)
+
+    def test_first_sync_copies_every_row(self):
+        counts = self.snapshot.sync()
+
+        self.assertEqual(counts['device'], {'added': 3, 'updated': 0, 'deleted': 0, 'unchanged': 0})
+        self.assertEqual(self.snapshot.stats()['device']['rows'], 3)
+        phone = self.snapshot.phones('SEP1')[0]
+        self.assertEqual(phone['devicePoolName']['value'], 'DP1')
+        self.assertEqual(phone['ownerUserName']['value'], 'jsmith')
+        self.assertEqual(phone['lines']['line'][0]['dirn']['routePartitionName']['value'], 'LINE_PT')
+
+    def test_resync_fetches_only_changed_rows(self):
+        self.snapshot.sync()
+        self.cluster.execute("update device set description = 'Moved' where pkid = 'd2'")
+        self.cluster.execute("delete from enduser where pkid = 'eu1'")
+        self.ucm.queries = []
+
+        counts = self.snapshot.sync()
+
+        self.assertEqual(counts['device'], {'added': 0, 'updated': 1, 'deleted': 0, 'unchanged': 2})
+        self.assertEqual(counts['enduser']['deleted'], 1)
+        # a fingerprint query per table and one query for the changed device
+        self.assertEqual(len(self.ucm.queries), len(TABLES) + 1)
+        self.assertIn("d.pkid in ('d2')", self.ucm.queries[-2] + self.ucm.queries[-1])
+        self.assertEqual(self.snapshot.query("select description from device where pkid = 'd2'"),
+                         [{'description': 'Moved'}])
+
+    def test_fingerprints_are_computed_by_the_server(self):
+        query = TABLES['device'].fingerprint_query()
+        rows = list(self.ucm.iter_sql_query(query, key='pkid'))
+
+        self.assertIn('ifx_checksum(', query)
+        self.assertNotIn('||', query)
+        self.assertEqual([sorted(i) for i in rows], [['fingerprint', 'pkid']] * 3)
+        self.assertTrue(all(isinstance(i['fingerprint'], int) for i in rows))
+
+    def test_route_patterns_are_read_with_their_route_list(self):
+        self.snapshot.sync()
+
+        routes = self.snapshot.query(
+            'select n.dnorpattern, d.name as routelist, rg.name as routegroup from numplan n '
+            'inner join devicenumplanmap dnpm on dnpm.fknumplan = n.pkid inner join device d on d.pkid = dnpm.fkdevice '
+            'inner join routelist rl on rl.fkdevice = d.pkid inner join routegroup rg on rg.pkid = rl.fkroutegroup '
+            'where n.tkpatternusage = 5')
+        self.assertEqual(routes, [{'dnorpattern': '9.@', 'routelist': 'RL1', 'routegroup': 'RG1'}])
+
+    def test_columns_added_since_the_snapshot_was_made_are_fetched(self):
+        older = Table('devicepool dp', ['dp.name', 'dp.fkregion'])
+        self.snapshot.close()
+        self.snapshot = Snapshot(self.ucm, os.path.join(self.dir, 'older.db'), tables={'devicepool': older})
+        self.snapshot.sync()
+        self.snapshot.close()
+
+        self.snapshot = Snapshot(self.ucm, os.path.join(self.dir, 'older.db'),
+                                 tables={'devicepool': TABLES['devicepool']})
+        counts = self.snapshot.sync()
+
+        self.assertEqual(counts['devicepool']['updated'], 1)
+        self.assertEqual(self.snapshot.query('select fklocation from devicepool'), [{'fklocation': 'l1'}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+"""
+Teardown tests against a SQLite stand in for the UCM database, these do not need a Unified Communications server
+"""
+import sqlite3
+import unittest
+
+from axl.teardown import teardown
+from axl.tests.sqlaxl import SQLAXL
+
+CLUSTER = """
+create table region (pkid text, name text);
+create table location (pkid text, name text);
+create table devicepool (pkid text, name text, fkregion text, fklocation text, fkcallingsearchspace_aar text,
+                         fkcallingsearchspace_autoregistration text, fkcallingsearchspace_adjunct text,
+                         fkcallingsearchspace_mobility text, fkcallingsearchspace_cgpntransform text,
+                         fkcallingsearchspace_cdpntransform text);
+create table device (pkid text, name text, tkclass integer, fkdevicepool text, fklocation text,
+                     fkcallingsearchspace text, fkcallingsearchspace_aar text);
+create table routepartition (pkid text, name text);
+create table callingsearchspace (pkid text, name text);
+create table callingsearchspacemember (pkid text, fkcallingsearchspace text, fkroutepartition text);
+create table numplan (pkid text, dnorpattern text, fkroutepartition text, tkpatternusage integer,
+                      fkcallingsearchspace_translation text, fkcallingsearchspace_sharedlineappearance text,
+                      fkcallingsearchspace_cfb text, fkcallingsearchspace_cfbint text, fkcallingsearchspace_cfna text,
+                      fkcallingsearchspace_cfnaint text, fkcallingsearchspace_cfur text,
+                      fkcallingsearchspace_cfurint text, fkcallingsearchspace_pff text,
+                      fkcallingsearchspace_pffint text);
+create table routegroup (pkid text, name text);
+create table routegroupdevicemap (pkid text, fkroutegroup text, fkdevice text);
+create table routelist (pkid text, fkdevice text, fkroutegroup text);
+create table mediaresourcegroup (pkid text, name text);
+create table mediaresourcegroupmember (pkid text, fkmediaresourcegroup text, fkdevice text);
+insert into region values ('r1', 'R1');
+insert into region values ('r2', 'R2');
+insert into location values ('l1', 'L1');
+insert into devicepool (pkid, name, fkregion) values ('dp1', 'DP1', 'r1');
+insert into devicepool (pkid, name, fkregion) values ('dp2', 'DP2', 'r2');
+insert into devicepool (pkid, name, fklocation) values ('dp3', 'DP3', 'l1');
+insert into devicepool (pkid, name) values ('dp4', 'DP4');
+insert into devicepool (pkid, name, fkcallingsearchspace_aar) values ('dp5', 'DP5', 'css1');
+insert into device (pkid, name, tkclass, fkdevicepool) values ('d1', 'SEP1', 1, 'dp1');
+insert into device (pkid, name, tkclass, fkdevicepool) values ('d2', 'SEP2', 1, 'dp1');
+insert into device (pkid, name, tkclass, fkdevicepool) values ('d3', 'GW1', 2, 'dp1');
+insert into device (pkid, name, tkclass, fkdevicepool) values ('d4', 'GW2', 2, 'dp2');
+insert into device (pkid, name, tkclass) values ('d5', 'RL1', 14);
+insert into device (pkid, name, tkclass, fkdevicepool, fklocation) values ('d6', 'SEP4', 1, 'dp3', 'l1');
+insert into device (pkid, name, tkclass, fkdevicepool) values ('d7', 'UDP1', 254, 'dp3');
+insert into device (pkid, name, tkclass, fkdevicepool) values ('d8', 'RDP1', 20, 'dp4');
+insert into device (pkid, name, tkclass, fkdevicepool, fkcallingsearchspace) values ('d9', 'SEP5', 1, 'dp5', 'css1');
+insert into routepartition values ('rp1', 'PT1');
+insert into routepartition values ('rp2', 'PT2');
+insert into callingsearchspace values ('css1', 'CSS1');
+insert into callingsearchspacemember values ('cm1', 'css1', 'rp2');
+insert into numplan (pkid, dnorpattern, fkroutepartition, tkpatternusage) values ('n1', '1001', 'rp1', 2);
+insert into numplan (pkid, dnorpattern, fkroutepartition, tkpatternusage, fkcallingsearchspace_cfb)
+values ('n2', '2002', 'rp2', 2, 'css1');
+insert into routegroup values ('rg1', 'RG1');
+insert into routegroup values ('rg2', 'RG2');
+insert into routegroupdevicemap values ('m1', 'rg1', 'd3');
+insert into routegroupdevicemap values ('m2', 'rg2', 'd4');
+insert into routelist values ('l1', 'd5', 'rg2');
+"""
+
+
+class TestTeardown(unittest.TestCase):
+
+    def setUp(self):
+        self.cluster = sqlite3.connect(':memory:', check_same_thread=False)
+        self.cluster.executescript(CLUSTER)
+
+    def tearDown(self):
+        self.cluster.close()
+
+    def test_referencing_objects_are_found_and_ordered(self):
+        ucm = SQLAXL(self.cluster)
+        site = teardown(ucm, [('region', 'R1'), ('partition', 'PT1')])
+
+        self.assertEqual(site.levels, [
+            [('directory_number', ('1001', 'PT1')), ('phone', 'SEP1'), ('phone', 'SEP2'), ('route_group', 'RG1')],
+            [('h323_gateway', 'GW1'), ('partition', 'PT1')],
+            [('device_pool', 'DP1')],
+            [('region', 'R1')],
+        ])
+        self.assertEqual(site.blocked, {})
+        self.assertEqual(ucm.deleted, [])
+
+    def test_levels_are_deleted_in_order(self):
+        ucm = SQLAXL(self.cluster)
+        site = teardown(ucm, [('region', 'R1'), ('partition', 'PT1')])
+        result = site.apply(ucm, workers=4)
+
+        self.assertTrue(result['success'], result['error'])
+        self.assertEqual(len(ucm.deleted), len(site))
+        position = dict((item, n) for n, item in enumerate(ucm.deleted))
+        for referenced, referencing in site.references.items():
+            for i in referencing:
+                self.assertLess(position[i], position[referenced])
+
+    def test_objects_referenced_by_a_failed_delete_are_skipped(self):
+        ucm = SQLAXL(self.cluster, failing=[('h323_gateway', 'GW1')])
+        result = teardown(ucm, [('region', 'R1')]).apply(ucm, workers=4)
+
+        self.assertFalse(result['success'])
+        self.assertEqual(result['error'], '3 of 6 deletes failed')
+        self.assertEqual(result['response'][('device_pool', 'DP1')]['response'], 'Skipped')
+        self.assertEqual(result['response'][('region', 'R1')]['error'], 'delete_h323_gateway GW1 failed')
+        self.assertNotIn(('region', 'R1'), ucm.deleted)
+        self.assertIn(('route_group', 'RG1'), ucm.deleted)
+
+    def test_objects_referenced_by_undeletable_objects_are_blocked(self):
+        ucm = SQLAXL(self.cluster)
+        site = teardown(ucm, [('region', 'R2')])
+
+        self.assertEqual(len(site), 0)
+        self.assertEqual(site.blocked[('route_list', 'RL1')], 'no delete method for route_list')
+        self.assertEqual(site.blocked[('region', 'R2')], 'referenced by route_list RL1')
+        self.assertEqual(sorted(site.blocked), [('device_pool', 'DP2'), ('h323_gateway', 'GW2'), ('region', 'R2'),
+                                                ('route_group', 'RG2'), ('route_list', 'RL1')])
+
+        result = site.apply(ucm)
+        self.assertFalse(result['success'])
+        self.assertEqual(ucm.deleted, [])
+
+    def test_device_pools_and_device_profiles_of_a_location_are_found(self):
+        site = teardown(SQLAXL(self.cluster), [('location', 'L1')])
+
+        self.assertEqual(site.levels, [
+            [('device_profile', 'UDP1'), ('phone', 'SEP4')],
+            [('device_pool', 'DP3')],
+            [('location', 'L1')],
+        ])
+
+    def test_remote_destination_profiles_are_not_deleted_as_device_profiles(self):
+        site = teardown(SQLAXL(self.cluster), [('device_pool', 'DP4')])
+
+        self.assertEqual(len(site), 0)
+        self.assertEqual(site.blocked[('device_pool', 'DP4')], 'referenced by remote_destination_profile RDP1')
+
+    def test_calling_search_spaces_of_a_partition_and_their_users_are_found(self):
+        ucm = SQLAXL(self.cluster)
+        site = teardown(ucm, [('partition', 'PT2')])
+
+        self.assertEqual(site.levels, [
+            [('directory_number', ('2002', 'PT2')), ('phone', 'SEP5')],
+            [('device_pool', 'DP5')],
+            [('calling_search_space', 'CSS1')],
+            [('partition', 'PT2')],
+        ])
+        self.assertIn('  - directory_number 2002/PT2', str(site).splitlines())
+
+        result = site.apply(ucm)
+        self.assertTrue(result['success'], result['error'])
+        self.assertIn(('directory_number', ('2002', 'PT2')), ucm.deleted)
+
+    def test_unknown_kinds_are_rejected(self):
+        with self.assertRaises(ValueError):
+            teardown(SQLAXL(self.cluster), [('gateway', 'gw1')])
+
+
+if __name__ == '__main__':
+    unittest.main()
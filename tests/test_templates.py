@@ -0,0 +1,58 @@
+"""
+Request template tests against the mock AXL server, these do not need a Unified Communications server
+"""
+import unittest
+
+from axl.foley import AXL
+from axl.mock import MockAXL
+from axl.templates import TemplateCache, template_cache
+from axl.transport import PooledTransport
+
+
+class TestTemplates(unittest.TestCase):
+
+    def setUp(self):
+        self.mock = MockAXL(size=10)
+        self.ucm = AXL('axl_user', 'axl_pass', self.mock.wsdl, '127.0.0.1', schema_cache_dir=None,
+                       transport=PooledTransport('axl_user', 'axl_pass', limiter=None))
+        self.ucm.client.set_options(location=self.mock.url)
+        self.method = self.ucm.client.wsdl.services[0].ports[0].methods['addUser']
+
+    def tearDown(self):
+        self.mock.close()
+
+    def suds_envelope(self, *args, **kwargs):
+        return self.method.binding.input.get_message(self.method, args, kwargs).plain()
+
+    def test_envelopes_are_byte_identical(self):
+        cache = TemplateCache()
+        for value in ('jsmith', 'a & b', '<x> "y" \'z\'', 'already &amp; escaped', 'caf\xe9', ' padded '):
+            user = {'userid': value, 'lastName': value, 'firstName': '', 'enableCti': True, 'pin': None}
+            self.assertEqual(cache.envelope(self.method, (user,), {}), self.suds_envelope(user))
+
+        self.assertEqual(cache.stats(), {'templates': 1, 'hits': 5, 'misses': 1})
+
+    def test_shapes_that_cant_be_templated_use_suds(self):
+        cache = TemplateCache()
+        self.assertIsNone(cache.envelope(self.method, ({'userid': object()},), {}))
+
+    def test_add_methods_are_sent_from_templates(self):
+        for i in range(3):
+            result = self.ucm.add_user('user{0}'.format(i), 'Smith & Sons')
+            self.assertTrue(result['success'])
+
+        self.assertGreater(template_cache(self.ucm.client.wsdl).stats()['hits'], 0)
+        self.assertEqual(self.ucm.get_user('user2')['response']['lastName'], 'Smith & Sons')
+
+    def test_templates_can_be_turned_off(self):
+        ucm = AXL('axl_user', 'axl_pass', self.mock.wsdl, '127.0.0.1', schema_cache_dir=None, templates=(),
+                  transport=PooledTransport('axl_user', 'axl_pass', limiter=None))
+        ucm.client.set_options(location=self.mock.url)
+        before = template_cache(ucm.client.wsdl).stats()
+
+        self.assertTrue(ucm.add_user('user9', 'Smith')['success'])
+        self.assertEqual(template_cache(ucm.client.wsdl).stats(), before)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+"""
+Rate limiter tests, these do not need a Unified Communications server
+"""
+import unittest
+
+from suds.transport import TransportError
+
+from axl.aio import AsyncTransport
+from axl.bench import stub_server
+from axl.retry import RetryPolicy, recording
+from axl.tests.test_transport import get_phone_request
+from axl.throttle import AdaptiveLimiter, AXLLimiter, TokenBucket, is_throttled, operation_name
+from axl.transport import PooledTransport
+
+
+class Clock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestAdaptiveLimiter(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+
+    def test_token_bucket_delays_requests_over_the_rate(self):
+        bucket = TokenBucket(10.0, 1.0, self.clock)
+        self.assertEqual(bucket.reserve(), 0.0)
+        self.assertAlmostEqual(bucket.reserve(), 0.1)
+        self.assertAlmostEqual(bucket.reserve(), 0.2)
+
+        self.clock.now = 1.0
+        self.assertEqual(bucket.reserve(), 0.0)
+
+    def test_throttle_halves_the_rate_once_per_cooldown(self):
+        limiter = AdaptiveLimiter(rate=40.0, cooldown=1.0, clock=self.clock)
+        limiter.throttled()
+        limiter.throttled()
+        self.assertEqual(limiter.rate, 20.0)
+
+        self.clock.now = 1.0
+        limiter.throttled()
+        self.assertEqual(limiter.rate, 10.0)
+        self.assertEqual(limiter.stats()['throttled'], 3)
+
+    def test_rate_grows_additively_after_the_first_cut(self):
+        limiter = AdaptiveLimiter(rate=10.0, increase=1.0, clock=self.clock)
+        limiter.completed(0.1)
+        self.assertEqual(limiter.rate, 11.0)
+
+        limiter.throttled()
+        limiter.completed(0.1)
+        self.assertAlmostEqual(limiter.rate, 5.5 + 1.0 / 5.5)
+
+    def test_slow_responses_cut_the_rate(self):
+        limiter = AdaptiveLimiter(rate=10.0, latency_factor=2.0, clock=self.clock)
+        limiter.completed(0.1, 'addPhone')
+        for i in range(10):
+            limiter.completed(2.0, 'addPhone')
+
+        self.assertLess(limiter.rate, 10.0)
+        self.assertGreater(limiter.stats()['slow'], 0)
+
+    def test_baseline_follows_an_operation_that_stays_slower(self):
+        limiter = AdaptiveLimiter(rate=10.0, latency_factor=4.0, clock=self.clock)
+        limiter.completed(0.01, 'executeSQLQuery')
+        for i in range(200):
+            limiter.completed(2.0, 'executeSQLQuery')
+        slow = limiter.stats()['slow']
+        for i in range(100):
+            limiter.completed(2.0, 'executeSQLQuery')
+
+        self.assertGreater(slow, 0)
+        self.assertEqual(limiter.stats()['slow'], slow)
+
+    def test_limiter_is_on_by_default(self):
+        self.assertIsInstance(PooledTransport('axl_user', 'axl_pass').limiter, AXLLimiter)
+        self.assertIsInstance(AsyncTransport('axl_user', 'axl_pass').limiter, AXLLimiter)
+        self.assertIsNone(PooledTransport('axl_user', 'axl_pass', limiter=None).limiter)
+
+    def test_reads_and_writes_are_limited_separately(self):
+        limiter = AXLLimiter()
+        self.assertIs(limiter.limiter('getPhone'), limiter.read)
+        self.assertIs(limiter.limiter('executeSQLQuery'), limiter.read)
+        self.assertIs(limiter.limiter('addPhone'), limiter.write)
+        self.assertEqual(operation_name(b'"CUCM:DB ver=10.5 listPhone"'), 'listPhone')
+
+    def test_throttle_faults_are_recognised(self):
+        self.assertTrue(is_throttled(503, b''))
+        self.assertTrue(is_throttled(500, b'<faultstring>AXL Web Service is throttled</faultstring>'))
+        self.assertFalse(is_throttled(500, b'<faultstring>duplicate value</faultstring>'))
+
+
+class TestThrottledTransport(unittest.TestCase):
+
+    def setUp(self):
+        self.server = stub_server(replies=[(503, b'')] * 2)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_throttled_request_is_sent_again_at_a_lower_rate(self):
+        transport = PooledTransport('axl_user', 'axl_pass', limiter=True)
+        rate = transport.limiter.read.rate
+
+        reply = transport.send(get_phone_request(self.server.url))
+
+        self.assertEqual(reply.code, 200)
+        self.assertEqual(transport.limiter.read.stats()['throttled'], 2)
+        self.assertLess(transport.limiter.read.rate, rate)
+
+
+    def test_throttled_request_is_not_sent_again_by_the_retry_policy(self):
+        transport = PooledTransport('axl_user', 'axl_pass', limiter=True, throttle_retries=1,
+                                    retry=RetryPolicy(backoff=0))
+
+        with recording() as record:
+            with self.assertRaises(TransportError):
+                transport.send(get_phone_request(self.server.url))
+
+        self.assertEqual(record.attempts, 1)
+        self.assertEqual(transport.limiter.read.stats()['throttled'], 2)
+
+    def test_throttled_request_is_sent_again_without_a_limiter(self):
+        transport = PooledTransport('axl_user', 'axl_pass', limiter=None, retry=RetryPolicy(backoff=0))
+
+        reply = transport.send(get_phone_request(self.server.url))
+
+        self.assertEqual(reply.code, 200)
+
+
+if __name__ == '__main__':
+    unittest.main()
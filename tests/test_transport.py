@@ -0,0 +1,118 @@
+"""
+Transport tests against a local stub server, these do not need a Unified Communications server
+"""
+import unittest
+
+from suds.transport import Request
+
+from axl.bench import stub_server
+from axl.transport import PooledTransport
+
+
+def get_phone_request(url):
+    request = Request(url, b'<getPhone/>')
+    request.headers = {'SOAPAction': '"CUCM:DB ver=10.5 getPhone"'}
+    return request
+
+
+class TestPooledTransport(unittest.TestCase):
+
+    def setUp(self):
+        self.server = stub_server()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_requests_reuse_one_connection(self):
+        transport = PooledTransport('axl_user', 'axl_pass')
+        for i in range(10):
+            reply = transport.send(get_phone_request(self.server.url))
+            self.assertEqual(reply.code, 200)
+
+        stats = transport.stats()
+        self.assertEqual(stats['connects'], 1)
+        self.assertEqual(stats['reused'], stats['requests'] - 1)
+
+    def test_idle_connections_are_closed_after_idle_timeout(self):
+        transport = PooledTransport('axl_user', 'axl_pass', idle_timeout=0)
+        transport.send(get_phone_request(self.server.url))
+        transport.send(get_phone_request(self.server.url))
+
+        self.assertEqual(transport.stats()['reused'], 0)
+
+    def test_preemptive_auth_needs_one_exchange_per_request(self):
+        transport = PooledTransport('axl_user', 'axl_pass', limiter=None)
+        for i in range(10):
+            transport.send(get_phone_request(self.server.url))
+
+        self.assertEqual(self.server.exchanges, 10)
+
+    def test_challenge_auth_answers_the_401(self):
+        transport = PooledTransport('axl_user', 'axl_pass', limiter=None, preemptive=False)
+        reply = transport.send(get_phone_request(self.server.url))
+
+        self.assertEqual(reply.code, 200)
+        self.assertEqual(self.server.exchanges, 2)
+
+    def test_session_cookie_is_reused(self):
+        transport = PooledTransport('axl_user', 'axl_pass', limiter=None)
+        for i in range(10):
+            transport.send(get_phone_request(self.server.url))
+
+        self.assertEqual(self.server.logins, 1)
+        self.assertEqual(transport.stats()['session_reused'], 9)
+
+    def test_expired_session_is_authenticated_again(self):
+        transport = PooledTransport('axl_user', 'axl_pass', limiter=None)
+        transport.send(get_phone_request(self.server.url))
+        self.server.sessions.clear()
+        reply = transport.send(get_phone_request(self.server.url))
+        transport.send(get_phone_request(self.server.url))
+
+        stats = transport.stats()
+        self.assertEqual(reply.code, 200)
+        self.assertEqual(self.server.logins, 2)
+        self.assertEqual((stats['sessions'], stats['session_expired'], stats['session_reused']), (2, 1, 1))
+
+    def test_grown_pool_allows_more_connections(self):
+        transport = PooledTransport('axl_user', 'axl_pass', pool_size=1)
+        transport.send(get_phone_request(self.server.url))
+        transport.grow(4)
+
+        pool = list(transport.pools.values())[0]
+        connections = [pool.acquire() for i in range(4)]
+        [pool.release(i) for i in connections]
+
+        self.assertEqual(transport.pool_size, 4)
+        self.assertEqual(pool.size, 4)
+
+
+class TestTLS(unittest.TestCase):
+
+    def setUp(self):
+        self.server = stub_server(tls=True)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_persistent_connection_needs_one_handshake(self):
+        transport = PooledTransport('axl_user', 'axl_pass', limiter=None)
+        for i in range(5):
+            self.assertEqual(transport.send(get_phone_request(self.server.url)).code, 200)
+
+        stats = transport.stats()
+        self.assertEqual((stats['connects'], stats['handshakes'], stats['resumed']), (1, 1, 0))
+
+    def test_new_connections_resume_the_tls_session(self):
+        transport = PooledTransport('axl_user', 'axl_pass', idle_timeout=0, limiter=None)
+        for i in range(5):
+            self.assertEqual(transport.send(get_phone_request(self.server.url)).code, 200)
+
+        stats = transport.stats()
+        self.assertEqual((stats['connects'], stats['handshakes'], stats['resumed']), (5, 1, 4))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,242 @@
+"""
+Adaptive rate limiting for AXL requests.
+UCM throttles AXL and rejects requests with a 503 or a throttle fault when it is overloaded.
+Each limiter is a token bucket whose rate is learned with additive increase, multiplicative decrease:
+the rate creeps up while requests succeed and is cut when UCM throttles or responses slow down.
+Reads and writes are limited separately, UCM throttles writes much harder than reads.
+"""
+
+import threading
+import time
+
+# Fault strings UCM returns when AXL requests are throttled
+THROTTLE_FAULTS = (b'throttl', b'maximum axl memory allocation consumed')
+
+
+def operation_name(soap_action):
+    """
+    AXL operation name of a SOAPAction header eg "CUCM:DB ver=10.5 getPhone"
+    :param soap_action: header value, str or bytes
+    :return: operation name, empty if there is no SOAPAction
+    """
+    if isinstance(soap_action, bytes):
+        soap_action = soap_action.decode('utf-8')
+    return (soap_action or '').strip('"').split(' ')[-1]
+
+
+def is_read(operation):
+    """
+    Whether an AXL operation only reads configuration
+    :param operation: AXL operation name eg getPhone
+    :return: bool
+    """
+    return operation.startswith(('get', 'list')) or operation == 'executeSQLQuery'
+
+
+def is_throttled(status, data):
+    """
+    Whether a response is UCM rejecting the request because of throttling,
+    the request was not processed so it can be sent again
+    :param status: HTTP status
+    :param data: response body
+    :return: bool
+    """
+    if status == 503:
+        return True
+    if status == 500:
+        data = data.lower()
+        return any(i in data for i in THROTTLE_FAULTS)
+    return False
+
+
+class TokenBucket(object):
+    """
+    Token bucket, callers reserve a token and wait for the returned delay before sending
+    """
+
+    def __init__(self, rate, burst, clock=time.monotonic):
+        """
+        :param rate: tokens per second
+        :param burst: maximum number of tokens saved up
+        :param clock: monotonic clock in seconds
+        """
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = burst
+        self.stamp = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        Take a token, tokens taken before they are available are owed by later callers
+        :return: seconds to wait before sending
+        """
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate)
+
+    def set_rate(self, rate, burst):
+        """
+        Change the rate, tokens saved up so far are kept
+        :param rate: tokens per second
+        :param burst: maximum number of tokens saved up
+        """
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(burst, self.tokens + (now - self.stamp) * self.rate)
+            self.stamp = now
+            self.rate = rate
+            self.burst = burst
+
+
+class AdaptiveLimiter(object):
+    """
+    Token bucket with a rate learned from UCM responses.
+    Until the first cut the rate doubles every second of successful requests, after that it grows by
+    increase requests per second for every second of successful requests. It is multiplied by decrease
+    when UCM throttles or the response time of an operation grows past latency_factor times its baseline.
+    The baseline follows a faster response at once and a slower one gradually, so an operation whose
+    requests vary in cost, like executeSQLQuery, moves its baseline instead of being judged against the
+    fastest request ever seen. The rate is cut at most once per cooldown seconds, the responses to
+    requests already in flight do not cut it again.
+    """
+
+    def __init__(self, rate=10.0, min_rate=0.5, max_rate=200.0, increase=1.0, decrease=0.5,
+                 latency_factor=4.0, baseline_weight=0.05, cooldown=1.0, clock=time.monotonic):
+        """
+        :param rate: starting requests per second
+        :param min_rate: lowest requests per second
+        :param max_rate: highest requests per second
+        :param increase: requests per second added for every second of successful requests
+        :param decrease: factor the rate is multiplied by on throttling
+        :param latency_factor: response time over the baseline response time that counts as overload
+        :param baseline_weight: weight of a slower response time in the baseline of its operation
+        :param cooldown: minimum seconds between two rate cuts
+        :param clock: monotonic clock in seconds
+        """
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.baseline_weight = baseline_weight
+        self.cooldown = cooldown
+        self.clock = clock
+        self.bucket = TokenBucket(rate, max(1.0, rate), clock)
+
+        self.latency = {}
+        self.baseline = {}
+        self.throttled_count = 0
+        self.slow_count = 0
+        self.waited = 0.0
+        self._cut = None
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self):
+        """
+        Current requests per second
+        """
+        return self.bucket.rate
+
+    def _set_rate(self, rate):
+        rate = min(self.max_rate, max(self.min_rate, rate))
+        self.bucket.set_rate(rate, max(1.0, rate))
+
+    def reserve(self):
+        """
+        Reserve a request
+        :return: seconds to wait before sending
+        """
+        delay = self.bucket.reserve()
+        with self._lock:
+            self.waited += delay
+        return delay
+
+    def completed(self, latency, operation=''):
+        """
+        Report a request that was not throttled
+        :param latency: response time in seconds
+        :param operation: AXL operation name, response times are compared per operation
+        """
+        with self._lock:
+            average = self.latency.get(operation, latency) * 0.8 + latency * 0.2
+            self.latency[operation] = average
+            baseline = self.baseline.get(operation, average)
+            slow = average > baseline * self.latency_factor
+            if average < baseline:
+                self.baseline[operation] = average
+            else:
+                self.baseline[operation] = baseline + (average - baseline) * self.baseline_weight
+            if slow:
+                self.slow_count += 1
+            increase = 1.0 if self._cut is None else self.increase / self.rate
+        if slow:
+            self._decrease()
+        else:
+            self._set_rate(self.rate + increase)
+
+    def throttled(self):
+        """
+        Report a request UCM throttled
+        """
+        with self._lock:
+            self.throttled_count += 1
+        self._decrease()
+
+    def _decrease(self):
+        with self._lock:
+            now = self.clock()
+            if self._cut is not None and now - self._cut < self.cooldown:
+                return
+            self._cut = now
+        self._set_rate(self.rate * self.decrease)
+
+    def stats(self):
+        """
+        Limiter counters
+        :return: dictionary of the current rate, throttled and slow responses and seconds waited
+        """
+        with self._lock:
+            return {
+                'rate': self.rate,
+                'throttled': self.throttled_count,
+                'slow': self.slow_count,
+                'waited': self.waited,
+            }
+
+
+class AXLLimiter(object):
+    """
+    Separate adaptive limiters for AXL reads and writes
+    """
+
+    def __init__(self, read=None, write=None):
+        """
+        :param read: AdaptiveLimiter for reads
+        :param write: AdaptiveLimiter for writes
+        """
+        self.read = read or AdaptiveLimiter(rate=20.0, max_rate=500.0, increase=2.0)
+        self.write = write or AdaptiveLimiter(rate=10.0, max_rate=200.0)
+
+    def limiter(self, operation):
+        """
+        Get the limiter of an operation
+        :param operation: AXL operation name eg addPhone
+        :return: AdaptiveLimiter
+        """
+        return self.read if is_read(operation) else self.write
+
+    def stats(self):
+        """
+        Limiter counters
+        :return: dictionary of read and write counters
+        """
+        return {
+            'read': self.read.stats(),
+            'write': self.write.stats(),
+        }
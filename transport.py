@@ -0,0 +1,590 @@
+"""
+Pooled keep-alive HTTP(S) transport for the AXL client.
+The suds urllib transport opens a new TCP connection and does a full TLS handshake
+for every SOAP call, this transport keeps a bounded pool of persistent connections
+per host and resumes TLS sessions when a new connection is needed.
+"""
+
+import base64
+import collections
+import http.client
+import http.cookies
+import io
+import ssl
+import threading
+import time
+import urllib.parse
+import urllib.request
+
+from suds.transport import Reply
+from suds.transport import Transport
+from suds.transport import TransportError
+
+from .retry import RetryPolicy
+from .retry import TRANSIENT_ERRORS
+from .retry import TRANSIENT_STATUS
+from .retry import current
+from .retry import is_duplicate
+from .throttle import AXLLimiter
+from .throttle import is_throttled
+from .throttle import operation_name
+
+# Bytes read at a time when a reply is streamed
+STREAM_CHUNK_SIZE = 65536
+
+
+def unverified_context():
+    """
+    SSL context that does not verify the UCM certificate, UCM ships with a self signed certificate
+    :return: ssl context
+    """
+    context = ssl.create_default_context()
+    context.check_hostname = False
+    context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+def basic_authorization(username, password):
+    """
+    Basic authorization header value
+    :param username: axl username
+    :param password: axl password
+    :return: header value
+    """
+    token = '{0}:{1}'.format(username, password).encode('utf-8')
+    return 'Basic {0}'.format(base64.b64encode(token).decode('ascii'))
+
+
+class SessionJar(object):
+    """
+    UCM session cookies per host. UCM sets JSESSIONIDSSO and JSESSIONID on the first authenticated
+    request, Tomcat does not authenticate again requests that send them back.
+    """
+
+    names = ('JSESSIONID', 'JSESSIONIDSSO')
+    counters = ('sessions', 'session_reused', 'session_expired')
+
+    def __init__(self):
+        self.cookies = {}
+        self.sessions = 0
+        self.session_reused = 0
+        self.session_expired = 0
+        self._lock = threading.Lock()
+
+    def cookie(self, host):
+        """
+        Cookie header of the session with a host
+        :param host: tuple of scheme, host and port
+        :return: header value, None without a session
+        """
+        with self._lock:
+            cookies = self.cookies.get(host)
+            if not cookies:
+                return None
+            return '; '.join('{0}={1}'.format(k, v) for k, v in sorted(cookies.items()))
+
+    def update(self, host, reply_headers):
+        """
+        Keep the session cookies a host set
+        :param host: tuple of scheme, host and port
+        :param reply_headers: response headers
+        """
+        cookies = {}
+        for header in reply_headers.get_all('Set-Cookie') or []:
+            jar = http.cookies.SimpleCookie()
+            jar.load(header)
+            cookies.update((k, v.value) for k, v in jar.items() if k in self.names)
+        if not cookies:
+            return
+        with self._lock:
+            current = self.cookies.setdefault(host, {})
+            if 'JSESSIONIDSSO' in cookies and cookies['JSESSIONIDSSO'] != current.get('JSESSIONIDSSO'):
+                self.sessions += 1
+            current.update(cookies)
+
+    def reused(self):
+        """
+        Count a request authenticated by its session
+        """
+        with self._lock:
+            self.session_reused += 1
+
+    def expire(self, host, cookie):
+        """
+        Forget a session the host no longer accepts
+        :param host: tuple of scheme, host and port
+        :param cookie: Cookie header the host rejected
+        """
+        with self._lock:
+            self.session_expired += 1
+            cookies = self.cookies.get(host)
+            # another request may already have a new session
+            if cookies and '; '.join('{0}={1}'.format(k, v) for k, v in sorted(cookies.items())) == cookie:
+                del self.cookies[host]
+
+    def stats(self):
+        """
+        Session counters
+        :return: dictionary of counters
+        """
+        with self._lock:
+            return {
+                'sessions': self.sessions,
+                'session_reused': self.session_reused,
+                'session_expired': self.session_expired,
+            }
+
+
+def with_session(headers, cookie):
+    """
+    Request headers that authenticate with a session cookie rather than the credentials
+    :param headers: request headers
+    :param cookie: Cookie header value
+    :return: new headers
+    """
+    headers = dict(headers)
+    headers.pop('Authorization', None)
+    headers['Cookie'] = cookie
+    return headers
+
+
+# Steps of sending a request, waiting some seconds and making an HTTP exchange with some headers
+Pause = collections.namedtuple('Pause', 'seconds')
+Exchange = collections.namedtuple('Exchange', 'headers')
+
+
+class Sender(object):
+    """
+    Decisions of sending a request, shared by PooledTransport and AsyncTransport: the retry attempts, pacing
+    and sending throttled requests again, marking an add an earlier attempt applied and the credentials to send.
+    steps is a generator of the Pause and Exchange steps of a request, the transports only do the waiting and
+    the HTTP exchanges. Subclasses have limiter, throttle_retries, retry, preemptive and sessions attributes
+    and a credentials method.
+    """
+
+    def steps(self, host, headers):
+        """
+        Steps of sending a request.
+        Yields Pause and Exchange steps, the reply of an Exchange is sent in as a tuple of status, reason,
+        headers and body, or the error it failed with is thrown in.
+        :param host: tuple of scheme, host and port
+        :param headers: request headers
+        :return: tuple of status, reason, headers and body
+        """
+        headers = dict(headers)
+        if self.preemptive:
+            headers['Authorization'] = self.credentials()
+
+        operation = operation_name(headers.get('SOAPAction'))
+        record = current()
+        attempts = self.retry.attempts if self.retry is not None and self.retry.retryable(operation) else 1
+        # whether an earlier attempt may have been applied by UCM
+        unknown = False
+
+        for attempt in range(attempts):
+            if attempt:
+                yield Pause(self.retry.delay(attempt))
+            if record is not None:
+                record.attempts += 1
+            try:
+                status, reason, reply_headers, data = yield from self._limited(host, operation, headers)
+            except TRANSIENT_ERRORS as e:
+                if attempt == attempts - 1:
+                    raise
+                unknown = unknown or not isinstance(e, ConnectionRefusedError)
+                continue
+            # throttled requests were not processed and have been sent again by _limited already
+            if status not in TRANSIENT_STATUS or is_throttled(status, data) or attempt == attempts - 1:
+                break
+            unknown = True
+
+        if unknown and record is not None and is_duplicate(operation, status, data):
+            record.applied = True
+        return status, reason, reply_headers, data
+
+    def _limited(self, host, operation, headers):
+        """
+        Steps of a request paced by the rate limiter, sending it again while UCM throttles it.
+        This is the only place throttled requests are sent again, without a rate limiter they wait
+        for the retry policy backoff and are not sent again when there is no retry policy.
+        :return: tuple of status, reason, headers and body
+        """
+        limiter = self.limiter.limiter(operation) if self.limiter is not None and operation else None
+
+        for attempt in range(self.throttle_retries + 1):
+            if limiter is not None:
+                yield Pause(limiter.reserve())
+            elif attempt:
+                yield Pause(self.retry.delay(attempt))
+            start = time.monotonic()
+            status, reason, reply_headers, data = yield from self._authenticated(host, headers)
+            throttled = is_throttled(status, data)
+            if limiter is not None and throttled:
+                limiter.throttled()
+            elif limiter is not None:
+                limiter.completed(time.monotonic() - start, operation)
+            if not throttled or (limiter is None and self.retry is None):
+                break
+        return status, reason, reply_headers, data
+
+    def _authenticated(self, host, headers):
+        """
+        Steps of a request authenticating with the session cookie when there is one.
+        An expired session and a basic authentication challenge are answered with the credentials.
+        :return: tuple of status, reason, headers and body
+        """
+        cookie = self.sessions.cookie(host) if self.sessions is not None else None
+
+        if cookie is not None:
+            status, reason, reply_headers, data = yield Exchange(with_session(headers, cookie))
+            if status != 401:
+                self.sessions.reused()
+                self.sessions.update(host, reply_headers)
+                return status, reason, reply_headers, data
+            self.sessions.expire(host, cookie)
+            headers['Authorization'] = self.credentials()
+
+        status, reason, reply_headers, data = yield Exchange(headers)
+        if (status == 401 and 'Authorization' not in headers and
+                'basic' in reply_headers.get('WWW-Authenticate', '').lower()):
+            headers['Authorization'] = self.credentials()
+            status, reason, reply_headers, data = yield Exchange(headers)
+        if self.sessions is not None:
+            self.sessions.update(host, reply_headers)
+        return status, reason, reply_headers, data
+
+
+class _HTTPSConnection(http.client.HTTPSConnection):
+    """
+    HTTPS connection that resumes the last TLS session of its pool
+    """
+
+    def __init__(self, pool, host, port, timeout, context):
+        super(_HTTPSConnection, self).__init__(host, port, timeout=timeout, context=context)
+        self.pool = pool
+
+    def connect(self):
+        http.client.HTTPConnection.connect(self)
+        self.sock = self._context.wrap_socket(self.sock, server_hostname=self.host, session=self.pool.tls_session)
+        self.pool.connected(self.sock)
+
+
+class _HTTPConnection(http.client.HTTPConnection):
+    """
+    Plain HTTP connection, used for local test servers
+    """
+
+    def __init__(self, pool, host, port, timeout):
+        super(_HTTPConnection, self).__init__(host, port, timeout=timeout)
+        self.pool = pool
+
+    def connect(self):
+        http.client.HTTPConnection.connect(self)
+        self.pool.connected(None)
+
+
+class ConnectionPool(object):
+    """
+    Bounded pool of persistent connections to one host.
+    At most size connections are open at once, callers wait for a free connection.
+    Idle connections are closed after idle_timeout seconds.
+    """
+
+    counters = ('connects', 'handshakes', 'resumed', 'requests', 'reused', 'idle')
+
+    def __init__(self, scheme, host, port, size=4, idle_timeout=60, timeout=90, context=None):
+        """
+        :param scheme: http or https
+        :param host: host name or IP address
+        :param port: TCP port
+        :param size: maximum number of connections
+        :param idle_timeout: seconds an idle connection is kept open
+        :param timeout: socket timeout in seconds
+        :param context: ssl context for https connections
+        """
+        self.scheme = scheme
+        self.host = host
+        self.port = port
+        self.size = size
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+        self.context = context or unverified_context()
+        self.tls_session = None
+
+        self.connects = 0
+        self.handshakes = 0
+        self.resumed = 0
+        self.requests = 0
+        self.reused = 0
+
+        self._idle = collections.deque()
+        self._slots = threading.Semaphore(size)
+        self._lock = threading.Lock()
+
+    def connected(self, sock):
+        """
+        Called by a pool connection after it connected
+        :param sock: the ssl socket, None for plain http
+        """
+        with self._lock:
+            self.connects += 1
+            if sock is not None:
+                if sock.session_reused:
+                    self.resumed += 1
+                else:
+                    self.handshakes += 1
+                self.tls_session = sock.session
+
+    def grow(self, size):
+        """
+        Allow more connections
+        :param size: new maximum number of connections, ignored if not larger than the current one
+        """
+        with self._lock:
+            extra = size - self.size
+            if extra <= 0:
+                return
+            self.size = size
+        for i in range(extra):
+            self._slots.release()
+
+    def acquire(self):
+        """
+        Get a connection, reusing an idle one when there is one
+        :return: connection
+        """
+        self._slots.acquire()
+        now = time.monotonic()
+        with self._lock:
+            while self._idle:
+                conn, since = self._idle.pop()
+                if now - since < self.idle_timeout:
+                    return conn
+                conn.close()
+        if self.scheme == 'https':
+            return _HTTPSConnection(self, self.host, self.port, self.timeout, self.context)
+        return _HTTPConnection(self, self.host, self.port, self.timeout)
+
+    def release(self, conn, reusable=True):
+        """
+        Return a connection to the pool
+        :param conn: connection
+        :param reusable: False if the connection must be closed
+        """
+        if reusable:
+            with self._lock:
+                # a TLS 1.3 server sends its session ticket after the handshake, the session can be
+                # resumed once a reply has been read
+                if getattr(conn.sock, 'session', None) is not None:
+                    self.tls_session = conn.sock.session
+                self._idle.append((conn, time.monotonic()))
+        else:
+            conn.close()
+        self._slots.release()
+
+    def request(self, method, path, body, headers, sink=None):
+        """
+        Make a request on a pooled connection.
+        A request on an idle connection the server already closed is resent once on a new connection.
+        :param method: HTTP method
+        :param path: request path
+        :param body: request body
+        :param headers: request headers
+        :param sink: object with reset() and feed(data) that is fed the body of a 200 reply as it is read
+        :return: tuple of status, reason, headers and body, the body is empty when it went to the sink
+        """
+        for attempt in range(2):
+            conn = self.acquire()
+            fresh = conn.sock is None
+            try:
+                conn.request(method, path, body, headers)
+                resp = conn.getresponse()
+                if sink is not None and resp.status == 200:
+                    sink.reset()
+                    data = resp.read(STREAM_CHUNK_SIZE)
+                    while data:
+                        sink.feed(data)
+                        data = resp.read(STREAM_CHUNK_SIZE)
+                else:
+                    data = resp.read()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                self.release(conn, reusable=False)
+                if fresh or attempt:
+                    raise
+                continue
+            except Exception:
+                self.release(conn, reusable=False)
+                raise
+
+            with self._lock:
+                self.requests += 1
+                if not fresh:
+                    self.reused += 1
+            self.release(conn, reusable=not resp.will_close)
+            return resp.status, resp.reason, resp.headers, data
+
+    def close(self):
+        """
+        Close the idle connections
+        """
+        with self._lock:
+            while self._idle:
+                self._idle.pop()[0].close()
+
+    def stats(self):
+        """
+        Connection counters
+        :return: dictionary of counters
+        """
+        with self._lock:
+            return {
+                'connects': self.connects,
+                'handshakes': self.handshakes,
+                'resumed': self.resumed,
+                'requests': self.requests,
+                'reused': self.reused,
+                'idle': len(self._idle),
+            }
+
+
+class PooledTransport(Sender, Transport):
+    """
+    suds transport with a pool of persistent connections per host and HTTP basic authentication
+    """
+
+    def __init__(self, username, password, pool_size=4, idle_timeout=60, context=None, limiter=True,
+                 throttle_retries=5, retry=True, preemptive=True, session=True):
+        """
+        :param username: axl username
+        :param password: axl password
+        :param pool_size: maximum number of connections per host
+        :param idle_timeout: seconds an idle connection is kept open
+        :param context: ssl context, defaults to one that does not verify the UCM certificate
+        :param limiter: AXLLimiter, True for a default adaptive limiter, None to send without limiting
+        :param throttle_retries: times a request UCM throttled is sent again
+        :param retry: RetryPolicy for transient failures, True for the default policy, None to not retry
+        :param preemptive: send credentials with every request, False to wait for the 401 challenge
+        :param session: reuse the UCM session cookie instead of sending credentials, False to authenticate every request
+        """
+        Transport.__init__(self)
+        self.options.username = username
+        self.options.password = password
+        self.pool_size = pool_size
+        self.idle_timeout = idle_timeout
+        self.context = context or unverified_context()
+        self.limiter = AXLLimiter() if limiter is True else limiter
+        self.throttle_retries = throttle_retries
+        self.retry = RetryPolicy() if retry is True else retry
+        self.preemptive = preemptive
+        self.sessions = SessionJar() if session else None
+        self.pools = {}
+        self._lock = threading.Lock()
+
+    def pool(self, scheme, host, port):
+        """
+        Get the connection pool of a host
+        :param scheme: http or https
+        :param host: host name or IP address
+        :param port: TCP port
+        :return: ConnectionPool
+        """
+        key = (scheme, host, port)
+        with self._lock:
+            if key not in self.pools:
+                self.pools[key] = ConnectionPool(scheme, host, port,
+                                                 size=self.pool_size,
+                                                 idle_timeout=self.idle_timeout,
+                                                 timeout=self.options.timeout,
+                                                 context=self.context)
+            return self.pools[key]
+
+    def grow(self, size):
+        """
+        Allow more connections per host
+        :param size: new maximum number of connections per host, ignored if not larger than the current one
+        """
+        with self._lock:
+            self.pool_size = max(self.pool_size, size)
+            pools = list(self.pools.values())
+        for pool in pools:
+            pool.grow(size)
+
+    def credentials(self):
+        """
+        Basic authorization header value
+        :return: header value
+        """
+        return basic_authorization(self.options.username, self.options.password)
+
+    def open(self, request):
+        url = urllib.parse.urlparse(request.url)
+        if url.scheme not in ('http', 'https'):
+            return urllib.request.urlopen(request.url)
+        reply = self.send(request, method='GET')
+        return io.BytesIO(reply.message)
+
+    def send(self, request, method='POST', sink=None):
+        """
+        Send a request
+        :param request: suds Request
+        :param method: HTTP method
+        :param sink: object with reset() and feed(data) to stream the body of a 200 reply to
+        :return: suds Reply, its message is empty when the body went to the sink
+        """
+        url = urllib.parse.urlparse(request.url)
+        port = url.port or (443 if url.scheme == 'https' else 80)
+        pool = self.pool(url.scheme, url.hostname, port)
+        path = url.path or '/'
+        if url.query:
+            path = '{0}?{1}'.format(path, url.query)
+
+        headers = dict(self.options.headers)
+        headers.update(request.headers)
+
+        status, reason, reply_headers, data = self._run(self.steps((url.scheme, url.hostname, port), headers),
+                                                        pool, method, path, request.message, sink)
+        if status == 200:
+            return Reply(status, reply_headers, data)
+        raise TransportError(reason, status, io.BytesIO(data))
+
+    def _run(self, steps, pool, method, path, body, sink=None):
+        """
+        Take the steps of sending a request, sleeping through the pauses and making the exchanges on the pool
+        :return: tuple of status, reason, headers and body
+        """
+        reply = error = None
+        while True:
+            try:
+                step = steps.send(reply) if error is None else steps.throw(error)
+            except StopIteration as e:
+                return e.value
+            reply = error = None
+            if isinstance(step, Pause):
+                time.sleep(step.seconds)
+                continue
+            try:
+                reply = pool.request(method, path, body, step.headers, sink)
+            except Exception as e:
+                error = e
+
+    def close(self):
+        """
+        Close the idle connections of every pool
+        """
+        with self._lock:
+            for pool in self.pools.values():
+                pool.close()
+
+    def stats(self):
+        """
+        Connection counters summed over every pool and the session counters
+        :return: dictionary of counters
+        """
+        with self._lock:
+            pools = list(self.pools.values())
+        totals = collections.Counter(dict.fromkeys(ConnectionPool.counters + SessionJar.counters, 0))
+        for pool in pools:
+            totals.update(pool.stats())
+        if self.sessions is not None:
+            totals.update(self.sessions.stats())
+        return dict(totals)